@@ -1,6 +1,15 @@
 from ourdestiny.exceptions import *
 from ourdestiny.common import *
+from ourdestiny.cache import *
+from ourdestiny.database import *
+from ourdestiny.compact import *
+from ourdestiny.ratelimit import *
+from ourdestiny.responsecache import *
+from ourdestiny.executor import *
+from ourdestiny.changes import *
+from ourdestiny.transfer import *
 from ourdestiny.client import *
+from ourdestiny.asyncclient import *
 from ourdestiny.profile import *
 from ourdestiny.bungienet import *
 from ourdestiny.character import *
@@ -11,3 +20,5 @@ from ourdestiny.faction import *
 from ourdestiny.season import *
 from ourdestiny.activity import *
 from ourdestiny.record import *
+from ourdestiny.watcher import *
+from ourdestiny.recordstore import *
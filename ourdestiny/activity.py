@@ -4,12 +4,13 @@ import ourdestiny
 class d2activity(ourdestiny.d2displayproperties):
 
     """
-    A class used to represent an activity, selectable from the director
+    A class used to represent an activity, selectable from the director - it only holds data from the database, so one
+    is shared by every character with the same activity, and should not be modified
 
     :param activity_json: The JSON obtained from the database containing information about the activity
     :type activity_json:
-    :param profile_object: The profile object used to obtain this object
-    :type profile_object: ourdestiny.d2profile
+    :param client_object: The client object used to look up the activity's rewards, modifiers and type
+    :type client_object: ourdestiny.d2client
 
     :ivar name: The name of the activity
     :vartype name: string
@@ -30,12 +31,12 @@ class d2activity(ourdestiny.d2displayproperties):
     :ivar pgcr_image: The URL to the post-game carnage report image for this activity
     :vartype pgcr_image: string
     :ivar rewards: The potential rewards for this activity, split into tiers as given by the API
-    :vartype rewards: List[List[ourdestiny.d2item]]
+    :vartype rewards: List[List[ourdestiny.d2rewarditem]]
     :ivar modifiers: The potential modifiers for this activity
     :vartype modifiers: list[ourdestiny.d2activitymodifier]
     """
 
-    def __init__(self, activity_json, profile_object):
+    def __init__(self, activity_json, client_object):
         super().__init__(activity_json["displayProperties"])
         self.hash = activity_json["hash"]
         self.is_pvp = activity_json["isPvP"]
@@ -48,11 +49,12 @@ class d2activity(ourdestiny.d2displayproperties):
             reward_tier_list = []
             self.rewards.append(reward_tier_list)
             for reward_item in reward_tier["rewardItems"]:
-                reward_tier_list.append(ourdestiny.d2item(reward_item, profile_object))
+                reward_tier_list.append(ourdestiny.d2rewarditem(reward_item, client_object))
         self.modifiers = []
+        modifier_jsons = client_object.get_many_from_db([modifier["activityModifierHash"] for modifier in activity_json["modifiers"]], "ActivityModifier")
         for modifier in activity_json["modifiers"]:
-            self.modifiers.append(d2activitymodifier(profile_object.client_object.get_from_db(modifier["activityModifierHash"], "ActivityModifier")))
-        self.activity_type = d2activitytype(profile_object.client_object.get_from_db(activity_json["activityTypeHash"], "ActivityType"))
+            self.modifiers.append(d2activitymodifier(modifier_jsons[modifier["activityModifierHash"]]))
+        self.activity_type = client_object.get_shared_object(d2activitytype, activity_json["activityTypeHash"], "ActivityType")
 
 
 class d2activitytype(ourdestiny.d2displayproperties):
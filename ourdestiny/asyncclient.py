@@ -0,0 +1,354 @@
+import asyncio
+import functools
+import json
+import ourdestiny
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class d2asyncclient:
+
+    """
+    An asyncio version of the client, for applications running on an event loop. Requests to bungie.net are made
+    without blocking the loop, and anything that reads the databases, such as building profiles and instancing items,
+    is run in an executor. Authentication and the databases are handled by an ordinary client object, which should be
+    created first. Requires aiohttp, which can be installed with the "async" extra.
+
+    :param client_object: The client object to authenticate and look up definitions with
+    :type client_object: ourdestiny.d2client
+    :param connection_limit: The maximum number of connections to bungie.net open at once, defaults to 100
+    :type connection_limit: integer, optional
+    :param executor: The executor that database lookups are run in, defaults to the client object's worker pool
+    :type executor: concurrent.futures.Executor, optional
+
+    :ivar client_object: The client object used to authenticate and look up definitions
+    :vartype client_object: ourdestiny.d2client
+    :ivar session: The aiohttp session requests are made through, created the first time a request is made
+    :vartype session: aiohttp.ClientSession
+    """
+
+    def __init__(self, client_object, connection_limit=100, executor=None):
+        if aiohttp is None:
+            raise ImportError("d2asyncclient requires aiohttp - install it with pip install aiohttp")
+        self.client_object = client_object
+        self.connection_limit = connection_limit
+        self.executor = executor if executor is not None else client_object.get_executor()
+        self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def get_session(self):
+
+        """
+        Gets the aiohttp session used for every request, creating it the first time it is needed - must be called from
+        a running event loop
+
+        :return: The aiohttp session
+        :rtype: aiohttp.ClientSession
+        """
+
+        if self.session is None or self.session.closed:
+            request_timeout = self.client_object.request_timeout
+            if isinstance(request_timeout, tuple):
+                timeout = aiohttp.ClientTimeout(sock_connect=request_timeout[0], sock_read=request_timeout[1])
+            else:
+                timeout = aiohttp.ClientTimeout(total=request_timeout)
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.connection_limit),
+                                                 timeout=timeout)
+        return self.session
+
+    async def close(self):
+
+        """
+        Closes the client's connections to bungie.net - the client object it was made from is left open
+        """
+
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def run_off_loop(self, function, *args):
+
+        """
+        Runs a blocking function, such as one that reads the databases, in the executor
+
+        :param function: The function to run
+        :type function: function
+        :param args: The arguments to call the function with
+        :return: Whatever the function returns
+        """
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args))
+
+    async def http_request(self, method, url, **kwargs):
+
+        """
+        Makes a request to bungie.net, authenticated with the client object's request header. Requests share the client object's rate limiter, and are retried in the same way as the client object's requests.
+
+        :param method: The HTTP method, for example "GET"
+        :type method: string
+        :param url: The URL to request
+        :type url: string
+        :param kwargs: Any other arguments accepted by aiohttp.ClientSession.request, such as params or json
+        :return: The response JSON
+        :rtype: dict
+        """
+
+        status_code, response_headers, response_json = await self.http_request_with_headers(method, url, **kwargs)
+        return response_json
+
+    async def http_request_with_headers(self, method, url, **kwargs):
+
+        """
+        Makes a request to bungie.net in the same way as http_request, also returning the status code and headers of the response
+
+        :param method: The HTTP method, for example "GET"
+        :type method: string
+        :param url: The URL to request
+        :type url: string
+        :param kwargs: Any other arguments accepted by aiohttp.ClientSession.request, such as headers, params or json
+        :return: The status code, the headers and the JSON of the response, where the JSON is None if the response has no body
+        :rtype: tuple[integer, dict, dict]
+        """
+
+        headers = dict(self.client_object.request_header)
+        headers.update(kwargs.pop("headers", {}))
+        rate_limiter = self.client_object.get_rate_limiter()
+        endpoint_class = rate_limiter.get_endpoint_class(method, url)
+        attempt = 0
+        while True:
+            wait_delay = rate_limiter.reserve(endpoint_class)
+            if wait_delay > 0:
+                await asyncio.sleep(wait_delay)
+            try:
+                async with self.get_session().request(method, url, headers=headers, **kwargs) as response:
+                    response_body = await response.read()
+                    status_code = response.status
+                    response_headers = response.headers.copy()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                retry_delay = rate_limiter.record_failure(endpoint_class, method, attempt)
+                if retry_delay is None:
+                    raise
+            else:
+                error_code, throttle_seconds = rate_limiter.get_throttle_info(response_body)
+                retry_delay = rate_limiter.record_response(endpoint_class, error_code, throttle_seconds, attempt)
+                if retry_delay is None and status_code in rate_limiter.retry_status_codes:
+                    retry_delay = rate_limiter.record_failure(endpoint_class, method, attempt, status_code)
+                if retry_delay is None:
+                    return status_code, response_headers, json.loads(response_body) if response_body else None
+            await asyncio.sleep(retry_delay)
+            attempt += 1
+
+    async def http_get(self, url, **kwargs):
+        return await self.http_request("GET", url, **kwargs)
+
+    async def http_post(self, url, **kwargs):
+        return await self.http_request("POST", url, **kwargs)
+
+    async def search_destiny_player(self, displayname, platform):
+
+        """
+        Searches and returns the Destiny 2 data of a given display name - see ourdestiny.d2client.search_destiny_player
+
+        :param displayname: The full gamertag or PSN id of the player. Spaces and case are ignored.
+        :type displayname: string
+        :param platform: The name or enum of the platform the current user is on
+        :type platform: string, integer
+        :return: A JSON of Destiny user info - see https://bungie-net.github.io/multi/schema_User-UserInfoCard.html
+        :rtype: dict
+        """
+
+        platform = self.client_object.get_membership_type_enum(platform)
+        return await self.http_get(self.client_object.root_endpoint + "/Destiny2/SearchDestinyPlayer/" + platform + "/" + displayname)
+
+    async def get_component_json(self, platform, destiny_membership_id, list_of_enums, use_cache=True):
+
+        """
+        Gets game-related profile information of the corresponding user of the Destiny membership ID - see ourdestiny.d2client.get_component_json
+
+        :param platform: The name or enum of the platform the user is on
+        :type platform: string, integer
+        :param destiny_membership_id: The membership ID of the Destiny account being accessed
+        :type destiny_membership_id: string
+        :param list_of_enums: A list of enums - see https://bungie-net.github.io/multi/schema_Destiny-DestinyComponentType.html
+        :type list_of_enums: list[ourdestiny.ComponentType]
+        :param use_cache: When False, the client object's response_cache is not read from, although the new response is still stored in it, defaults to True
+        :type use_cache: bool, optional
+        :return: Profile data based on enums given - see https://bungie-net.github.io/multi/schema_Destiny-Responses-DestinyProfileResponse.html
+        :rtype: dict
+        """
+
+        platform = self.client_object.get_membership_type_enum(platform)
+        params = {"components": ",".join(str(enum.value) for enum in list_of_enums)}
+        response_cache = self.client_object.response_cache
+        headers = {}
+        if response_cache is not None:
+            cache_key = response_cache.get_key(platform, destiny_membership_id, list_of_enums)
+            cache_entry = None
+            if use_cache:
+                cached_json = response_cache.get_fresh(cache_key)
+                if cached_json is not None:
+                    return cached_json
+                cache_entry = response_cache.get_entry(cache_key)
+                headers = response_cache.get_conditional_headers(cache_entry)
+        status_code, response_headers, response_json = await self.http_request_with_headers(
+            "GET", self.client_object.root_endpoint + "/Destiny2/" + platform + "/Profile/" + str(destiny_membership_id),
+            params=params, headers=headers)
+        if response_cache is None:
+            return response_json
+        if status_code == 304 and cache_entry is not None:
+            return response_cache.revalidate(cache_key, cache_entry, list_of_enums)
+        return response_cache.store(cache_key, response_json, list_of_enums, etag=response_headers.get("ETag"),
+                                    last_modified=response_headers.get("Last-Modified"), entry=cache_entry)
+
+    async def get_profile(self, platform, destiny_membership_id, sections=None):
+
+        """
+        Gets a profile object based on the platform and membership ID passed in. The profile and character components
+        are requested together in a single request, and the profile object is built in the executor. Sections that are
+        not built straight away are built (and requested if needed) without blocking the loop only if they are first
+        used in the executor, so ask for every section that will be used on the loop.
+
+        :param platform: The name or enum of the platform the user is on
+        :type platform: string, integer
+        :param destiny_membership_id: The Destiny membership ID of the user that owns the desired profile
+        :type destiny_membership_id: string
+        :param sections: The sections of the profile and its characters to build straight away - see ourdestiny.d2client.get_profile, defaults to every section
+        :type sections: list[string], optional
+        :return: The d2profile object of the desired profile
+        :rtype: ourdestiny.d2profile
+        """
+
+        profile_json = await self.get_component_json(platform, destiny_membership_id, ourdestiny.d2profile.get_components(sections))
+        return await self.run_off_loop(functools.partial(ourdestiny.d2profile, sections=sections), self.client_object,
+                                       profile_json["Response"])
+
+    async def become_instanced(self, item):
+
+        """
+        Instances a single item - see ourdestiny.d2item.become_instanced
+
+        :param item: The item to instance
+        :type item: ourdestiny.d2item
+
+        :raises ItemCannotBeInstanced: Raised when the item has no instance ID
+        """
+
+        if item.instance_id is None:
+            raise ourdestiny.ItemCannotBeInstanced(item)
+        profile = item.profile_object
+        params = {
+            "components": "ItemInstances,ItemStats,ItemPerks"
+        }
+        item_json = await self.http_get(self.client_object.root_endpoint + "/Destiny2/" + str(profile.membership_type) +
+                                        "/Profile/" + profile.membership_id + "/Item/" + item.instance_id, params=params)
+        await self.run_off_loop(item.apply_instance_data, item_json["Response"])
+
+    async def instance_items(self, profile, items):
+
+        """
+        Instances several items at once - see ourdestiny.d2profile.instance_items
+
+        :param profile: The profile the items belong to
+        :type profile: ourdestiny.d2profile
+        :param items: The items to instance
+        :type items: List[ourdestiny.d2item]
+        :return: The items passed in, now instanced
+        :rtype: List[ourdestiny.d2item]
+
+        :raises ItemCannotBeInstanced: Raised when an item is passed in that has no instance ID
+        """
+
+        for item in items:
+            if item.instance_id is None:
+                raise ourdestiny.ItemCannotBeInstanced(item)
+        if len(items) == 0:
+            return items
+        components_json = await self.get_component_json(profile.membership_type, profile.membership_id,
+                                                        profile.item_components, use_cache=False)
+        items_missing = await self.run_off_loop(profile.apply_item_components, items,
+                                                components_json["Response"]["itemComponents"])
+        await asyncio.gather(*[self.become_instanced(item) for item in items_missing])
+        return items
+
+    async def equip_items(self, character, array_of_items_to_equip):
+
+        """
+        Equips several items to a character - see ourdestiny.d2character.equip_items
+
+        :param character: The character to equip the items to
+        :type character: ourdestiny.d2character
+        :param array_of_items_to_equip: A list of item objects to be equipped to the character
+        :type array_of_items_to_equip: list[ourdestiny.d2item]
+        :return: The response JSON from the API - see https://bungie-net.github.io/multi/schema_Destiny-DestinyEquipItemResults.html
+        :rtype: dict
+
+        :raises ItemCannotBeInstanced: Raised when an item is passed in that has no instance ID, and therefore cannot be instanced, and in turn cannot be equipped
+        :raises NoRoomInDestination: Raised when an item cannot be equipped because there is no space - for example, trying to equip more than 1 exotic weapon at a time
+        :raises ItemDoesNotBelongToCharacter: Raised when an item passed in does not belong to this character
+        """
+
+        await self.instance_items(character.profile_object, array_of_items_to_equip)
+        data, items_replaced = character.get_equip_items_data(array_of_items_to_equip)
+        response_json = await self.http_post(self.client_object.root_endpoint + "/Destiny2/Actions/Items/EquipItems/", json=data)
+        await self.instance_items(character.profile_object,
+                                  character.apply_equipped_items(array_of_items_to_equip, items_replaced))
+        return response_json
+
+    async def transfer_item(self, character, item_to_transfer, number_to_transfer=1, transfer_to_vault=True):
+
+        """
+        Transfers an item from a character to the vault, or from the vault to a character - see ourdestiny.d2character.transfer_item
+
+        :param character: The character the item is moved from, or to when transfer_to_vault is False
+        :type character: ourdestiny.d2character
+        :param item_to_transfer: The item object to be transferred
+        :type item_to_transfer: ourdestiny.d2item
+        :param number_to_transfer: The number of items to transfer, defaults to 1
+        :type number_to_transfer: integer
+        :param transfer_to_vault: When True, the item is moved from the character to the vault, and when False, from the vault to the character - defaults to True
+        :type transfer_to_vault: bool, optional
+        :return: The response JSON from the API, or None if the item is not in the place it is being moved from
+        :rtype: dict
+        """
+
+        data = await self.run_off_loop(character.get_transfer_item_data, item_to_transfer, number_to_transfer, transfer_to_vault)
+        if data is not None:
+            response_json = await self.http_post(self.client_object.root_endpoint + "/Destiny2/Actions/Items/TransferItem", json=data)
+            if response_json["ErrorStatus"] == "Success":
+                await self.run_off_loop(character.apply_transfer_item_response, item_to_transfer, number_to_transfer,
+                                        transfer_to_vault, response_json)
+            return response_json
+
+    async def pull_from_postmaster(self, character, item_to_pull, stack_size=1):
+
+        """
+        Pulls an item from a character's postmaster into the relevant inventory bucket - see ourdestiny.d2character.pull_from_postmaster
+
+        :param character: The character whose postmaster holds the item
+        :type character: ourdestiny.d2character
+        :param item_to_pull: The item to pull from the postmaster
+        :type item_to_pull: ourdestiny.d2item
+        :param stack_size: The number of items in the stack you want to pull - defaults to 1
+        :type stack_size: integer
+        :return: The response JSON from the API
+        :rtype: dict
+
+        :raises NoRoomInDestination: There is not room in the bucket the item is being pulled into
+        :raises ItemNotInBucket: The item is not currently being held in the postmaster
+        :raises ItemNotFound: The item is not found on the API's end
+        """
+
+        data = await self.run_off_loop(character.get_pull_from_postmaster_data, item_to_pull, stack_size)
+        response_json = await self.http_post(self.client_object.root_endpoint + "/Destiny2/Actions/Items/PullFromPostmaster", json=data)
+        if response_json["ErrorStatus"] != "Success":
+            character.raise_item_action_error(item_to_pull, response_json)
+        return await self.run_off_loop(character.apply_pull_from_postmaster_response, item_to_pull, stack_size, response_json)
@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+
+
+class d2definitioncache:
+
+    """
+    A bounded, per-table cache of decoded definitions from the manifest databases, evicting the least recently used
+    definitions once a table is full. Used by the client object in front of every database lookup.
+
+    :param max_size: The maximum number of definitions to hold for each table - None means the cache is unbounded, and 0 disables caching entirely
+    :type max_size: integer, optional
+
+    :ivar max_size: The maximum number of definitions held for each table
+    :vartype max_size: integer
+    :ivar hits: The number of lookups that were served from the cache
+    :vartype hits: integer
+    :ivar misses: The number of lookups that had to go to the database
+    :vartype misses: integer
+    :ivar evictions: The number of definitions removed to make room for newer ones
+    :vartype evictions: integer
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.tables = {}
+        self.lock = threading.RLock()
+
+    def get(self, database, table, hashnum):
+
+        """
+        Gets a definition from the cache, marking it as recently used
+
+        :param database: The database the definition belongs to
+        :type database: string
+        :param table: The unique part of the table name, for example "InventoryItem"
+        :type table: string
+        :param hashnum: The hash of the definition
+        :type hashnum: integer
+        :return: The decoded definition, or None if it is not cached
+        :rtype: dict
+        """
+
+        with self.lock:
+            try:
+                table_cache = self.tables[(database, table)]
+                definition = table_cache[hashnum]
+            except KeyError:
+                self.misses += 1
+                return None
+            table_cache.move_to_end(hashnum)
+            self.hits += 1
+            return definition
+
+    def put(self, database, table, hashnum, definition):
+
+        """
+        Adds a definition to the cache, evicting the least recently used definition of that table if it is full
+
+        :param database: The database the definition belongs to
+        :type database: string
+        :param table: The unique part of the table name, for example "InventoryItem"
+        :type table: string
+        :param hashnum: The hash of the definition
+        :type hashnum: integer
+        :param definition: The decoded definition
+        :type definition: dict
+        """
+
+        if self.max_size == 0:
+            return
+        with self.lock:
+            table_cache = self.tables.setdefault((database, table), OrderedDict())
+            table_cache[hashnum] = definition
+            table_cache.move_to_end(hashnum)
+            if self.max_size is not None:
+                while len(table_cache) > self.max_size:
+                    table_cache.popitem(last=False)
+                    self.evictions += 1
+
+    def clear(self, database=None):
+
+        """
+        Removes cached definitions - called automatically when a database is replaced with a newer version
+
+        :param database: The database to clear definitions for, defaults to clearing every database
+        :type database: string, optional
+        """
+
+        with self.lock:
+            if database is None:
+                self.tables = {}
+            else:
+                for key in [key for key in self.tables.keys() if key[0] == database]:
+                    del self.tables[key]
+
+    def get_stats(self):
+
+        """
+        Gets statistics about how well the cache is performing
+
+        :return: A dict containing the hits, misses, evictions, hit rate and number of cached definitions per table
+        :rtype: dict
+        """
+
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "sizes": {key[1]: len(table_cache) for key, table_cache in self.tables.items()}
+            }
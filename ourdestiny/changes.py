@@ -0,0 +1,54 @@
+from enum import IntEnum
+
+
+class d2change:
+
+    """
+    A change to a profile found when it is refreshed - see ourdestiny.d2profile.refresh
+
+    :param change_type: Whether the object was added, removed or changed
+    :type change_type: ourdestiny.ChangeType
+    :param section: The section the object belongs to, such as "inventory" or "profile_records", or "characters" for changes to characters themselves
+    :type section: string
+    :param character: The character the object belongs to, if it belongs to one
+    :type character: ourdestiny.d2character
+    :param object: The object that was added, removed or changed, such as a d2item or d2record
+    :type object: object
+    :param differences: For changed objects, the previous and new value of each attribute that changed, as (previous, new) tuples keyed by attribute name
+    :type differences: dict, optional
+
+    :ivar change_type: Whether the object was added, removed or changed
+    :vartype change_type: ourdestiny.ChangeType
+    :ivar section: The section the object belongs to
+    :vartype section: string
+    :ivar character: The character the object belongs to, if it belongs to one
+    :vartype character: ourdestiny.d2character
+    :ivar object: The object that was added, removed or changed - changed objects are updated in place, so this is the same object the profile held before
+    :vartype object: object
+    :ivar differences: The previous and new value of each attribute that changed
+    :vartype differences: dict
+    """
+
+    __slots__ = ("change_type", "section", "character", "object", "differences")
+
+    def __init__(self, change_type, section, character, object, differences=None):
+        self.change_type = change_type
+        self.section = section
+        self.character = character
+        self.object = object
+        self.differences = differences if differences is not None else {}
+
+    def __repr__(self):
+        return "d2change(" + self.change_type.name + ", " + self.section + ", " + type(self.object).__name__ + ", " + repr(self.differences) + ")"
+
+
+class ChangeType(IntEnum):
+
+    """An enumeration of the kinds of change found when a profile is refreshed"""
+
+    #: The object is new since the profile was last built or refreshed.
+    Added = 0
+    #: The object is no longer in the profile.
+    Removed = 1
+    #: The object is still in the profile, but some of its values have changed.
+    Changed = 2
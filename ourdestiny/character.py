@@ -1,5 +1,3 @@
-import requests
-from concurrent.futures import ThreadPoolExecutor, wait
 import ourdestiny
 
 
@@ -7,22 +5,24 @@ class d2character:
 
     """
     The object that represents an in-game character, containing attributes and methods related to character information
-    and management. Should be produced by the profile's get_character_object method.
+    and management. Should be produced by the profile's get_character_object method. Any section whose JSON is not given
+    (the inventory, equipment, progressions, activities or character_records) is built the first time one of its
+    attributes is used, from the profile's copy of the component, which is requested if the profile does not have it.
 
     :param profile_object_in: The client object that created the character object. Allows the character object to authenticate and lookup items in database files without needing to rewrite methods or produce multiple client objects
     :type profile_object_in: ourdestiny.d2profile
     :param character_info_json: The JSON containing the basic character data obtained from GetProfile
     :type character_info_json: dict
     :param character_inventory_json: The JSON containing the data for all of the items in the character's inventory obtained from GetProfile
-    :type character_inventory_json: dict
+    :type character_inventory_json: dict, optional
     :param character_equipped_json: The JSON containing the data for all of the items equipped to the character obtained from GetProfile
-    :type character_equipped_json: dict
+    :type character_equipped_json: dict, optional
     :param character_progression_json: The JSON containing the data for all of the character progressions
-    :type character_progression_json: dict
+    :type character_progression_json: dict, optional
     :param character_activities_json: The JSON containing the data for all of the character's available and current activities
-    :type character_activities_json: dict
+    :type character_activities_json: dict, optional
     :param character_records_json: The JSON containing the data for character-specific records for this character
-    :type character_records_json: dict
+    :type character_records_json: dict, optional
 
     :ivar profile_object: The d2client object that created this character object
     :vartype profile_object: ourdestiny.d2profile
@@ -66,12 +66,68 @@ class d2character:
     :vartype factions: List[ourdestiny.d2faction]
     :ivar records: A list of d2record objects specific to this character
     :vartype records: list[ourdestiny.d2record]
+    :ivar equipped_index: An index of the items in equipped, kept up to date by the methods that move items
+    :vartype equipped_index: ourdestiny.d2itemindex
+    :ivar inventory_index: An index of the items in inventory, kept up to date by the methods that move items
+    :vartype inventory_index: ourdestiny.d2itemindex
+    :ivar postmaster_index: An index of the items in postmaster, kept up to date by the methods that move items
+    :vartype postmaster_index: ourdestiny.d2itemindex
     """
 
-    def __init__(self, profile_object_in, character_info_json, character_inventory_json, character_equipped_json, character_progression_json, character_activities_json, character_records_json):
+    # The sections a character is built in, the components each is built from and the key of each in GetProfile responses
+    section_components = {
+        "inventory": [ourdestiny.ComponentType.CharacterInventories],
+        "equipment": [ourdestiny.ComponentType.CharacterEquipment],
+        "progressions": [ourdestiny.ComponentType.CharacterProgression],
+        "activities": [ourdestiny.ComponentType.CharacterActivities],
+        "character_records": [ourdestiny.ComponentType.Records]
+    }
+    section_response_keys = {
+        "inventory": "characterInventories",
+        "equipment": "characterEquipment",
+        "progressions": "characterProgressions",
+        "activities": "characterActivities",
+        "character_records": "characterRecords"
+    }
+    # The attributes set when each section is built
+    section_attributes = {
+        "inventory": ["inventory", "postmaster", "inventory_index", "postmaster_index"],
+        "equipment": ["equipped", "equipped_index"],
+        "progressions": ["progressions", "factions"],
+        "activities": ["current_activity", "available_activities"],
+        "character_records": ["records"]
+    }
+    attribute_sections = {attribute: section for section, attributes in section_attributes.items() for attribute in attributes}
+
+    def __init__(self, profile_object_in, character_info_json, character_inventory_json=None, character_equipped_json=None, character_progression_json=None, character_activities_json=None, character_records_json=None):
         self.profile_object = profile_object_in
+        self.built_sections = set()
         self.character_id = character_info_json["characterId"]
         self.membership_type = character_info_json["membershipType"]
+        self.apply_character_json(character_info_json)
+        self.race = self.profile_object.client_object.get_from_db(character_info_json["raceHash"], "Race")["displayProperties"]["name"]
+        self.gender = self.profile_object.client_object.get_from_db(character_info_json["genderHash"], "Gender")["displayProperties"]["name"]
+        self.cclass = self.profile_object.client_object.get_from_db(character_info_json["classHash"], "Class")["displayProperties"]["name"]
+        section_jsons = {
+            "inventory": character_inventory_json,
+            "equipment": character_equipped_json,
+            "progressions": character_progression_json,
+            "activities": character_activities_json,
+            "character_records": character_records_json
+        }
+        for section, section_json in section_jsons.items():
+            if section_json is not None:
+                self.build_section(section, section_json)
+
+    def apply_character_json(self, character_info_json):
+
+        """
+        Updates the character's light and stats from the API's data about it, such as when its profile is refreshed
+
+        :param character_info_json: The JSON containing the basic character data obtained from GetProfile
+        :type character_info_json: dict
+        """
+
         self.light = character_info_json["light"]
         self.mobility = character_info_json["stats"]["2996146975"]
         self.resilience = character_info_json["stats"]["392767087"]
@@ -79,9 +135,46 @@ class d2character:
         self.discipline = character_info_json["stats"]["1735777505"]
         self.intellect = character_info_json["stats"]["144602215"]
         self.strength = character_info_json["stats"]["4244567218"]
-        self.race = self.profile_object.client_object.get_from_db(character_info_json["raceHash"], "Race")["displayProperties"]["name"]
-        self.gender = self.profile_object.client_object.get_from_db(character_info_json["genderHash"], "Gender")["displayProperties"]["name"]
-        self.cclass = self.profile_object.client_object.get_from_db(character_info_json["classHash"], "Class")["displayProperties"]["name"]
+
+    def __getattr__(self, name):
+        # Only called for attributes that have not been set, which includes those of sections that have not been built
+        section = type(self).attribute_sections.get(name)
+        if section is None or "built_sections" not in self.__dict__ or section in self.built_sections:
+            raise AttributeError("'d2character' object has no attribute '" + name + "'")
+        self.build_section(section)
+        return self.__dict__[name]
+
+    def build_section(self, section, section_json=None):
+
+        """
+        Builds one section of the character - called automatically for each section the character was built with, and for any other section the first time one of its attributes is used
+
+        :param section: The section to build - one of the keys of section_components
+        :type section: string
+        :param section_json: This character's part of the section's GetProfile component, which is taken from the profile (and requested if the profile does not have it) when not given
+        :type section_json: dict, list, optional
+        """
+
+        with self.profile_object.section_lock:
+            if section in self.built_sections:
+                return
+            if section_json is None:
+                section_json = self.profile_object.get_character_section_json(self.character_id, section)
+            if section == "inventory":
+                self.build_inventory(section_json)
+            elif section == "equipment":
+                self.build_equipment(section_json)
+            elif section == "progressions":
+                self.build_progressions(section_json)
+            elif section == "activities":
+                self.build_activities(section_json)
+            elif section == "character_records":
+                self.build_records(section_json)
+            else:
+                raise ValueError("Unknown character section " + section)
+            self.built_sections.add(section)
+
+    def build_inventory(self, character_inventory_json):
         inventory_objects = []
         postmaster_objects = []
         for item in character_inventory_json:
@@ -91,30 +184,48 @@ class d2character:
                 postmaster_objects.append(ourdestiny.d2item(item, self.profile_object, self))
         self.inventory = inventory_objects
         self.postmaster = postmaster_objects
+        self.inventory_index = ourdestiny.d2itemindex(self.inventory)
+        self.postmaster_index = ourdestiny.d2itemindex(self.postmaster)
+
+    def build_equipment(self, character_equipped_json):
         equipped_objects = []
         for item in character_equipped_json:
             equipped_objects.append(ourdestiny.d2item(item, self.profile_object, self))
         self.equipped = equipped_objects
+        self.equipped_index = ourdestiny.d2itemindex(self.equipped)
+
+    def build_progressions(self, character_progression_json):
         progression_list = []
+        progression_db_jsons = self.profile_object.client_object.get_many_from_db(character_progression_json["progressions"].keys(), "Progression")
         for progression_hash in character_progression_json["progressions"].keys():
-            progression_db_json = self.profile_object.client_object.get_from_db(progression_hash, "Progression")
+            progression_db_json = progression_db_jsons[int(progression_hash)]
             progression_list.append(ourdestiny.d2progression(progression_db_json, self.profile_object, character_progression_json["progressions"][progression_hash]))
         self.progressions = progression_list
         faction_list = []
+        faction_db_jsons = self.profile_object.client_object.get_many_from_db(character_progression_json["factions"].keys(), "Faction")
         for faction_hash in character_progression_json["factions"].keys():
             faction_list.append(ourdestiny.d2faction(character_progression_json["factions"][faction_hash],
-                                                     self.profile_object.client_object.get_from_db(faction_hash, "Faction"), self))
+                                                     faction_db_jsons[int(faction_hash)], self))
         self.factions = faction_list
+
+    def build_activities(self, character_activities_json):
         if character_activities_json["currentActivityHash"] != 0:
-            self.current_activity = ourdestiny.d2activity(profile_object_in.client_object.get_from_db(character_activities_json["currentActivityHash"], "Activity"), self.profile_object)
+            self.current_activity = self.profile_object.client_object.get_shared_object(ourdestiny.d2activity, character_activities_json["currentActivityHash"], "Activity", self.profile_object.client_object)
         else:
             self.current_activity = None
-        self.available_activities = []
+        available_activities = []
+        activity_db_jsons = self.profile_object.client_object.get_many_from_db([available_activity["activityHash"] for available_activity in character_activities_json["availableActivities"]], "Activity")
         for available_activity in character_activities_json["availableActivities"]:
-            self.available_activities.append(ourdestiny.d2activity(profile_object_in.client_object.get_from_db(available_activity["activityHash"], "Activity"), self.profile_object))
-        self.records = []
+            available_activities.append(self.profile_object.client_object.get_shared_object(ourdestiny.d2activity, available_activity["activityHash"], "Activity", self.profile_object.client_object,
+                                                                                          definition_json=activity_db_jsons[available_activity["activityHash"]]))
+        self.available_activities = available_activities
+
+    def build_records(self, character_records_json):
+        records = []
+        record_db_jsons = self.profile_object.client_object.get_many_from_db(character_records_json["records"].keys(), "Record")
         for record_hash in character_records_json["records"].keys():
-            self.records.append(ourdestiny.d2record(character_records_json["records"][record_hash], profile_object_in.client_object.get_from_db(record_hash, "Record"), profile_object_in))
+            records.append(ourdestiny.d2record(character_records_json["records"][record_hash], record_db_jsons[int(record_hash)], self.profile_object))
+        self.records = records
 
     def get_equipped_item_by_name(self, item_name):
 
@@ -127,9 +238,9 @@ class d2character:
         :rtype: ourdestiny.d2item
         """
 
-        for item in self.equipped:
-            if item.name == item_name:
-                return item
+        items = self.equipped_index.find(name=item_name)
+        if len(items) > 0:
+            return items[0]
 
     def get_inventory_item_by_name(self, item_name):
 
@@ -142,9 +253,9 @@ class d2character:
         :rtype: d2item
         """
 
-        for item in self.inventory:
-            if item.name == item_name:
-                return item
+        items = self.inventory_index.find(name=item_name)
+        if len(items) > 0:
+            return items[0]
 
     def get_item_by_name(self, item_name):
 
@@ -164,6 +275,43 @@ class d2character:
             item = self.get_inventory_item_by_name(item_name)
             return item
 
+    def find_items(self, name=None, item_hash=None, instance_id=None, bucket_hash=None, slot=None):
+
+        """
+        Finds every item in the character's equipped items, inventory and postmaster that matches all of the values given
+
+        :param name: The exact, case-sensitive name of the item
+        :type name: string, optional
+        :param item_hash: The hash of the item
+        :type item_hash: integer, optional
+        :param instance_id: The instance ID of the item
+        :type instance_id: string, optional
+        :param bucket_hash: The hash of the bucket the item belongs in
+        :type bucket_hash: integer, optional
+        :param slot: The name or index of the bucket the item belongs in - see get_item_in_slot
+        :type slot: string, integer, optional
+        :return: The matching items, with equipped items first, then inventory items, then postmaster items
+        :rtype: List[ourdestiny.d2item]
+        """
+
+        items = []
+        for index in [self.equipped_index, self.inventory_index, self.postmaster_index]:
+            items.extend(index.find(name, item_hash, instance_id, bucket_hash, slot))
+        return items
+
+    def get_items_by_name(self, item_name):
+
+        """
+        Gets every item with a name from the character's equipped items, inventory and postmaster
+
+        :param item_name: The exact, case-sensitive name of the items you're looking for
+        :type item_name: string
+        :return: The matching items
+        :rtype: List[ourdestiny.d2item]
+        """
+
+        return self.find_items(name=item_name)
+
     def get_instanced_equipped_item_by_name(self, item_name):
 
         """
@@ -181,24 +329,20 @@ class d2character:
 
     def get_instanced_equipped_items_by_name(self, list_of_items_to_get):
         """
-        Gets a list of instanced items from the character's equipped items
+        Gets a list of instanced items from the character's equipped items, instancing them all with a single request
 
         :param list_of_items_to_get: A list of strings of items to get
         :type list_of_items_to_get: List[str]
-        :return: A list of requested items
+        :return: A list of the requested items that could be found
         :rtype: List[ourdestiny.d2item]
         """
 
         items_gotten = []
-        futures = []
-        pool = ThreadPoolExecutor()
         for item_name in list_of_items_to_get:
-            futures.append(pool.submit(self.get_instanced_equipped_item_by_name, item_name))
-        wait(futures)
-        for future in futures:
-            items_gotten.append(future.result())
-        pool.shutdown()
-        return items_gotten
+            item = self.get_equipped_item_by_name(item_name)
+            if item is not None:
+                items_gotten.append(item)
+        return self.profile_object.instance_items(items_gotten)
 
     def get_instanced_inventory_item_by_name(self, item_name):
 
@@ -218,7 +362,7 @@ class d2character:
     def get_instanced_inventory_items_by_name(self, list_of_items_to_get):
 
         """
-        Gets a list of instanced items from the character's inventory
+        Gets a list of instanced items from the character's inventory, instancing them all with a single request
 
         :param list_of_items_to_get: A list of strings of items to get
         :type list_of_items_to_get: List[str]
@@ -227,15 +371,11 @@ class d2character:
         """
 
         items_gotten = []
-        futures = []
-        pool = ThreadPoolExecutor()
         for item_name in list_of_items_to_get:
-            futures.append(pool.submit(self.get_instanced_inventory_item_by_name, item_name))
-        wait(futures)
-        for future in futures:
-            items_gotten.append(future.result())
-        pool.shutdown()
-        return items_gotten
+            item = self.get_inventory_item_by_name(item_name)
+            if item is not None:
+                items_gotten.append(item)
+        return self.profile_object.instance_items(items_gotten)
 
     def get_instanced_item_by_name(self, item_name):
 
@@ -260,15 +400,21 @@ class d2character:
 
     def get_instanced_items_by_name(self, array_of_names):
 
-        futures = []
-        with ThreadPoolExecutor() as pool:
-            for name in array_of_names:
-                futures.append(pool.submit(self.get_instanced_item_by_name, name))
-        wait(futures)
-        results = []
-        for future in futures:
-            results.append(future.result())
-        return results
+        """
+        Gets a list of instanced items from the character's inventory or equipped items, instancing them all with a single request
+
+        :param array_of_names: A list of the exact, case-sensitive names of the items you're looking for
+        :type array_of_names: List[str]
+        :return: A list of the items that could be found
+        :rtype: List[ourdestiny.d2item]
+        """
+
+        items_gotten = []
+        for name in array_of_names:
+            item = self.get_item_by_name(name)
+            if item is not None:
+                items_gotten.append(item)
+        return self.profile_object.instance_items(items_gotten)
 
     def get_equipped_item_by_index(self, item_index):
 
@@ -325,9 +471,9 @@ class d2character:
         :rtype: ourdestiny.d2item
         """
 
-        for item in self.equipped:
-            if item.bucket_info["displayProperties"]["name"] == slot or item.bucket_info["index"] == slot:
-                return item
+        items = self.equipped_index.find(slot=slot)
+        if len(items) > 0:
+            return items[0]
 
     def get_item_in_same_slot(self, item_to_check):
 
@@ -340,9 +486,9 @@ class d2character:
         :rtype: ourdestiny.d2item
         """
 
-        for item in self.equipped:
-            if item.bucket_info["index"] == item_to_check.bucket_info["index"]:
-                return item
+        items = self.equipped_index.find(slot=item_to_check.bucket_info["index"])
+        if len(items) > 0:
+            return items[0]
 
     def equip_item(self, item_to_equip):
 
@@ -366,7 +512,8 @@ class d2character:
                     "characterId": self.character_id,
                     "membershipType": self.membership_type
             }
-            equip_request = requests.post(self.profile_object.client_object.root_endpoint + "/Destiny2/Actions/Items/EquipItem/", json=data, headers=self.profile_object.client_object.request_header)
+            equip_request = self.profile_object.client_object.http_post(self.profile_object.client_object.root_endpoint + "/Destiny2/Actions/Items/EquipItem/", json=data, headers=self.profile_object.client_object.request_header)
+            self.profile_object.client_object.invalidate_cached_components(self.membership_type, self.profile_object.membership_id)
             item_to_equip.become_instanced()
             return equip_request.json()
         else:
@@ -392,13 +539,29 @@ class d2character:
         :raises ItemDoesNotBelongToCharacter: Raised when an item passed in does not belong to this character
         """
 
+        self.profile_object.instance_items(array_of_items_to_equip)
+        data, items_replaced = self.get_equip_items_data(array_of_items_to_equip)
+        equip_request = self.profile_object.client_object.http_post(self.profile_object.client_object.root_endpoint + "/Destiny2/Actions/Items/EquipItems/", json=data, headers=self.profile_object.client_object.request_header)
+        self.profile_object.instance_items(self.apply_equipped_items(array_of_items_to_equip, items_replaced))
+        return equip_request.json()
+
+    def get_equip_items_data(self, array_of_items_to_equip):
+
+        """
+        Checks that already instanced items can be equipped to this character, and builds the body of an EquipItems request for them
+
+        :param array_of_items_to_equip: A list of instanced item objects to be equipped to the current character
+        :type array_of_items_to_equip: list[ourdestiny.d2item]
+        :return: The body of the request, and the items currently equipped in the same slots as each item (or None where the slot is empty)
+        :rtype: tuple[dict, list[ourdestiny.d2item]]
+
+        :raises ItemCannotBeInstanced: Raised when an item is passed in that has no instance ID
+        :raises NoRoomInDestination: Raised when an item cannot be equipped because there is no space
+        :raises ItemDoesNotBelongToCharacter: Raised when an item passed in does not belong to this character
+        """
+
         item_ids = []
         items_replaced = []
-        refresh_futures = []
-        pool = ThreadPoolExecutor()
-        for item_to_equip in array_of_items_to_equip:
-            refresh_futures.append(pool.submit(item_to_equip.become_instanced))
-        wait(refresh_futures)
         for item_to_equip in array_of_items_to_equip:
             if item_to_equip.instance_id is not None and item_to_equip.can_equip and item_to_equip.owner_object == self:
                 item_ids.append(item_to_equip.instance_id)
@@ -415,19 +578,30 @@ class d2character:
             "characterId": self.character_id,
             "membershipType": self.membership_type
         }
-        equip_request = requests.post(self.profile_object.client_object.root_endpoint + "/Destiny2/Actions/Items/EquipItems/", json=data, headers=self.profile_object.client_object.request_header)
-        count = 0
-        futures = []
+        return data, items_replaced
 
-        # Attempt to refresh items
-        for item_to_equip in array_of_items_to_equip:
-            futures.append(pool.submit(item_to_equip.become_instanced))
-            futures.append(pool.submit(items_replaced[count].become_instanced))
-            self.swap_item(items_replaced[count], array_of_items_to_equip[count])
-            count += 1
-        wait(futures)
-        pool.shutdown()
-        return equip_request.json()
+    def apply_equipped_items(self, array_of_items_to_equip, items_replaced):
+
+        """
+        **Do not use for equipping items to an in-game character, this is used to keep consistency locally due to Bungie's API not updating its inventories instantly.**
+
+        Swaps equipped items into the local character object once an EquipItems request has been made, and removes the profile's cached responses
+
+        :param array_of_items_to_equip: The items that were equipped
+        :type array_of_items_to_equip: list[ourdestiny.d2item]
+        :param items_replaced: The items that were equipped in the same slots beforehand, as returned by get_equip_items_data
+        :type items_replaced: list[ourdestiny.d2item]
+        :return: The items whose instanced data has changed and should be refreshed
+        :rtype: list[ourdestiny.d2item]
+        """
+
+        self.profile_object.client_object.invalidate_cached_components(self.membership_type, self.profile_object.membership_id)
+        items_to_refresh = list(array_of_items_to_equip)
+        for item_to_equip, item_replaced in zip(array_of_items_to_equip, items_replaced):
+            if item_replaced is not None:
+                items_to_refresh.append(item_replaced)
+                self.swap_item(item_replaced, item_to_equip)
+        return items_to_refresh
 
     def swap_item(self, item_in_equipped, item_in_inventory):
 
@@ -443,33 +617,205 @@ class d2character:
         """
         self.equipped[self.equipped.index(item_in_equipped)] = item_in_inventory
         self.inventory[self.inventory.index(item_in_inventory)] = item_in_equipped
+        self.equipped_index.remove(item_in_equipped)
+        self.inventory_index.remove(item_in_inventory)
+        self.equipped_index.add(item_in_inventory)
+        self.inventory_index.add(item_in_equipped)
 
-    def transfer_item(self, item_to_transfer, number_to_transfer=1):
+    def transfer_item(self, item_to_transfer, number_to_transfer=1, transfer_to_vault=True):
 
         """
-        Transfers an *instanced* item to or from the vault
+        Transfers an item from this character to the vault, or from the vault to this character
 
-        :param item_to_transfer: The item object to be transferred to the vault
+        :param item_to_transfer: The item object to be transferred
         :type item_to_transfer: d2item
-        :param number_to_transfer: The number of items to transfer to the vault - defaults to 1, but can be increased in the case of stacks of items, such as planetary materials
+        :param number_to_transfer: The number of items to transfer - defaults to 1, but can be increased in the case of stacks of items, such as planetary materials
         :type number_to_transfer: integer
-        :return: The response JSON from the API - see https://bungie-net.github.io/multi/schema_Destiny-DestinyEquipItemResults.html
+        :param transfer_to_vault: When True, the item is moved from this character to the vault, and when False, from the vault to this character - defaults to True
+        :type transfer_to_vault: bool, optional
+        :return: The response JSON from the API, or None if the item is not in the place it is being moved from - see https://bungie-net.github.io/multi/schema_Destiny-DestinyEquipItemResults.html
         :rtype: dict
         """
 
-        if item_to_transfer is not None and item_to_transfer.is_instanced_item and item_to_transfer.owner_object == self:
-            item_hash = item_to_transfer.item_hash
-            item_id = item_to_transfer.instance_id
-            data = {
-                "itemReferenceHash": item_hash,
-                "stackSize": number_to_transfer,
-                "transferToVault": True,
-                "itemId": item_id,
-                "characterId": self.character_id,
-                "membershipType": self.membership_type
-            }
-            transfer_request = requests.post(self.profile_object.client_object.root_endpoint + "/Destiny2/Actions/Items/TransferItem", json=data, headers=self.profile_object.client_object.request_header)
-            return transfer_request.json()
+        data = self.get_transfer_item_data(item_to_transfer, number_to_transfer, transfer_to_vault)
+        if data is not None:
+            transfer_request = self.profile_object.client_object.http_post(self.profile_object.client_object.root_endpoint + "/Destiny2/Actions/Items/TransferItem", json=data, headers=self.profile_object.client_object.request_header)
+            response_json = transfer_request.json()
+            if response_json["ErrorStatus"] == "Success":
+                self.apply_transfer_item_response(item_to_transfer, number_to_transfer, transfer_to_vault, response_json)
+            return response_json
+
+    def get_transfer_item_data(self, item_to_transfer, number_to_transfer=1, transfer_to_vault=True):
+
+        """
+        Builds the body of a TransferItem request moving an item from this character to the vault, or from the vault to this character
+
+        :param item_to_transfer: The item object to be transferred
+        :type item_to_transfer: d2item
+        :param number_to_transfer: The number of items to transfer
+        :type number_to_transfer: integer
+        :param transfer_to_vault: When True, the item is moved from this character to the vault, and when False, from the vault to this character - defaults to True
+        :type transfer_to_vault: bool, optional
+        :return: The body of the request, or None if the item does not belong to this character when moving it to the vault, or is not in the vault when moving it from the vault
+        :rtype: dict
+        """
+
+        if item_to_transfer is None:
+            return None
+        if transfer_to_vault:
+            if item_to_transfer.owner_object != self:
+                return None
+        elif item_to_transfer.owner_object is not None or item_to_transfer not in self.profile_object.vault_index:
+            return None
+        return {
+            "itemReferenceHash": item_to_transfer.item_hash,
+            "stackSize": number_to_transfer,
+            "transferToVault": transfer_to_vault,
+            # Items that stack have no instance ID, which the API takes as 0
+            "itemId": item_to_transfer.instance_id if item_to_transfer.instance_id is not None else "0",
+            "characterId": self.character_id,
+            "membershipType": self.membership_type
+        }
+
+    def apply_transfer_item_response(self, item_to_transfer, number_to_transfer, transfer_to_vault, response_json):
+
+        """
+        **Do not use for transferring items in-game, this is used to keep consistency locally due to Bungie's API not updating its inventories instantly.**
+
+        Moves an item between the local character object and the local vault once a TransferItem request has succeeded, or raises the error the request failed with
+
+        :param item_to_transfer: The item that was transferred
+        :type item_to_transfer: ourdestiny.d2item
+        :param number_to_transfer: The number of items that were transferred
+        :type number_to_transfer: integer
+        :param transfer_to_vault: Whether the item was moved to the vault rather than from it
+        :type transfer_to_vault: bool
+        :param response_json: The response JSON from the API
+        :type response_json: dict
+        :return: The item object now holding the transferred items where they were moved to - see move_item_to_vault and move_item_from_vault
+        :rtype: ourdestiny.d2item
+
+        :raises NoRoomInDestination: There is not room in the vault or the character's inventory for the item
+        :raises ItemNotFound: The item is not found on the API's end
+        """
+
+        if response_json["ErrorStatus"] != "Success":
+            self.raise_item_action_error(item_to_transfer, response_json)
+        self.profile_object.client_object.invalidate_cached_components(self.membership_type, self.profile_object.membership_id)
+        if transfer_to_vault:
+            return self.move_item_to_vault(item_to_transfer, number_to_transfer)
+        return self.move_item_from_vault(item_to_transfer, number_to_transfer)
+
+    def raise_item_action_error(self, item, response_json):
+
+        """
+        Raises the error an item action request such as TransferItem or PullFromPostmaster failed with
+
+        :param item: The item the request was for
+        :type item: ourdestiny.d2item
+        :param response_json: The response JSON from the API
+        :type response_json: dict
+
+        :raises NoRoomInDestination: There is not room where the item is being moved to
+        :raises ItemNotFound: The item is not found on the API's end
+        :raises OurDestinyError: The request failed for any other reason
+        """
+
+        if response_json["ErrorCode"] == 1623:
+            raise ourdestiny.ItemNotFound(item, response_json["Message"])
+        elif response_json["ErrorCode"] == 1642:
+            raise ourdestiny.NoRoomInDestination(item, response_json["Message"])
+        else:
+            raise ourdestiny.OurDestinyError(response_json["Message"])
+
+    def move_item_to_vault(self, item_to_move, number_to_move=1):
+
+        """
+        **Do not use for transferring items in-game, this is used to keep consistency locally due to Bungie's API not updating its inventories instantly.**
+
+        Moves an item from the local character object's inventory to the local profile object's vault, changing its bucket to the vault's. When only part of a stack is moved, the quantity of the item is reduced and the moved items are split off into a new item object, and items that stack are added to a stack of the same item already in the vault if there is one.
+
+        :param item_to_move: The item in the character's inventory to move
+        :type item_to_move: ourdestiny.d2item
+        :param number_to_move: The number of items from the stack being moved
+        :type number_to_move: integer
+        :return: The item object in the vault now holding the moved items
+        :rtype: ourdestiny.d2item
+        """
+
+        return self.move_item_stack(item_to_move, number_to_move, self.inventory, self.inventory_index,
+                                    self.profile_object.vault, self.profile_object.vault_index, None, 138197802)
+
+    def move_item_from_vault(self, item_to_move, number_to_move=1):
+
+        """
+        **Do not use for transferring items in-game, this is used to keep consistency locally due to Bungie's API not updating its inventories instantly.**
+
+        Moves an item from the local profile object's vault to the local character object's inventory, changing its bucket to the one the item goes in on a character. When only part of a stack is moved, the quantity of the item is reduced and the moved items are split off into a new item object, and items that stack are added to a stack of the same item already in the inventory if there is one.
+
+        :param item_to_move: The item in the vault to move
+        :type item_to_move: ourdestiny.d2item
+        :param number_to_move: The number of items from the stack being moved
+        :type number_to_move: integer
+        :return: The item object in the character's inventory now holding the moved items
+        :rtype: ourdestiny.d2item
+        """
+
+        return self.move_item_stack(item_to_move, number_to_move, self.profile_object.vault, self.profile_object.vault_index,
+                                    self.inventory, self.inventory_index, self, item_to_move.definition.bucket_type_hash)
+
+    def move_item_stack(self, item_to_move, number_to_move, source_items, source_index, destination_items, destination_index, owner_object, bucket_hash):
+
+        """
+        **Do not use for moving items in-game, this is used to keep consistency locally due to Bungie's API not updating its inventories instantly.**
+
+        Moves some or all of a stack of items from one local list of items to another, keeping the indexes of both up to date
+
+        :param item_to_move: The item to move
+        :type item_to_move: ourdestiny.d2item
+        :param number_to_move: The number of items from the stack being moved
+        :type number_to_move: integer
+        :param source_items: The list the item is in
+        :type source_items: List[ourdestiny.d2item]
+        :param source_index: The index of source_items
+        :type source_index: ourdestiny.d2itemindex
+        :param destination_items: The list the item is being moved to
+        :type destination_items: List[ourdestiny.d2item]
+        :param destination_index: The index of destination_items
+        :type destination_index: ourdestiny.d2itemindex
+        :param owner_object: The character that owns the item once it has moved, or None if no character does
+        :type owner_object: ourdestiny.d2character
+        :param bucket_hash: The hash of the bucket the item is in once it has moved, or None to leave its bucket as it is
+        :type bucket_hash: integer
+        :return: The item object in destination_items now holding the moved items
+        :rtype: ourdestiny.d2item
+        """
+
+        existing_stack = None
+        if item_to_move.instance_id is None:
+            # Items without instance IDs stack, so join any stack of the same item already there
+            for item in destination_index.find(item_hash=item_to_move.item_hash):
+                if item.instance_id is None and item is not item_to_move:
+                    existing_stack = item
+                    break
+        if number_to_move < item_to_move.quantity:
+            item_to_move.quantity -= number_to_move
+            moved_item = item_to_move.copy_stack(number_to_move) if existing_stack is None else None
+        else:
+            if item_to_move in source_index:
+                source_items.remove(item_to_move)
+                source_index.remove(item_to_move)
+            moved_item = item_to_move
+        if existing_stack is not None:
+            existing_stack.quantity += number_to_move
+            return existing_stack
+        moved_item.owner_object = owner_object
+        if bucket_hash is not None:
+            # The bucket has to change while the item is out of every index, as the indexes are keyed by it
+            moved_item.bucket_info = self.profile_object.client_object.get_from_db(bucket_hash, "InventoryBucket")
+        destination_items.append(moved_item)
+        destination_index.add(moved_item)
+        return moved_item
 
     def pull_from_postmaster(self, item_to_pull, stack_size=1):
         """
@@ -487,38 +833,75 @@ class d2character:
         :raises ItemNotFound: The item is not found on the API's end
         """
 
-        if item_to_pull.owner_object == self and item_to_pull.bucket_info["hash"] == 215593132:
-            data = {
-                "itemReferenceHash": item_to_pull.item_hash,
-                "stackSize": stack_size,
-                "itemId": item_to_pull.instance_id,
-                "characterId": self.character_id,
-                "membershipType": self.membership_type
-            }
-            pull_request = requests.post(self.profile_object.client_object.root_endpoint +
-                                         "/Destiny2/Actions/Items/PullFromPostmaster",
-                                         headers=self.profile_object.client_object.request_header, json=data)
-            response_json = pull_request.json()
-            if response_json["ErrorStatus"] == "Success":
-                new_quantity = item_to_pull.quantity - stack_size
-                if new_quantity == 0:
-                    self.postmaster.remove(item_to_pull)
-                    if item_to_pull.type == "Consumable" or item_to_pull.type == "Redeemable":
-                        # TODO: Add better handling once methods to get items from profile inventories exist
-                        pass
-                    else:
-                        # TODO: Change bucket info once better methods for handling those exist to be the item's actual bucket info rather than the postmaster's
-                        self.inventory.append(item_to_pull)
-            else:
-                if response_json["ErrorCode"] == 1623:
-                    raise ourdestiny.ItemNotFound(item_to_pull, response_json["Message"])
-                elif response_json["ErrorCode"] == 1642:
-                    raise ourdestiny.NoRoomInDestination(item_to_pull, response_json["Message"])
+        data = self.get_pull_from_postmaster_data(item_to_pull, stack_size)
+        pull_request = self.profile_object.client_object.http_post(self.profile_object.client_object.root_endpoint +
+                                                                   "/Destiny2/Actions/Items/PullFromPostmaster",
+                                                                   headers=self.profile_object.client_object.request_header, json=data)
+        return self.apply_pull_from_postmaster_response(item_to_pull, stack_size, pull_request.json())
+
+    def get_pull_from_postmaster_data(self, item_to_pull, stack_size=1):
+
+        """
+        Checks that an item can be pulled from this character's postmaster, and builds the body of a PullFromPostmaster request for it
+
+        :param item_to_pull: The item to pull from the postmaster
+        :type item_to_pull: ourdestiny.d2item
+        :param stack_size: The number of items in the stack you want to pull - defaults to 1
+        :type stack_size: integer
+        :return: The body of the request
+        :rtype: dict
+
+        :raises ItemNotInBucket: The item is not currently being held in the postmaster
+        :raises ItemDoesNotBelongToCharacter: The item does not belong to this character
+        """
+
+        if item_to_pull.owner_object != self:
+            raise ourdestiny.ItemDoesNotBelongToCharacter(item_to_pull, self)
+        elif item_to_pull.bucket_info["hash"] != 215593132:
+            raise ourdestiny.ItemNotInBucket(item_to_pull)
+        return {
+            "itemReferenceHash": item_to_pull.item_hash,
+            "stackSize": stack_size,
+            "itemId": item_to_pull.instance_id if item_to_pull.instance_id is not None else "0",
+            "characterId": self.character_id,
+            "membershipType": self.membership_type
+        }
+
+    def apply_pull_from_postmaster_response(self, item_to_pull, stack_size, response_json):
+
+        """
+        **Do not use for pulling items in-game, this is used to keep consistency locally due to Bungie's API not updating its inventories instantly.**
+
+        Moves an item out of the local character object's postmaster once a PullFromPostmaster request has succeeded, or raises the error the request failed with. The item is moved into the bucket it goes in on a character - into the character's inventory, or the profile inventory for buckets shared by the whole account, such as consumables. When only part of a stack is pulled, the pulled items are split off into a new item object, or added to a stack of the same item already there.
+
+        :param item_to_pull: The item that was pulled from the postmaster
+        :type item_to_pull: ourdestiny.d2item
+        :param stack_size: The number of items in the stack that was pulled
+        :type stack_size: integer
+        :param response_json: The response JSON from the API
+        :type response_json: dict
+        :return: The response JSON from the API
+        :rtype: dict
+
+        :raises NoRoomInDestination: There is not room in the bucket the item is being pulled into
+        :raises ItemNotFound: The item is not found on the API's end
+        """
+
+        if response_json["ErrorStatus"] == "Success":
+            self.profile_object.client_object.invalidate_cached_components(self.membership_type, self.profile_object.membership_id)
+            bucket_hash = item_to_pull.definition.bucket_type_hash
+            # Buckets with a scope of 1 belong to the account rather than to a character
+            if bucket_hash is not None and self.profile_object.client_object.get_from_db(bucket_hash, "InventoryBucket").get("scope") == 1:
+                if "profile_inventory" in self.profile_object.built_sections:
+                    profile_items, profile_index = self.profile_object.profile_inventory, self.profile_object.profile_inventory_index
                 else:
-                    raise ourdestiny.OurDestinyError(pull_request.json()["Message"])
-            return pull_request.json()
+                    # The profile inventory will already hold the item once it is built
+                    profile_items, profile_index = [], ourdestiny.d2itemindex()
+                self.move_item_stack(item_to_pull, stack_size, self.postmaster, self.postmaster_index,
+                                     profile_items, profile_index, None, bucket_hash)
+            else:
+                self.move_item_stack(item_to_pull, stack_size, self.postmaster, self.postmaster_index,
+                                     self.inventory, self.inventory_index, self, bucket_hash)
         else:
-            if item_to_pull.owner_object != self:
-                raise ourdestiny.ItemDoesNotBelongToCharacter(item_to_pull, self)
-            elif item_to_pull.bucket_info["hash"] != 215593132:
-                raise ourdestiny.ItemNotInBucket(item_to_pull)
+            self.raise_item_action_error(item_to_pull, response_json)
+        return response_json
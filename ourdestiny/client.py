@@ -1,10 +1,14 @@
+import functools
 import json
 import os
 import secrets
-import sqlite3
+import shutil
+import threading
+import time
 import urllib.parse as urlparse
 import zipfile
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from enum import IntEnum
 import ourdestiny
 
@@ -19,6 +23,30 @@ class d2client:
     :type client_id: string
     :param client_secret_in: The client secret gotten from Bungie's website
     :type client_secret: string
+    :param cache_size: The maximum number of decoded definitions to keep in memory for each database table - None means unbounded, and 0 disables the cache, defaults to 10000
+    :type cache_size: integer, optional
+    :param lazy: When True, the stored access token is checked against its saved expiry time rather than with a request, databases are only checked for updates in the background, and each database is only opened when it is first used, defaults to False
+    :type lazy: bool, optional
+    :param optimised_reads: When True, databases are opened read-only and immutable, memory-mapped and given a larger page cache, which is safe because they never change once downloaded, defaults to True
+    :type optimised_reads: bool, optional
+    :param mmap_size: The number of bytes of each database file that may be memory-mapped when optimised_reads is enabled, defaults to 256MiB
+    :type mmap_size: integer, optional
+    :param page_cache_size: The size of each database connection's page cache in kibibytes when optimised_reads is enabled, defaults to 16MiB
+    :type page_cache_size: integer, optional
+    :param compact_manifest: When True, a compact copy of the world database holding only the fields used to build objects is compiled whenever it is downloaded, and lookups are served from it, with any other fields read from the database when they are asked for, defaults to False
+    :type compact_manifest: bool, optional
+    :param manifest_check_interval: The number of seconds between background checks for database updates - when not given, lazy clients check once in the background and other clients only check during initialisation
+    :type manifest_check_interval: integer, optional
+    :param http_pool_size: The number of connections to bungie.net kept open for reuse - should be at least the number of threads making requests at once, defaults to 10
+    :type http_pool_size: integer, optional
+    :param request_timeout: The number of seconds to wait for bungie.net to connect and respond before giving up on a request, either as a single number or as a (connect, read) tuple, defaults to (10, 30)
+    :type request_timeout: float, tuple, optional
+    :param rate_limiter: The rate limiter every request to bungie.net goes through, defaults to a d2ratelimiter with its default limits
+    :type rate_limiter: ourdestiny.d2ratelimiter, optional
+    :param response_cache: A cache for the responses of get_component_json, so that components fetched recently are not fetched again - defaults to no cache
+    :type response_cache: ourdestiny.d2responsecache, optional
+    :param worker_pool_size: The number of worker threads shared by every operation that does several things at once, such as instancing items one by one, defaults to 8
+    :type worker_pool_size: integer, optional
     :cvar api_key: The same API key gotten from Bungie's website, should be the same as during initialisation
     :vartype api_key: string
     :cvar client_id: The same client ID gotten from Bungie's website, should be the same as during initialisation
@@ -39,14 +67,36 @@ class d2client:
     :vartype bungie_membership_id: string
     :cvar destiny_membership_id: When obtained, contains the currently authenticated user's Destiny membership ID, needed for most operations to do with the game
     :vartype destiny_membership_id:
-    :cvar asset_database: Contains a sqlite3 Cursor object linked to the asset database file - see https://docs.python.org/3.8/library/sqlite3.html#sqlite3.Cursor
+    :cvar asset_database: Contains a sqlite3 Cursor object linked to the asset database file, belonging to the thread it is accessed from - see https://docs.python.org/3.8/library/sqlite3.html#sqlite3.Cursor
     :vartype asset_database: sqlite3.cursor
-    :cvar gear_database: Contains a sqlite3 Cursor object linked to the gear database file - see https://docs.python.org/3.8/library/sqlite3.html#sqlite3.Cursor
+    :cvar gear_database: Contains a sqlite3 Cursor object linked to the gear database file, belonging to the thread it is accessed from - see https://docs.python.org/3.8/library/sqlite3.html#sqlite3.Cursor
     :vartype gear_database: sqlite3.cursor
-    :cvar world_database: Contains a sqlite3 Cursor object linked to the world database file (the one you'll be using most of the time) - see https://docs.python.org/3.8/library/sqlite3.html#sqlite3.Cursor
+    :cvar world_database: Contains a sqlite3 Cursor object linked to the world database file (the one you'll be using most of the time), belonging to the thread it is accessed from - see https://docs.python.org/3.8/library/sqlite3.html#sqlite3.Cursor
     :vartype world_database: sqlite3.cursor
-    :cvar clan_banner_database: Contains a sqlite3 Cursor object linked to the clan banner database file - see https://docs.python.org/3.8/library/sqlite3.html#sqlite3.Cursor
+    :cvar clan_banner_database: Contains a sqlite3 Cursor object linked to the clan banner database file, belonging to the thread it is accessed from - see https://docs.python.org/3.8/library/sqlite3.html#sqlite3.Cursor
     :vartype clan_banner_database: sqlite3.cursor
+    :cvar database_pools: The connection pools for each database that has been used, keyed by database type
+    :vartype database_pools: dict[string, ourdestiny.d2connectionpool]
+    :cvar retired_database_pools: The connection pools for old versions of databases that have since been updated, which still have connections open in threads that have not made a lookup since
+    :vartype retired_database_pools: list[ourdestiny.d2connectionpool]
+    :cvar definition_cache: The cache of decoded definitions sitting in front of the database files, which also holds the objects shared between players built from them - see get_shared_object. The definitions and objects it returns are shared, so should not be modified
+    :vartype definition_cache: ourdestiny.d2definitioncache
+    :cvar download_progress_callback: A function called as database files download, with the database type, the number of bytes downloaded so far, the total number of bytes (or None if unknown) and the average throughput in bytes per second
+    :vartype download_progress_callback: function
+    :cvar token_expires_at: The time at which the current access token expires, in seconds since the epoch, if known
+    :vartype token_expires_at: float
+    :cvar manifest_check_error: The error raised by the most recent background check for database updates, if it failed
+    :vartype manifest_check_error: Exception
+    :cvar session: The HTTP session every request to bungie.net is made through, which keeps connections open so that they can be reused - see https://requests.readthedocs.io/en/latest/user/advanced/#session-objects
+    :vartype session: requests.Session
+    :cvar rate_limiter: The rate limiter every request to bungie.net goes through, which also counts how long requests have waited - see its get_stats method
+    :vartype rate_limiter: ourdestiny.d2ratelimiter
+    :cvar response_cache: The cache for the responses of get_component_json, if the client has one
+    :vartype response_cache: ourdestiny.d2responsecache
+    :cvar watchers: The profile watchers started by watch_profiles that are still running
+    :vartype watchers: list[ourdestiny.d2profilewatcher]
+    :cvar executor: The pool of worker threads shared by every operation that does several things at once, which also counts how much work is waiting and running - see its get_stats method
+    :vartype executor: ourdestiny.d2executor
     """
     api_key = ""
     client_id = ""
@@ -58,17 +108,213 @@ class d2client:
     request_header = {}
     #bungie_membership_id = ""
     destiny_membership_id = ""
-    asset_database = None
-    gear_database = None
-    world_database = None
-    clan_banner_database = None
-
-    def __init__(self, api_key_in, client_id_in, client_secret_in):
+    database_pools = None
+    retired_database_pools = None
+    definition_cache = None
+    db_query_chunk_size = 900
+    download_chunk_size = 1024 * 1024
+    download_progress_callback = None
+    dbinfo_lock = threading.Lock()
+    database_connect_lock = threading.Lock()
+    optimised_reads = False
+    db_mmap_size = None
+    db_page_cache_size = None
+    compact_manifest = False
+    compact_manifests = None
+    compact_databases = ["mobileWorldContent"]
+    database_types = ["mobileAssetContent", "mobileGearAssetDataBase", "mobileWorldContent", "mobileClanBannerDatabase"]
+    lazy = False
+    token_expires_at = None
+    # Tokens are treated as expired slightly early, so they do not expire in the middle of a request
+    token_expiry_margin = 60
+    manifest_check_interval = None
+    manifest_check_thread = None
+    manifest_check_error = None
+    session = None
+    session_lock = threading.Lock()
+    http_pool_size = 10
+    request_timeout = (10, 30)
+    rate_limiter = None
+    response_cache = None
+    executor = None
+    watchers = None
+    worker_pool_size = 8
+
+    def __init__(self, api_key_in, client_id_in, client_secret_in, cache_size=10000, lazy=False, manifest_check_interval=None,
+                 optimised_reads=True, mmap_size=268435456, page_cache_size=16384, compact_manifest=False,
+                 http_pool_size=10, request_timeout=(10, 30), rate_limiter=None,
+                 response_cache=None, worker_pool_size=8):
         self.api_key = api_key_in
         self.client_id = client_id_in
         self.client_secret = client_secret_in
+        self.lazy = lazy
+        self.optimised_reads = optimised_reads
+        self.db_mmap_size = mmap_size
+        self.db_page_cache_size = page_cache_size
+        self.manifest_check_interval = manifest_check_interval
+        self.definition_cache = ourdestiny.d2definitioncache(cache_size)
+        self.database_pools = {}
+        self.retired_database_pools = []
+        self.compact_manifest = compact_manifest
+        self.compact_manifests = {}
+        self.manifest_check_stop = threading.Event()
+        self.http_pool_size = http_pool_size
+        self.request_timeout = request_timeout
+        self.rate_limiter = rate_limiter
+        self.response_cache = response_cache
+        self.worker_pool_size = worker_pool_size
         self.test_access_token()
-        self.connect_all_destiny_db()
+        if not self.lazy:
+            self.connect_all_destiny_db()
+        elif not os.path.exists("./db/dbinfo.json"):
+            # There is nothing to open lazily on a blank slate, so the databases have to be downloaded first
+            os.makedirs("db", exist_ok=True)
+            self.download_all_destiny_db()
+        if self.lazy or self.manifest_check_interval is not None:
+            self.start_manifest_checks()
+
+    def get_session(self):
+
+        """
+        Gets the HTTP session used for every request to bungie.net, creating it the first time it is needed. The session keeps up to http_pool_size connections open, so that requests made after the first skip the TCP and TLS handshakes, and asks for responses to be gzip compressed.
+
+        :return: The client's HTTP session
+        :rtype: requests.Session
+        """
+
+        if self.session is None:
+            with self.session_lock:
+                if self.session is None:
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(pool_connections=self.http_pool_size,
+                                                            pool_maxsize=self.http_pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers["Accept-Encoding"] = "gzip, deflate"
+                    self.session = session
+        return self.session
+
+    def get_rate_limiter(self):
+
+        """
+        Gets the rate limiter every request to bungie.net goes through, creating one with the default limits if the client was not given one
+
+        :return: The client's rate limiter
+        :rtype: ourdestiny.d2ratelimiter
+        """
+
+        if self.rate_limiter is None:
+            with self.session_lock:
+                if self.rate_limiter is None:
+                    self.rate_limiter = ourdestiny.d2ratelimiter()
+        return self.rate_limiter
+
+    def get_executor(self):
+
+        """
+        Gets the pool of worker threads shared by every operation that does several things at once, creating it the first time it is needed - submitting work to it rather than starting new threads keeps the number of threads the client uses bounded
+
+        :return: The client's worker pool
+        :rtype: ourdestiny.d2executor
+        """
+
+        if self.executor is None:
+            with self.session_lock:
+                if self.executor is None:
+                    self.executor = ourdestiny.d2executor(self.worker_pool_size)
+        return self.executor
+
+    def http_request(self, method, url, **kwargs):
+
+        """
+        Makes a request through the client's HTTP session, using the client's request_timeout unless another timeout is given. The request waits for the client's rate limiter first, and is retried if bungie.net reports that it is being throttled, or if it is a GET request that failed - streamed requests are never retried, as their response is read by the caller.
+
+        :param method: The HTTP method, for example "GET"
+        :type method: string
+        :param url: The URL to request
+        :type url: string
+        :param kwargs: Any other arguments accepted by requests.Session.request, such as headers, params, json or stream
+        :return: The response
+        :rtype: requests.Response
+        """
+
+        kwargs.setdefault("timeout", self.request_timeout)
+        rate_limiter = self.get_rate_limiter()
+        endpoint_class = rate_limiter.get_endpoint_class(method, url)
+        can_retry = not kwargs.get("stream", False)
+        attempt = 0
+        while True:
+            rate_limiter.wait(endpoint_class)
+            try:
+                response = self.get_session().request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                retry_delay = rate_limiter.record_failure(endpoint_class, method, attempt) if can_retry else None
+                if retry_delay is None:
+                    raise
+            else:
+                if not can_retry:
+                    return response
+                error_code, throttle_seconds = rate_limiter.get_throttle_info(response.content)
+                retry_delay = rate_limiter.record_response(endpoint_class, error_code, throttle_seconds, attempt)
+                if retry_delay is None and response.status_code in rate_limiter.retry_status_codes:
+                    retry_delay = rate_limiter.record_failure(endpoint_class, method, attempt, response.status_code)
+                if retry_delay is None:
+                    return response
+            time.sleep(retry_delay)
+            attempt += 1
+
+    def http_get(self, url, **kwargs):
+
+        """
+        Makes a GET request through the client's HTTP session - see http_request
+
+        :param url: The URL to request
+        :type url: string
+        :return: The response
+        :rtype: requests.Response
+        """
+
+        return self.http_request("GET", url, **kwargs)
+
+    def http_post(self, url, **kwargs):
+
+        """
+        Makes a POST request through the client's HTTP session - see http_request
+
+        :param url: The URL to request
+        :type url: string
+        :return: The response
+        :rtype: requests.Response
+        """
+
+        return self.http_request("POST", url, **kwargs)
+
+    def close(self):
+
+        """
+        Stops background database update checks, any profile watchers and the worker pool, and closes the client's HTTP connections and database connections - any work waiting for a worker is cancelled, and work already running is finished first. The client should not be used afterwards.
+        """
+
+        self.stop_manifest_checks()
+        with self.session_lock:
+            watchers = self.watchers or []
+            self.watchers = None
+        for watcher in watchers:
+            watcher.stop()
+        with self.session_lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True, cancel_futures=True)
+        with self.session_lock:
+            if self.session is not None:
+                self.session.close()
+                self.session = None
+        for pool in list(self.database_pools.values()) + list(self.retired_database_pools):
+            pool.close()
+        self.database_pools.clear()
+        self.retired_database_pools.clear()
+        for compact_manifest in list(self.compact_manifests.values()):
+            compact_manifest.close()
+        self.compact_manifests.clear()
 
     def get_auth_code_url(self):
         url = "https://www.bungie.net/en/OAuth/Authorize"
@@ -78,7 +324,8 @@ class d2client:
             "client_id": self.client_id,
             "state": state
         }
-        auth_request = requests.get(url, params)
+        # Only the URL with its query string is needed, so nothing has to be sent
+        auth_request = requests.Request("GET", url, params=params).prepare()
         return auth_request.url
 
     def get_auth_code_from_url(self, auth_request_url):
@@ -103,7 +350,7 @@ class d2client:
             "client_id": self.client_id,
             "client_secret": self.client_secret
         }
-        token_request = requests.post(url, data=form)
+        token_request = self.http_post(url, data=form)
         self.store_access_token(token_request.json())
 
     def refresh_access_token(self):
@@ -114,7 +361,7 @@ class d2client:
             "client_secret": self.client_secret,
             "refresh_token": self.refresh_token
         }
-        token_request = requests.post(url, data=form)
+        token_request = self.http_post(url, data=form)
         self.store_access_token(token_request.json())
 
     def store_access_token(self, token_request_json):
@@ -122,6 +369,16 @@ class d2client:
         self.refresh_token = token_request_json["refresh_token"]
         self.request_header = {"Authorization": "Bearer " + self.access_token,
                                "X-API-Key": self.api_key}
+        # Saves when the tokens expire, so that later runs can check them without making a request
+        try:
+            token_request_json["expires_at"] = time.time() + token_request_json["expires_in"]
+            self.token_expires_at = token_request_json["expires_at"]
+        except KeyError:
+            self.token_expires_at = None
+        try:
+            token_request_json["refresh_expires_at"] = time.time() + token_request_json["refresh_expires_in"]
+        except KeyError:
+            pass
         with open("./token.json", "w") as jsonfile:
             jsonfile.write(json.dumps(token_request_json))
 
@@ -132,7 +389,7 @@ class d2client:
     def test_access_token(self):
 
         """
-        Called during the initialisation process, tests if the currently stored access token exists and if it is valid.
+        Called during the initialisation process, tests if the currently stored access token exists and if it is valid. Lazy clients check the saved expiry time of the token instead of making a request, when it is known.
         """
 
         try:
@@ -146,6 +403,15 @@ class d2client:
                     "Authorization": "Bearer " + self.access_token
                 }
                 self.bungie_membership_id = token_file_json["membership_id"]
+                self.token_expires_at = token_file_json.get("expires_at")
+                if self.lazy and self.token_expires_at is not None:
+                    if time.time() < self.token_expires_at - self.token_expiry_margin:
+                        return
+                    if time.time() < token_file_json.get("refresh_expires_at", float("inf")):
+                        self.refresh_access_token()
+                    else:
+                        self.authenticate()
+                    return
                 test_code = self.get_destiny_manifest(testing=True)
                 if test_code != 200:
                     # If the file is fine and we've gotten this far, it's likely that the access code has expired and needs refreshing
@@ -169,42 +435,136 @@ class d2client:
         """
 
         url = self.root_endpoint + "/Destiny2/Manifest"
-        api_request = requests.get(url, headers=self.request_header)
+        api_request = self.http_get(url, headers=self.request_header)
         if not testing:
             return api_request.json()
         else:
             return api_request.status_code
 
-    def check_for_destiny_db_update(self):
+    def check_for_destiny_db_update(self, progress_callback=None):
+
+        """
+        Checks through all downloaded databases and checks if there are any updates to any of them - there should be no need to call this, as it should be called automatically during the initialisation process. Any databases that are out of date are downloaded at the same time, and only swapped in once they have been verified, so an interrupted update leaves the current databases in place. If the client is already connected, its next lookup in each updated database connects to the new version, and the old database files are removed.
+
+        :param progress_callback: A function called as each database downloads - see download_one_destiny_db, defaults to the client's download_progress_callback
+        :type progress_callback: function, optional
+        """
+
+        manifest_paths = self.get_manifest_db_paths(self.get_destiny_manifest()["Response"])
+        dbinfo = self.read_dbinfo()
+        outdated_paths = {}
+        for dbtype, url in manifest_paths.items():
+            if dbinfo.get(dbtype) != url.split("/")[-1].strip():
+                outdated_paths[dbtype] = url
+        self.download_destiny_dbs(outdated_paths, progress_callback)
+        for dbtype in outdated_paths.keys():
+            # The next lookup in the database gets a pool for the new version, while anything still using the old pool finishes with it
+            with self.database_connect_lock:
+                old_pool = self.database_pools.pop(dbtype, None)
+                if old_pool is not None and old_pool.close_thread_connection() > 0:
+                    # Other threads may still be reading from their connections, so each closes its own on its next lookup
+                    self.retired_database_pools.append(old_pool)
+                old_compact_manifest = self.compact_manifests.pop(dbtype, None)
+            if old_compact_manifest is not None:
+                # The file can only be removed once it is no longer mapped
+                old_compact_manifest.close()
+            self.definition_cache.clear(dbtype)
+            if dbtype in dbinfo:
+                for old_path in ["./db/" + dbinfo[dbtype], "./db/" + dbinfo[dbtype] + ".compact"]:
+                    try:
+                        os.remove(old_path)
+                    except OSError:
+                        # Either there is no such file, or the platform will not remove a file that is still open
+                        pass
+
+    def start_manifest_checks(self):
+
+        """
+        Starts checking for database updates in a background thread - once straight away, and then repeatedly if the client has a manifest_check_interval. Called automatically during initialisation for lazy clients and clients with an interval.
+        """
+
+        if self.manifest_check_thread is not None and self.manifest_check_thread.is_alive():
+            return
+        self.manifest_check_stop.clear()
+        self.manifest_check_thread = threading.Thread(target=self.run_manifest_checks, daemon=True)
+        self.manifest_check_thread.start()
+
+    def stop_manifest_checks(self):
 
         """
-        Checks through all downloaded databases and checks if there are any updates to any of them - there should be no need to call this, as it should be called automatically during the initialisation process
+        Stops the background checks for database updates started by start_manifest_checks
         """
 
-        manifest_json = self.get_destiny_manifest()["Response"]
-        with open("./db/dbinfo.json", "r") as dbinfo_file:
-            dbinfo = json.loads(dbinfo_file.read())
-        if dbinfo["mobileAssetContent"] != manifest_json["mobileAssetContentPath"].replace(
-                "/common/destiny2_content/sqlite/asset/", "").strip():
-            os.remove("./db/" + dbinfo["mobileAssetContent"])
-            self.download_one_destiny_db("mobileAssetContent", manifest_json["mobileAssetContentPath"])
-        if dbinfo["mobileGearAssetDataBase"] != manifest_json["mobileGearAssetDataBases"][2]["path"].replace(
-                "/common/destiny2_content/sqlite/asset/", "").strip():
-            os.remove("./db/" + dbinfo["mobileGearAssetDataBase"])
-            self.download_one_destiny_db("mobileGearAssetDataBase", manifest_json["mobileGearAssetDataBases"][2]["path"])
-        if dbinfo["mobileWorldContent"] != manifest_json["mobileWorldContentPaths"]["en"].replace(
-                "/common/destiny2_content/sqlite/en/", "").strip():
-            os.remove("./db/" + dbinfo["mobileWorldContent"])
-            self.download_one_destiny_db("mobileWorldContent", manifest_json["mobileWorldContentPaths"]["en"])
-        if dbinfo["mobileClanBannerDatabase"] != manifest_json["mobileClanBannerDatabasePath"].replace(
-                "/common/destiny2_content/clanbanner/", "").strip():
-            os.remove("./db/" + dbinfo["mobileClanBannerDatabase"])
-            self.download_one_destiny_db("mobileClanBannerDatabase", manifest_json["mobileClanBannerDatabasePath"])
+        self.manifest_check_stop.set()
+        if self.manifest_check_thread is not None:
+            self.manifest_check_thread.join()
+            self.manifest_check_thread = None
+
+    def run_manifest_checks(self):
+        # Clients that are not lazy have only just checked during initialisation, so wait for the first interval
+        if not self.lazy and self.manifest_check_stop.wait(self.manifest_check_interval):
+            return
+        while not self.manifest_check_stop.is_set():
+            try:
+                self.check_for_destiny_db_update()
+                self.manifest_check_error = None
+            except Exception as error:
+                # The current databases are still usable, so the error is kept for the application to inspect rather than raised
+                self.manifest_check_error = error
+            if self.manifest_check_interval is None:
+                return
+            self.manifest_check_stop.wait(self.manifest_check_interval)
+
+    def get_manifest_db_paths(self, manifest_json):
+
+        """
+        Gets the paths of each of the database files listed in the Destiny manifest
+
+        :param manifest_json: The "Response" section of the Destiny manifest
+        :type manifest_json: dict
+        :return: A dict of paths on bungie.net, keyed by database type
+        :rtype: dict
+        """
+
+        return {
+            "mobileAssetContent": manifest_json["mobileAssetContentPath"],
+            "mobileGearAssetDataBase": manifest_json["mobileGearAssetDataBases"][2]["path"],
+            "mobileWorldContent": manifest_json["mobileWorldContentPaths"]["en"],
+            "mobileClanBannerDatabase": manifest_json["mobileClanBannerDatabasePath"]
+        }
+
+    def read_dbinfo(self):
+
+        """
+        Reads the dbinfo.json file, which contains the file names of the current version of each database
+
+        :return: The file names of each database, keyed by database type
+        :rtype: dict
+        """
+
+        try:
+            with open("./db/dbinfo.json", "r") as dbinfo_file:
+                return json.loads(dbinfo_file.read())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def write_dbinfo(self, dbinfo):
+
+        """
+        Replaces the dbinfo.json file - the new contents are written to a temporary file first, so the file is never left partly written
+
+        :param dbinfo: The file names of each database, keyed by database type
+        :type dbinfo: dict
+        """
+
+        with open("./db/dbinfo.json.tmp", "w") as dbinfo_file:
+            dbinfo_file.write(json.dumps(dbinfo))
+        os.replace("./db/dbinfo.json.tmp", "./db/dbinfo.json")
 
     def unzip_db_zip(self, zipfile_path, dbtype):
 
         """
-        Unzips a zip file downloaded from bungie.net containing a database file, and adds or updates the corresponding entry in the dbinfo.json file
+        Unzips a zip file downloaded from bungie.net containing a database file, and adds or updates the corresponding entry in the dbinfo.json file. The database file is extracted in chunks to a temporary file, which only replaces the real file once it is complete.
 
         :param zipfile_path: The path to the zip file containing the database file
         :type zipfile_path: string
@@ -213,70 +573,121 @@ class d2client:
         """
 
         with zipfile.ZipFile(zipfile_path) as DBZip:
-            DBZip.extractall("./db")
-            # Opens the file to read its contents and add to the JSON
-            with open("./db/dbinfo.json", "r") as dbinfo_json_file:
-                try:
-                    dbinfo_json = json.loads(dbinfo_json_file.read())
-                except json.JSONDecodeError:
-                    dbinfo_json = {}
-                dbinfo_json[dbtype] = DBZip.namelist()[0]
-            # Reopens the file in write mode as this will overwrite the contents of the file immediately, which we do not want
-            with open("./db/dbinfo.json", "w") as dbinfo_json_file:
-                dbinfo_json_file.write(json.dumps(dbinfo_json))
+            db_filename = DBZip.namelist()[0]
+            with DBZip.open(db_filename) as zipped_db_file, open("./db/" + db_filename + ".tmp", "wb") as db_file:
+                shutil.copyfileobj(zipped_db_file, db_file, self.download_chunk_size)
+        os.replace("./db/" + db_filename + ".tmp", "./db/" + db_filename)
+        # Databases may be unzipped at the same time, so only one may update the dbinfo.json file at once
+        with self.dbinfo_lock:
+            dbinfo_json = self.read_dbinfo()
+            dbinfo_json[dbtype] = db_filename
+            self.write_dbinfo(dbinfo_json)
         os.remove(zipfile_path)
+        if self.compact_manifest and dbtype in self.compact_databases:
+            self.compile_compact_manifest(dbtype)
 
-    def download_one_destiny_db(self, dbtype, url):
+    def download_one_destiny_db(self, dbtype, url, progress_callback=None):
 
         """
-        Downloads a single database file, unzips it and adds or updates the relevant dbinfo.json entry
+        Downloads a single database file, unzips it and adds or updates the relevant dbinfo.json entry. The file is streamed to disk in chunks rather than being held in memory. If a previous download of the same version was interrupted, it is resumed from where it stopped, and the finished file is checked to be complete and uncorrupted before it is unzipped.
 
         :param dbtype: The type of database - this can be mobileAssetContent, mobileGearAssetDataBase, mobileWorldContent, or mobileClanBannerDatabase
         :type dbtype: string
         :param url: The URL of the database file to download
         :type url: string
+        :param progress_callback: A function called after each chunk is written, with the database type, the number of bytes downloaded so far, the total number of bytes (or None if unknown) and the average throughput in bytes per second, defaults to the client's download_progress_callback
+        :type progress_callback: function, optional
+
+        :raises DatabaseDownloadFailed: Raised when the download stops early or the downloaded file is corrupt
         """
 
-        with open("./db/" + dbtype + ".zip", "wb") as db_file:
-            db_file.write(requests.get("https://bungie.net" + url).content)
-        self.unzip_db_zip("./db/" + dbtype + ".zip", dbtype)
+        if progress_callback is None:
+            progress_callback = self.download_progress_callback
+        # The partial file is named after the version being downloaded, so a download is only ever resumed with the same version
+        partial_path = "./db/" + url.split("/")[-1] + ".zip.part"
+        zipfile_path = "./db/" + dbtype + ".zip"
+        start_time = time.monotonic()
+        try:
+            bytes_downloaded = os.path.getsize(partial_path)
+        except OSError:
+            bytes_downloaded = 0
+        request_header = dict(self.request_header)
+        if bytes_downloaded > 0:
+            request_header["Range"] = "bytes=" + str(bytes_downloaded) + "-"
+        with self.http_get("https://bungie.net" + url, headers=request_header, stream=True) as db_request:
+            if db_request.status_code == 416:
+                # The partial file already holds everything the server has, so it only needs verifying
+                total_bytes = bytes_downloaded
+            else:
+                db_request.raise_for_status()
+                if db_request.status_code != 206:
+                    # The server has sent the whole file, so start again from the beginning
+                    bytes_downloaded = 0
+                try:
+                    if db_request.status_code == 206:
+                        total_bytes = int(db_request.headers["Content-Range"].split("/")[1])
+                    else:
+                        total_bytes = int(db_request.headers["Content-Length"])
+                except (KeyError, IndexError, ValueError):
+                    total_bytes = None
+                resumed_bytes = bytes_downloaded
+                with open(partial_path, "ab" if bytes_downloaded > 0 else "wb") as db_file:
+                    for chunk in db_request.iter_content(chunk_size=self.download_chunk_size):
+                        db_file.write(chunk)
+                        bytes_downloaded += len(chunk)
+                        if progress_callback is not None:
+                            elapsed_time = time.monotonic() - start_time
+                            throughput = (bytes_downloaded - resumed_bytes) / elapsed_time if elapsed_time > 0 else 0.0
+                            progress_callback(dbtype, bytes_downloaded, total_bytes, throughput)
+        if total_bytes is not None and bytes_downloaded != total_bytes:
+            # The partial file is kept so that the next attempt can resume from it
+            raise ourdestiny.DatabaseDownloadFailed(dbtype, "Downloaded " + str(bytes_downloaded) + " of " + str(total_bytes) + " bytes of " + dbtype)
+        try:
+            with zipfile.ZipFile(partial_path) as DBZip:
+                corrupt_file = DBZip.testzip()
+        except zipfile.BadZipFile:
+            corrupt_file = partial_path
+        if corrupt_file is not None:
+            os.remove(partial_path)
+            raise ourdestiny.DatabaseDownloadFailed(dbtype, "Downloaded file for " + dbtype + " is corrupt")
+        os.replace(partial_path, zipfile_path)
+        self.unzip_db_zip(zipfile_path, dbtype)
+
+    def download_destiny_dbs(self, paths, progress_callback=None):
 
-    def download_all_destiny_db(self):
+        """
+        Downloads several database files at the same time, unzipping them and updating dbinfo.json as each one finishes
 
+        :param paths: A dict of paths on bungie.net, keyed by database type
+        :type paths: dict
+        :param progress_callback: A function called as each database downloads - see download_one_destiny_db, defaults to the client's download_progress_callback
+        :type progress_callback: function, optional
         """
-        Downloads all database files, unzips and adds them to the relevant dbinfo.json - normally used automatically in the case of a blank slate
+
+        if len(paths) == 0:
+            return
+        with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+            futures = [pool.submit(self.download_one_destiny_db, dbtype, url, progress_callback) for dbtype, url in paths.items()]
+        # Raises the first error that occurred, if there was one
+        for future in futures:
+            future.result()
+
+    def download_all_destiny_db(self, progress_callback=None):
+
+        """
+        Downloads all database files at the same time, unzips and adds them to the relevant dbinfo.json - normally used automatically in the case of a blank slate
+
+        :param progress_callback: A function called as each database downloads - see download_one_destiny_db, defaults to the client's download_progress_callback
+        :type progress_callback: function, optional
         """
 
         manifest_json = self.get_destiny_manifest()
-        mobile_asset_url = "https://bungie.net" + manifest_json["Response"]["mobileAssetContentPath"]
-        with open("./db/dbinfo.json", "w") as dbinfo_json:
-            dbinfo_json.write("")
-        with open("./db/MobileAssetContent.zip", "wb") as mobile_asset_file:
-            mobile_asset_file.write(requests.get(mobile_asset_url, headers=self.request_header).content)
-        self.unzip_db_zip("./db/MobileAssetContent.zip", "mobileAssetContent")
-        mobile_asset_gear_url = "https://bungie.net" + manifest_json["Response"]["mobileGearAssetDataBases"][2][
-            "path"]
-        with open("./db/MobileGearAssetDatabase.zip", "wb") as mobile_asset_gear_file:
-            mobile_asset_gear_file.write(
-                requests.get(mobile_asset_gear_url, headers=self.request_header).content)
-        self.unzip_db_zip("./db/MobileGearAssetDatabase.zip", "mobileGearAssetDataBase")
-        mobile_world_content_url = "https://bungie.net" + manifest_json["Response"]["mobileWorldContentPaths"][
-            "en"]
-        with open("./db/MobileWorldContentDatabase.zip", "wb") as mobile_world_content_file:
-            mobile_world_content_file.write(
-                requests.get(mobile_world_content_url, headers=self.request_header).content)
-        self.unzip_db_zip("./db/MobileWorldContentDatabase.zip", "mobileWorldContent")
-        mobile_clan_banner_path = "https://bungie.net" + manifest_json["Response"][
-            "mobileClanBannerDatabasePath"]
-        with open("./db/MobileClanBannerDatabase.zip", "wb") as mobile_clan_banner_file:
-            mobile_clan_banner_file.write(
-                requests.get(mobile_clan_banner_path, headers=self.request_header).content)
-        self.unzip_db_zip("./db/MobileClanBannerDatabase.zip", "mobileClanBannerDatabase")
+        self.download_destiny_dbs(self.get_manifest_db_paths(manifest_json["Response"]), progress_callback)
 
     def connect_all_destiny_db(self):
 
         """
-        Checks if the path to the database files exists, and places the cursor objects for those sqlite databases into the specified class variables
+        Checks if the path to the database files exists, and creates connection pools for those sqlite databases in the database_pools class variable
         """
 
         if os.path.exists("./db"):
@@ -284,34 +695,145 @@ class d2client:
         else:
             os.mkdir("db")
             self.download_all_destiny_db()
-        common_path = "./db/"
-        with open(common_path + "dbinfo.json", "r") as dbinfo_file:
-            dbinfo = json.loads(dbinfo_file.read())
-
-        dbconnect = sqlite3.connect(common_path + dbinfo["mobileAssetContent"])
-        self.asset_database = dbconnect.cursor()
-        dbconnect = sqlite3.connect(common_path + dbinfo["mobileGearAssetDataBase"])
-        self.gear_database = dbconnect.cursor()
-        dbconnect = sqlite3.connect(common_path + dbinfo["mobileWorldContent"])
-        self.world_database = dbconnect.cursor()
-        dbconnect = sqlite3.connect(common_path + dbinfo["mobileClanBannerDatabase"])
-        self.clan_banner_database = dbconnect.cursor()
+        for dbtype in self.database_types:
+            self.connect_destiny_db(dbtype)
+            self.get_database_cursor(dbtype)
+
+    def connect_destiny_db(self, dbtype):
+
+        """
+        Creates a connection pool for the current version of a database, and places it into the client's database_pools. Anything still using the pool for an older version can carry on using it until it is finished.
+
+        :param dbtype: The type of database - this can be mobileAssetContent, mobileGearAssetDataBase, mobileWorldContent, or mobileClanBannerDatabase
+        :type dbtype: string
+        :return: The new connection pool
+        :rtype: ourdestiny.d2connectionpool
+        """
+
+        dbinfo = self.read_dbinfo()
+        if self.optimised_reads:
+            db_pool = ourdestiny.d2connectionpool("./db/" + dbinfo[dbtype], read_only=True, mmap_size=self.db_mmap_size,
+                                                  page_cache_size=self.db_page_cache_size)
+        else:
+            db_pool = ourdestiny.d2connectionpool("./db/" + dbinfo[dbtype])
+        self.database_pools[dbtype] = db_pool
+        return db_pool
+
+    def get_database_pool(self, dbtype):
+
+        """
+        Gets the connection pool for a database, creating it first if the database has not been used yet
+
+        :param dbtype: The type of database - this can be mobileAssetContent, mobileGearAssetDataBase, mobileWorldContent, or mobileClanBannerDatabase
+        :type dbtype: string
+        :return: The connection pool for the database
+        :rtype: ourdestiny.d2connectionpool
+        """
+
+        try:
+            return self.database_pools[dbtype]
+        except KeyError:
+            pass
+        with self.database_connect_lock:
+            try:
+                return self.database_pools[dbtype]
+            except KeyError:
+                return self.connect_destiny_db(dbtype)
+
+    def get_pool_stats(self):
+
+        """
+        Gets statistics about the connection pools of each database that has been used
+
+        :return: A dict of statistics from each pool, keyed by database type - see ourdestiny.d2connectionpool.get_stats
+        :rtype: dict
+        """
+
+        return {dbtype: db_pool.get_stats() for dbtype, db_pool in list(self.database_pools.items())}
 
     def get_world_db_cursor(self):
-        common_path = "./db/"
-        with open(common_path + "dbinfo.json", "r") as dbinfo_file:
-            dbinfo = json.loads(dbinfo_file.read())
-        dbconnect = sqlite3.connect(common_path + dbinfo["mobileWorldContent"])
-        return dbconnect.cursor()
 
-    def get_hash_with_cursor(self, hashnum, cursor, table):
+        """
+        Gets a cursor for the world database that belongs to the current thread, so it is safe to use from worker threads
+
+        :return: A cursor for the world database
+        :rtype: sqlite3.cursor
+        """
+
+        return self.get_database_cursor("mobileWorldContent")
+
+    @property
+    def asset_database(self):
+        return self.get_database_cursor("mobileAssetContent")
+
+    @property
+    def gear_database(self):
+        return self.get_database_cursor("mobileGearAssetDataBase")
+
+    @property
+    def world_database(self):
+        return self.get_database_cursor("mobileWorldContent")
+
+    @property
+    def clan_banner_database(self):
+        return self.get_database_cursor("mobileClanBannerDatabase")
+
+    def get_hash_with_cursor(self, hashnum, cursor, table, database="mobileWorldContent"):
+
+        hashnum = int(hashnum)
+        cached_json = self.definition_cache.get(database, table, hashnum)
+        if cached_json is not None:
+            return cached_json
+        tablename = "Destiny"+table+"Definition"
+        db_text = cursor.execute("SELECT json FROM " + tablename + " WHERE id = ?", (self.get_signed_hash(hashnum),)).fetchone()[0]
+        result_json = json.loads(db_text)
+        self.definition_cache.put(database, table, hashnum, result_json)
+        return result_json
+
+    def get_signed_hash(self, hashnum):
+
+        """
+        Converts a hash given by the API into the signed form used for the id column of the database files
+
+        :param hashnum: The unsigned hash number given by the API
+        :type hashnum: string, integer
+        :return: The signed hash number
+        :rtype: integer
+        """
 
         hashnum = int(hashnum)
         if (hashnum & (1 << (32 - 1))) != 0:
             hashnum = hashnum - (1 << 32)
-        tablename = "Destiny"+table+"Definition"
-        db_text = cursor.execute("SELECT json FROM " + tablename + " WHERE id = " + str(hashnum)).fetchone()[0]
-        return json.loads(db_text)
+        return hashnum
+
+    def get_database_cursor(self, database):
+
+        """
+        Gets the cursor for one of the database files that belongs to the current thread, opening the database first if it is not open yet
+
+        :param database: The type of database - this can be mobileAssetContent, mobileGearAssetDataBase, mobileWorldContent, or mobileClanBannerDatabase
+        :type database: string
+        :return: The cursor for the database, or None if the database type is not recognised
+        :rtype: sqlite3.cursor
+        """
+
+        if database not in self.database_types:
+            return None
+        if self.retired_database_pools:
+            self.close_retired_connections()
+        return self.get_database_pool(database).get_cursor()
+
+    def close_retired_connections(self):
+
+        """
+        Closes the current thread's connections to old versions of databases that have since been updated - called automatically before each lookup, so there should be no need to call this
+        """
+
+        for pool in list(self.retired_database_pools):
+            if pool.close_thread_connection() == 0:
+                with self.database_connect_lock:
+                    if pool in self.retired_database_pools:
+                        self.retired_database_pools.remove(pool)
 
     def get_membership_type_enum(self, platform):
 
@@ -338,7 +860,7 @@ class d2client:
     def get_from_db(self, hashnum, table, database="mobileWorldContent"):
 
         """
-        Gets a JSON item from the local sqlite database, using a hash given from the API.
+        Gets a JSON item from the local sqlite database, using a hash given from the API. Decoded definitions are kept in the client's definition cache, so repeated lookups of the same hash do not go back to the database.
 
         :param hashnum: The hash number given by the API
         :type hashnum: string, integer
@@ -346,35 +868,203 @@ class d2client:
         :type table: string
         :param database: The database in which to lookup the hash, defaults to world database
         :type database: string, optional
-        :return: A JSON of the relevant data
+        :return: A JSON of the relevant data, or None if the database is not available
         :rtype: dict
         """
 
-        result_json = ""
-        # Converts the hash from a JSON file to a column value for the SQL database
         hashnum = int(hashnum)
-        if (hashnum & (1 << (32 - 1))) != 0:
-            hashnum = hashnum - (1 << 32)
-        table = "Destiny" + table + "Definition"
-        if database == "mobileWorldContent":
-            result_text = \
-                self.world_database.execute("SELECT json FROM " + table + " WHERE id = " + str(hashnum)).fetchone()[0]
-            result_json = json.loads(result_text)
-        elif database == "mobileGearAssetDataBase":
-            result_text = \
-                self.gear_database.execute("SELECT json FROM " + table + " WHERE id = " + str(hashnum)).fetchone()[0]
-            result_json = json.loads(result_text)
-        elif database == "mobileAssetContent":
-            result_text = \
-                self.asset_database.execute("SELECT json FROM " + table + " WHERE id = " + str(hashnum)).fetchone()[0]
-            result_json = json.loads(result_text)
-        elif database == "mobileClanBannerDatabase":
-            result_text = \
-                self.clan_banner_database.execute(
-                    "SELECT json FROM " + table + " WHERE id = " + str(hashnum)).fetchone()[0]
-            result_json = json.loads(result_text)
+        cached_json = self.definition_cache.get(database, table, hashnum)
+        if cached_json is not None:
+            return cached_json
+        result_json = self.get_compact_definition(hashnum, table, database)
+        if result_json is None:
+            if self.get_database_cursor(database) is None:
+                # Nothing is cached, so the definition is found once the database is available
+                return None
+            result_json = self.get_full_definition(hashnum, table, database)
+        self.definition_cache.put(database, table, hashnum, result_json)
         return result_json
 
+    def get_full_definition(self, hashnum, table, database="mobileWorldContent"):
+
+        """
+        Gets the full JSON of a definition straight from the database file, without going through the definition cache or compact manifest
+
+        :param hashnum: The hash number given by the API
+        :type hashnum: string, integer
+        :param table: The table in which to lookup the hash (only the unique part of the table name is needed)
+        :type table: string
+        :param database: The database in which to lookup the hash, defaults to world database
+        :type database: string, optional
+        :return: A JSON of the relevant data
+        :rtype: dict
+        """
+
+        result_text = self.get_database_cursor(database).execute("SELECT json FROM Destiny" + table + "Definition WHERE id = ?",
+                                                                 (self.get_signed_hash(hashnum),)).fetchone()[0]
+        return json.loads(result_text)
+
+    def get_compact_definition(self, hashnum, table, database="mobileWorldContent"):
+
+        """
+        Gets a definition from the compact manifest of a database, if the client is using compact manifests and the table was compiled into it
+
+        :param hashnum: The unsigned hash number given by the API
+        :type hashnum: integer
+        :param table: The table in which to lookup the hash (only the unique part of the table name is needed)
+        :type table: string
+        :param database: The database in which to lookup the hash, defaults to world database
+        :type database: string, optional
+        :return: The definition, which reads any fields that were not pre-extracted from the database when they are asked for, or None if it is not in a compact manifest
+        :rtype: ourdestiny.d2compactdefinition
+        """
+
+        compact_manifest = self.get_compact_manifest(database)
+        if compact_manifest is None:
+            return None
+        try:
+            compact_json = compact_manifest.get(table, hashnum)
+        except ValueError:
+            # The database was updated during the lookup and its old compact manifest closed, so use the database instead
+            return None
+        if compact_json is None:
+            return None
+        return ourdestiny.d2compactdefinition(compact_json, compact_manifest.get_fields(table),
+                                              functools.partial(self.get_full_definition, hashnum, table, database))
+
+    def get_compact_manifest(self, dbtype):
+
+        """
+        Gets the compact manifest for a database, compiling it first if it has not been compiled for the current version yet
+
+        :param dbtype: The type of database
+        :type dbtype: string
+        :return: The compact manifest, or None if the client is not using compact manifests or has none for this database
+        :rtype: ourdestiny.d2compactmanifest
+        """
+
+        if not self.compact_manifest or dbtype not in self.compact_databases:
+            return None
+        try:
+            return self.compact_manifests[dbtype]
+        except KeyError:
+            pass
+        with self.database_connect_lock:
+            try:
+                return self.compact_manifests[dbtype]
+            except KeyError:
+                pass
+            compact_path = "./db/" + self.read_dbinfo()[dbtype] + ".compact"
+            try:
+                compact_manifest = ourdestiny.d2compactmanifest(compact_path)
+            except (OSError, ValueError):
+                compact_manifest = self.compile_compact_manifest(dbtype)
+            self.compact_manifests[dbtype] = compact_manifest
+            return compact_manifest
+
+    def compile_compact_manifest(self, dbtype="mobileWorldContent"):
+
+        """
+        Compiles the compact manifest for the current version of a database - called automatically after a database is unzipped when the client is using compact manifests
+
+        :param dbtype: The type of database, defaults to the world database
+        :type dbtype: string, optional
+        :return: The compact manifest
+        :rtype: ourdestiny.d2compactmanifest
+        """
+
+        db_path = "./db/" + self.read_dbinfo()[dbtype]
+        return ourdestiny.d2compactmanifest.compile(db_path, db_path + ".compact")
+
+    def get_many_from_db(self, hashes, table, database="mobileWorldContent", cursor=None):
+
+        """
+        Gets several JSON items from the local sqlite database at once, using hashes given from the API. Hashes that are
+        already in the definition cache are served from there, and the rest are fetched in as few queries as possible.
+
+        :param hashes: The hash numbers given by the API - duplicates are only looked up once
+        :type hashes: Iterable[string, integer]
+        :param table: The table in which to lookup the hashes (only the unique part of the table name is needed, for example "lore" instead of "DestinyLoreDefinition")
+        :type table: string
+        :param database: The database in which to lookup the hashes, defaults to world database
+        :type database: string, optional
+        :param cursor: A cursor to use instead of the client's own cursor for the database - needed when calling from another thread
+        :type cursor: sqlite3.cursor, optional
+        :return: A dict of JSONs of the relevant data, keyed by the unsigned integer form of each hash - hashes that could not be found are left out
+        :rtype: dict
+        """
+
+        results = {}
+        # A dict is used as an ordered set so that duplicates are not added to the query twice
+        missing_hashes = {}
+        for hashnum in hashes:
+            hashnum = int(hashnum)
+            if hashnum in results or hashnum in missing_hashes:
+                continue
+            cached_json = self.definition_cache.get(database, table, hashnum)
+            if cached_json is not None:
+                results[hashnum] = cached_json
+            else:
+                missing_hashes[hashnum] = None
+        for hashnum in list(missing_hashes):
+            compact_json = self.get_compact_definition(hashnum, table, database)
+            if compact_json is not None:
+                self.definition_cache.put(database, table, hashnum, compact_json)
+                results[hashnum] = compact_json
+                del missing_hashes[hashnum]
+        missing_hashes = list(missing_hashes)
+        if cursor is None:
+            cursor = self.get_database_cursor(database)
+        if cursor is None or len(missing_hashes) == 0:
+            return results
+        # SQLite limits how many parameters a single query can have, so larger batches are split up
+        for chunk_start in range(0, len(missing_hashes), self.db_query_chunk_size):
+            chunk = [self.get_signed_hash(hashnum) for hashnum in
+                     missing_hashes[chunk_start:chunk_start + self.db_query_chunk_size]]
+            # Pads the chunk out to a power of two by repeating a hash, so that only a handful of distinct queries exist
+            # per table and their prepared statements are reused from the connection's statement cache
+            padded_size = min(1 << (len(chunk) - 1).bit_length(), self.db_query_chunk_size)
+            chunk.extend([chunk[0]] * (padded_size - len(chunk)))
+            query = "SELECT id, json FROM Destiny" + table + "Definition WHERE id IN (" + ",".join("?" * len(chunk)) + ")"
+            for row_id, row_text in cursor.execute(query, chunk).fetchall():
+                result_json = json.loads(row_text)
+                hashnum = row_id & 0xFFFFFFFF
+                self.definition_cache.put(database, table, hashnum, result_json)
+                results[hashnum] = result_json
+        return results
+
+    def get_shared_object(self, object_class, hashnum, table, *args, definition_json=None, database="mobileWorldContent"):
+
+        """
+        Gets the object built from a definition, building it only the first time it is asked for. Objects that only
+        hold data from the database, such as lore or activities, are the same for every player, so one object per hash
+        is kept in the definition cache and shared by everything that refers to it - they are cleared along with the
+        definitions when a database is replaced. Shared objects should not be modified.
+
+        :param object_class: The class of the object, which is called with the definition JSON followed by args
+        :type object_class: type
+        :param hashnum: The hash of the definition
+        :type hashnum: string, integer
+        :param table: The table in which to lookup the hash (only the unique part of the table name is needed, for example "lore" instead of "DestinyLoreDefinition")
+        :type table: string
+        :param args: Any other arguments object_class takes
+        :param definition_json: The definition, if it has already been fetched - otherwise it is fetched with get_from_db
+        :type definition_json: dict, optional
+        :param database: The database in which to lookup the hash, defaults to world database
+        :type database: string, optional
+        :return: The shared object
+        :rtype: object
+        """
+
+        hashnum = int(hashnum)
+        shared_object = self.definition_cache.get(database, object_class.__name__, hashnum)
+        if shared_object is None:
+            if definition_json is None:
+                definition_json = self.get_from_db(hashnum, table, database)
+            shared_object = object_class(definition_json, *args)
+            self.definition_cache.put(database, object_class.__name__, hashnum, shared_object)
+        return shared_object
+
     def get_my_bungie_net_user(self):
 
         """
@@ -384,14 +1074,14 @@ class d2client:
         :rtype: ourdestiny.bungienetuser
         """
 
-        search_request = requests.get(self.root_endpoint + "/User/GetMembershipsForCurrentUser/",
-                                      headers=self.request_header)
+        search_request = self.http_get(self.root_endpoint + "/User/GetMembershipsForCurrentUser/",
+                                     headers=self.request_header)
 
         return ourdestiny.bungienetuser(search_request.json()["Response"]["bungieNetUser"])
 
     def get_my_destiny_id(self, platform):
         platform = self.get_membership_type_enum(platform)
-        search_request = requests.get(
+        search_request = self.http_get(
             self.root_endpoint + "/User/GetMembershipsById/" + self.bungie_membership_id + "/" + platform,
             headers=self.request_header)
         for membership in search_request.json()["Response"]["destinyMemberships"]:
@@ -412,37 +1102,38 @@ class d2client:
         """
 
         platform = self.get_membership_type_enum(platform)
-        search_request = requests.get(
+        search_request = self.http_get(
             self.root_endpoint + "/Destiny2/SearchDestinyPlayer/" + platform + "/" + displayname,
             headers=self.request_header)
         return search_request.json()
 
-    def get_profile(self, platform, destiny_membership_id):
+    def get_profile(self, platform, destiny_membership_id, sections=None):
 
         """
-        Gets a profile object based on the platform and membership ID passed in.
+        Gets a profile object based on the platform and membership ID passed in, using a single request for every component the profile is built from.
 
         :param platform: The name or enum of the platform the user is on
         :type platform: string, integer
         :param destiny_membership_id: The Destiny membership ID of the user that owns the desired profile
         :type destiny_membership_id: string
+        :param sections: The sections of the profile and its characters to build straight away, which also narrows the components requested to the ones those sections need - any other section is requested and built the first time it is used, see ourdestiny.d2profile, defaults to every section
+        :type sections: list[string], optional
 
         :return: The d2profile object of the desired profile
         :rtype: ourdestiny.d2profile
         """
-        profile_json = self.get_component_json(platform,
-                                               destiny_membership_id,
-                                               [ourdestiny.ComponentType.Profiles,
-                                                ourdestiny.ComponentType.ProfileInventories,
-                                                ourdestiny.ComponentType.Records])
-        return ourdestiny.d2profile(self, profile_json["Response"])
+        # The profile and character components are requested together, so the profile is built from a single request
+        profile_json = self.get_component_json(platform, destiny_membership_id, ourdestiny.d2profile.get_components(sections))
+        return ourdestiny.d2profile(self, profile_json["Response"], sections=sections)
 
-    def get_my_profile(self, platform):
+    def get_my_profile(self, platform, sections=None):
         """
         Gets a profile object for the currently authenticated user - see https://bungie-net.github.io/multi/operation_get_Destiny2-GetProfile.html
 
         :param platform: The name or enum of the platform the current user is on
         :type platform: string, integer
+        :param sections: The sections of the profile and its characters to build straight away - see get_profile, defaults to every section
+        :type sections: list[string], optional
         :return: A d2profile object for the currently authenticated user
         :rtype: ourdestiny.d2profile
         """
@@ -450,9 +1141,42 @@ class d2client:
         if self.destiny_membership_id == "":
             self.get_my_destiny_id(platform)
         platform = self.get_membership_type_enum(platform)
-        profile_object = self.get_profile(platform, self.destiny_membership_id)
+        profile_object = self.get_profile(platform, self.destiny_membership_id, sections)
         return profile_object
 
+    def watch_profiles(self, memberships, callback=None, interval=60, sections=None, requests_per_second=2, error_callback=None):
+
+        """
+        Starts polling several profiles in the background, calling a function with each change found - see ourdestiny.d2profilewatcher. The watcher is stopped when the client is closed.
+
+        :param memberships: The profiles to watch, as (membership type, membership ID) tuples
+        :type memberships: Iterable[tuple]
+        :param callback: A function called with the profile and the ourdestiny.d2change for each change found - more can be added with the watcher's add_callback method
+        :type callback: function, optional
+        :param interval: The number of seconds between polls of each profile, defaults to 60
+        :type interval: float, optional
+        :param sections: The sections of each profile to watch, defaults to the watcher's default_sections
+        :type sections: list[string], optional
+        :param requests_per_second: The most polls started per second across every profile, defaults to 2
+        :type requests_per_second: float, optional
+        :param error_callback: A function called with the membership ID and the error whenever a poll or callback fails
+        :type error_callback: function, optional
+        :return: The running watcher
+        :rtype: ourdestiny.d2profilewatcher
+        """
+
+        watcher = ourdestiny.d2profilewatcher(self, interval, sections, requests_per_second, error_callback)
+        if callback is not None:
+            watcher.add_callback(callback)
+        for membership_type, membership_id in memberships:
+            watcher.watch(membership_type, membership_id)
+        with self.session_lock:
+            if self.watchers is None:
+                self.watchers = []
+            self.watchers.append(watcher)
+        watcher.start()
+        return watcher
+
     def get_bungienetuser_with_membership_id(self, membership_id, platform):
 
         """
@@ -467,7 +1191,7 @@ class d2client:
         """
 
         platform = self.get_membership_type_enum(platform)
-        profile_request = requests.get(self.root_endpoint+"/User/GetMembershipsById/"+membership_id+"/"+platform, headers=self.request_header)
+        profile_request = self.http_get(self.root_endpoint+"/User/GetMembershipsById/"+membership_id+"/"+platform, headers=self.request_header)
         return ourdestiny.bungienetuser(profile_request.json()["Response"]["bungieNetUser"])
 
     def get_bungienetusers_with_search_name(self, search_string):
@@ -480,7 +1204,7 @@ class d2client:
         :rtype: List[ourdestiny.bungienetuser]
         """
         params = {"q": search_string}
-        search_request = requests.get(self.root_endpoint+"/User/SearchUsers", headers=self.request_header, params=params)#
+        search_request = self.http_get(self.root_endpoint+"/User/SearchUsers", headers=self.request_header, params=params)
         users = []
         for user_json in search_request.json()["Response"]:
             users.append(ourdestiny.bungienetuser(user_json))
@@ -499,23 +1223,27 @@ class d2client:
         """
 
         platform = self.get_membership_type_enum(platform)
-        search_request = requests.get(self.root_endpoint+"/Destiny2/SearchDestinyPlayer/"+platform+"/"+search_string,
-                                      headers=self.request_header)
+        search_request = self.http_get(self.root_endpoint+"/Destiny2/SearchDestinyPlayer/"+platform+"/"+search_string,
+                                     headers=self.request_header)
         destiny_membership_id = search_request.json()["Response"][0]["membershipId"]
         profile_object = self.get_profile(platform, destiny_membership_id)
         return profile_object
 
-    def get_component_json(self, platform, destiny_membership_id, list_of_enums):
+    def get_component_json(self, platform, destiny_membership_id, list_of_enums, use_cache=True):
 
         """
         Gets game-related profile information of the corresponding user of the Destiny membership ID - see https://bungie-net.github.io/multi/operation_get_Destiny2-GetProfile.html
 
+        If the client has a response_cache, a fresh cached response for the same components is returned without making a request, and a stale one is only replaced if bungie.net has newer data.
+
         :param platform: The name or enum of the platform the user is on
         :type platform: string, integer
         :param destiny_membership_id: The membership ID of the Destiny account being accessed
         :type destiny_membership_id: string
         :param list_of_enums: A list of enums - see https://bungie-net.github.io/multi/schema_Destiny-DestinyComponentType.html
         :type list_of_enums: list[ourdestiny.ComponentType]
+        :param use_cache: When False, the client's response_cache is not read from, although the new response is still stored in it, defaults to True
+        :type use_cache: bool, optional
         :return: Profile data based on enums given - see https://bungie-net.github.io/multi/schema_Destiny-Responses-DestinyProfileResponse.html
         :rtype: dict
         """
@@ -525,10 +1253,41 @@ class d2client:
         for enum in list_of_enums:
             collated_enums += str(enum.value) + ","
         params = {"components": collated_enums}
-        search_request = requests.get(
+        request_header = self.request_header
+        if self.response_cache is not None:
+            cache_key = self.response_cache.get_key(platform, destiny_membership_id, list_of_enums)
+            cache_entry = None
+            if use_cache:
+                cached_json = self.response_cache.get_fresh(cache_key)
+                if cached_json is not None:
+                    return cached_json
+                cache_entry = self.response_cache.get_entry(cache_key)
+                request_header = dict(self.request_header, **self.response_cache.get_conditional_headers(cache_entry))
+        search_request = self.http_get(
             self.root_endpoint + "/Destiny2/" + platform + "/Profile/" + destiny_membership_id,
-            headers=self.request_header, params=params)
-        return search_request.json()
+            headers=request_header, params=params)
+        if self.response_cache is None:
+            return search_request.json()
+        if search_request.status_code == 304 and cache_entry is not None:
+            return self.response_cache.revalidate(cache_key, cache_entry, list_of_enums)
+        return self.response_cache.store(cache_key, search_request.json(), list_of_enums,
+                                         etag=search_request.headers.get("ETag"),
+                                         last_modified=search_request.headers.get("Last-Modified"),
+                                         entry=cache_entry)
+
+    def invalidate_cached_components(self, platform, destiny_membership_id):
+
+        """
+        Removes a profile's responses from the client's response_cache, if it has one - called automatically after actions that change the profile, such as equipping or transferring items
+
+        :param platform: The name or enum of the platform the user is on
+        :type platform: string, integer
+        :param destiny_membership_id: The membership ID of the Destiny account
+        :type destiny_membership_id: string
+        """
+
+        if self.response_cache is not None:
+            self.response_cache.invalidate(self.get_membership_type_enum(platform), destiny_membership_id)
 
 
 class ComponentType(IntEnum):
@@ -1,3 +1,6 @@
+import types
+
+
 class d2displayproperties:
 
     """
@@ -5,6 +8,10 @@ class d2displayproperties:
     https://bungie-net.github.io/multi/schema_Destiny-Definitions-Common-DestinyDisplayPropertiesDefinition.html
     """
 
+    # Attributes are stored in slots rather than a dict, as large profiles create a great many of these objects -
+    # subclasses that are created in large numbers list their own attributes in __slots__ as well
+    __slots__ = ("name", "description", "icon", "icon_sequences", "high_res_icon")
+
     def __init__(self, display_properties_json):
         try:
             self.name = display_properties_json["name"]
@@ -30,4 +37,48 @@ class d2displayproperties:
         try:
             self.high_res_icon = "https://bungie.net" + display_properties_json["highResIcon"]
         except KeyError:
-            self.high_res_icon = ""
\ No newline at end of file
+            self.high_res_icon = ""
+
+class d2definitionattribute:
+
+    """
+    An attribute of an object that is read from the shared object its definition data is kept in, held in the object's
+    definition attribute - see d2item. Where the object's class inherits a slot of the same name, such as from
+    d2displayproperties, setting the attribute changes it on that object alone, and the shared definition is left as it
+    is. Otherwise the attribute cannot be set, as the definition is shared with every other object of the same hash.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.slot = None
+        for base in owner.__mro__[1:]:
+            if isinstance(base.__dict__.get(name), types.MemberDescriptorType):
+                self.slot = base.__dict__[name]
+                break
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        if self.slot is not None:
+            try:
+                return self.slot.__get__(instance, owner)
+            except AttributeError:
+                pass
+        return getattr(instance.definition, self.name)
+
+    def __set__(self, instance, value):
+        if self.slot is None:
+            raise AttributeError(self.name + " comes from the definition shared by every object with the same hash, so cannot be set")
+        if value is getattr(instance.definition, self.name):
+            # Setting the definition's own value, as copying the object does, leaves nothing set on the object itself
+            self.__delete__(instance)
+        else:
+            self.slot.__set__(instance, value)
+
+    def __delete__(self, instance):
+        if self.slot is None:
+            raise AttributeError(self.name + " comes from the definition shared by every object with the same hash, so cannot be deleted")
+        try:
+            self.slot.__delete__(instance)
+        except AttributeError:
+            pass
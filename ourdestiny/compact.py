@@ -0,0 +1,265 @@
+import json
+import mmap
+import os
+import sqlite3
+import struct
+
+
+class d2compactmanifest:
+
+    """
+    A compact, memory-mapped copy of the definition tables of a database file, holding only the fields of each
+    definition that are used to build objects, along with a sorted hash index for each table. Compiled once when a
+    database is downloaded, and read without decoding whole SQLite rows.
+
+    The file starts with a magic number, a version and the length of a JSON header describing each table. After the
+    header, each table has an index of fixed-size entries (hash, offset, length) sorted by hash, followed by the compact
+    JSON of each definition.
+
+    :param compact_path: The path to a compact manifest file made by compile
+    :type compact_path: string
+
+    :ivar compact_path: The path to the compact manifest file
+    :vartype compact_path: string
+    :ivar tables: Information about each table in the file, keyed by the unique part of the table name
+    :vartype tables: dict
+    """
+
+    magic = b"ODCM"
+    version = 1
+    index_entry = struct.Struct("<IQI")
+    header_length = struct.Struct("<4sII")
+    # The top-level fields of each definition that objects are built from - anything else is read from the database
+    compact_fields = {
+        "InventoryItem": ["hash", "displayProperties", "itemTypeDisplayName", "inventory", "screenshot", "loreHash", "stats"],
+        "InventoryBucket": ["hash", "displayProperties", "index"],
+        "Stat": ["hash", "displayProperties"],
+        "StatGroup": ["hash", "scaledStats"],
+        "SandboxPerk": ["hash", "displayProperties"],
+        "Lore": ["hash", "displayProperties", "subtitle"],
+        "Record": ["hash", "displayProperties", "loreHash", "rewardItems"],
+        "Objective": ["hash", "displayProperties", "progressDescription", "minimumVisibilityThreshold", "allowNegativeValue",
+                      "allowValueChangeWhenCompleted", "allowOvercompletion", "showValueOnComplete", "isCountingDownward"],
+        "Progression": ["hash", "displayProperties", "visible", "scope", "steps", "rewardItems"],
+        "Faction": ["hash", "displayProperties", "progressionHash"],
+        "Activity": ["hash", "displayProperties", "isPvP", "isPlaylist", "tier", "activityLightLevel", "pgcrImage", "rewards",
+                     "modifiers", "activityTypeHash"],
+        "ActivityType": ["hash", "displayProperties"],
+        "ActivityModifier": ["hash", "displayProperties"]
+    }
+
+    def __init__(self, compact_path):
+        self.compact_path = compact_path
+        with open(compact_path, "rb") as compact_file:
+            self.mapped_file = mmap.mmap(compact_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_size = self.header_length.unpack_from(self.mapped_file, 0)
+        if magic != self.magic or version != self.version:
+            raise ValueError(compact_path + " is not a compact manifest file")
+        header_start = self.header_length.size
+        self.tables = json.loads(self.mapped_file[header_start:header_start + header_size].decode("utf-8"))
+        self.body_start = header_start + header_size
+
+    @classmethod
+    def compile(cls, db_path, compact_path, compact_fields=None):
+
+        """
+        Compiles a compact manifest file from a database file. The file is written to a temporary path first, and only
+        replaces compact_path once it is complete.
+
+        :param db_path: The path to the database file
+        :type db_path: string
+        :param compact_path: The path to write the compact manifest file to
+        :type compact_path: string
+        :param compact_fields: The fields to keep for each table, keyed by the unique part of the table name - defaults to compact_fields
+        :type compact_fields: dict, optional
+        :return: The compact manifest
+        :rtype: ourdestiny.d2compactmanifest
+        """
+
+        if compact_fields is None:
+            compact_fields = cls.compact_fields
+        connection = sqlite3.connect(db_path)
+        tables = {}
+        table_blobs = []
+        try:
+            existing_tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for table, fields in compact_fields.items():
+                if "Destiny" + table + "Definition" not in existing_tables:
+                    continue
+                index_entries = []
+                data = bytearray()
+                for row_id, row_text in connection.execute("SELECT id, json FROM Destiny" + table + "Definition"):
+                    definition_json = json.loads(row_text)
+                    compact_json = {field: definition_json[field] for field in fields if field in definition_json}
+                    compact_text = json.dumps(compact_json, separators=(",", ":")).encode("utf-8")
+                    index_entries.append((row_id & 0xFFFFFFFF, len(data), len(compact_text)))
+                    data += compact_text
+                index_entries.sort()
+                index = b"".join(cls.index_entry.pack(*index_entry) for index_entry in index_entries)
+                tables[table] = {"fields": fields, "count": len(index_entries)}
+                table_blobs.append((table, index, bytes(data)))
+        finally:
+            connection.close()
+        # Offsets are counted from the end of the header, so they do not depend on the header's own length
+        offset = 0
+        for table, index, data in table_blobs:
+            tables[table]["index_offset"] = offset
+            tables[table]["data_offset"] = offset + len(index)
+            offset += len(index) + len(data)
+        header = json.dumps(tables).encode("utf-8")
+        with open(compact_path + ".tmp", "wb") as compact_file:
+            compact_file.write(cls.header_length.pack(cls.magic, cls.version, len(header)))
+            compact_file.write(header)
+            for table, index, data in table_blobs:
+                compact_file.write(index)
+                compact_file.write(data)
+        os.replace(compact_path + ".tmp", compact_path)
+        return cls(compact_path)
+
+    def get(self, table, hashnum):
+
+        """
+        Gets the compact form of a definition
+
+        :param table: The unique part of the table name, for example "InventoryItem"
+        :type table: string
+        :param hashnum: The unsigned hash of the definition
+        :type hashnum: integer
+        :return: The pre-extracted fields of the definition, or None if the table or hash is not in the file
+        :rtype: dict
+        """
+
+        try:
+            table_info = self.tables[table]
+        except KeyError:
+            return None
+        # Binary search through the sorted index
+        low = 0
+        high = table_info["count"] - 1
+        while low <= high:
+            middle = (low + high) // 2
+            entry_hash, data_offset, data_length = self.index_entry.unpack_from(
+                self.mapped_file, self.body_start + table_info["index_offset"] + middle * self.index_entry.size)
+            if entry_hash < hashnum:
+                low = middle + 1
+            elif entry_hash > hashnum:
+                high = middle - 1
+            else:
+                data_start = self.body_start + table_info["data_offset"] + data_offset
+                return json.loads(self.mapped_file[data_start:data_start + data_length])
+        return None
+
+    def get_fields(self, table):
+
+        """
+        Gets the fields that were pre-extracted for a table
+
+        :param table: The unique part of the table name, for example "InventoryItem"
+        :type table: string
+        :return: The names of the fields, or None if the table is not in the file
+        :rtype: list[string]
+        """
+
+        try:
+            return self.tables[table]["fields"]
+        except KeyError:
+            return None
+
+    def close(self):
+
+        """
+        Unmaps the file - should only be called once nothing is using the compact manifest any more
+        """
+
+        self.mapped_file.close()
+
+
+class d2compactdefinition(dict):
+
+    """
+    A definition read from a compact manifest. It behaves like the full JSON of the definition - fields that were not
+    pre-extracted are read from the full database row the first time one of them is asked for, and the full row is
+    also read before anything that goes through every field, such as iterating over it, len, keys, items, values,
+    comparing it, copying it or passing it to dict or json.dumps.
+
+    :param compact_json: The pre-extracted fields of the definition
+    :type compact_json: dict
+    :param fields: The names of the fields that were pre-extracted, whether or not this definition has them
+    :type fields: list[string]
+    :param full_json_loader: A function that returns the full JSON of the definition from the database
+    :type full_json_loader: function
+    """
+
+    def __init__(self, compact_json, fields, full_json_loader):
+        super().__init__(compact_json)
+        self.fields = fields
+        self.full_json_loader = full_json_loader
+
+    def load_full_json(self):
+        if self.full_json_loader is not None:
+            self.update(self.full_json_loader())
+            self.full_json_loader = None
+
+    def __missing__(self, key):
+        if key not in self.fields:
+            self.load_full_json()
+            if dict.__contains__(self, key):
+                return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if not dict.__contains__(self, key) and key not in self.fields:
+            self.load_full_json()
+        return dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        self.load_full_json()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self.load_full_json()
+        return dict.__len__(self)
+
+    def __eq__(self, other):
+        self.load_full_json()
+        if isinstance(other, d2compactdefinition):
+            other.load_full_json()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    # Defining __eq__ would otherwise remove the inherited hash, but dicts are unhashable anyway
+    __hash__ = None
+
+    def __repr__(self):
+        self.load_full_json()
+        return dict.__repr__(self)
+
+    def __reduce__(self):
+        # Pickles and copies as the full JSON, as the loader can not be pickled
+        self.load_full_json()
+        return dict, (dict(dict.items(self)),)
+
+    def keys(self):
+        self.load_full_json()
+        return dict.keys(self)
+
+    def values(self):
+        self.load_full_json()
+        return dict.values(self)
+
+    def items(self):
+        self.load_full_json()
+        return dict.items(self)
+
+    def copy(self):
+        self.load_full_json()
+        return dict(dict.items(self))
@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import threading
+import urllib.request
+
+
+class d2connectionpool:
+
+    """
+    A pool of connections to a single database file, giving each thread its own connection so that lookups can be made
+    from several threads at once. Connections are opened the first time a thread needs one, and reused by that thread
+    afterwards.
+
+    :param db_path: The path to the database file
+    :type db_path: string
+    :param read_only: When True, connections are opened read-only and marked immutable, which lets SQLite skip locking and change detection entirely - only safe because database files are never modified once downloaded, defaults to False
+    :type read_only: bool, optional
+    :param mmap_size: The number of bytes of the database file each connection may memory-map, so that reads come straight from the operating system's page cache, defaults to SQLite's own setting
+    :type mmap_size: integer, optional
+    :param page_cache_size: The size of each connection's page cache in kibibytes, defaults to SQLite's own setting
+    :type page_cache_size: integer, optional
+    :param cached_statements: The number of prepared statements each connection keeps for reuse, defaults to 256
+    :type cached_statements: integer, optional
+
+    :ivar db_path: The path to the database file
+    :vartype db_path: string
+    :ivar connections_opened: The number of connections this pool has opened
+    :vartype connections_opened: integer
+    :ivar connections_closed: The number of connections this pool has closed, either because their thread finished or because the pool was closed
+    :vartype connections_closed: integer
+    :ivar checkouts: The number of times a cursor has been handed out
+    :vartype checkouts: integer
+    """
+
+    def __init__(self, db_path, read_only=False, mmap_size=None, page_cache_size=None, cached_statements=256):
+        self.db_path = db_path
+        self.read_only = read_only
+        self.mmap_size = mmap_size
+        self.page_cache_size = page_cache_size
+        self.cached_statements = cached_statements
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.checkouts = 0
+        self.connections = {}
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def get_cursor(self):
+
+        """
+        Gets the cursor belonging to the current thread, opening a connection for it if it does not have one yet
+
+        :return: A cursor that may only be used by the current thread
+        :rtype: sqlite3.cursor
+        """
+
+        try:
+            cursor = self.local.cursor
+        except AttributeError:
+            cursor = self.open_connection().cursor()
+            self.local.cursor = cursor
+        with self.lock:
+            self.checkouts += 1
+        return cursor
+
+    def open_connection(self):
+        # Connections are never shared between threads, but are allowed to be closed by any thread
+        if self.read_only:
+            db_uri = "file:" + urllib.request.pathname2url(os.path.abspath(self.db_path)) + "?mode=ro&immutable=1"
+            connection = sqlite3.connect(db_uri, uri=True, check_same_thread=False, cached_statements=self.cached_statements)
+        else:
+            connection = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=self.cached_statements)
+        if self.mmap_size is not None:
+            connection.execute("PRAGMA mmap_size = " + str(int(self.mmap_size)))
+        if self.page_cache_size is not None:
+            # A negative cache size is read by SQLite as a number of kibibytes rather than a number of pages
+            connection.execute("PRAGMA cache_size = " + str(-int(self.page_cache_size)))
+        with self.lock:
+            self.close_finished_connections()
+            self.connections[threading.get_ident()] = (threading.current_thread(), connection)
+            self.connections_opened += 1
+        return connection
+
+    def close_finished_connections(self):
+        for thread_id, (thread, connection) in list(self.connections.items()):
+            if not thread.is_alive():
+                connection.close()
+                del self.connections[thread_id]
+                self.connections_closed += 1
+
+    def close_thread_connection(self):
+
+        """
+        Closes the connection belonging to the current thread, if it has one, along with those of any threads that have finished - used once the pool has been replaced by a pool for a newer version of the database, as no thread can be sure another has finished reading from its connection
+
+        :return: The number of connections still open
+        :rtype: integer
+        """
+
+        if threading.get_ident() in self.connections:
+            try:
+                del self.local.cursor
+            except AttributeError:
+                pass
+        with self.lock:
+            entry = self.connections.pop(threading.get_ident(), None)
+            if entry is not None:
+                entry[1].close()
+                self.connections_closed += 1
+            self.close_finished_connections()
+            return len(self.connections)
+
+    def close(self):
+
+        """
+        Closes every connection in the pool - should only be called once nothing is using the pool any more
+        """
+
+        with self.lock:
+            for thread, connection in self.connections.values():
+                connection.close()
+                self.connections_closed += 1
+            self.connections = {}
+            self.local = threading.local()
+
+    def get_stats(self):
+
+        """
+        Gets statistics about the connections in the pool
+
+        :return: A dict containing the database path, the number of open connections, and the numbers of connections opened and closed and cursors handed out
+        :rtype: dict
+        """
+
+        with self.lock:
+            return {
+                "db_path": self.db_path,
+                "open_connections": len(self.connections),
+                "connections_opened": self.connections_opened,
+                "connections_closed": self.connections_closed,
+                "checkouts": self.checkouts
+            }
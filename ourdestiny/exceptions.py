@@ -93,6 +93,23 @@ class ItemCannotBeInstanced(OurDestinyError):
         self.message = "Item " + item.name + " cannot be instanced."
 
 
+class DatabaseDownloadFailed(OurDestinyError):
+
+    """
+    Exception for when a database file could not be downloaded completely, or the downloaded file is corrupt
+
+    :ivar dbtype: The type of database that was being downloaded
+    :vartype dbtype: string
+    :ivar message: A description of what went wrong
+    :vartype message: string
+    """
+
+    def __init__(self, dbtype, message):
+        self.dbtype = dbtype
+        self.message = message
+        super().__init__(self.message)
+
+
 class StatesDoNotMatch(OurDestinyError):
 
     """
@@ -0,0 +1,162 @@
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+
+class d2executor(Executor):
+
+    """
+    A bounded pool of worker threads shared by everything a client runs concurrently, so that the number of threads
+    stays the same however many operations run at once. The threads are only started once work is submitted. Counts
+    how many tasks are waiting and running, so that the pool can be sized. Work submitted from one of the pool's own
+    threads is run straight away in that thread, so that tasks waiting on other tasks can never use up every worker.
+
+    :param max_workers: The number of worker threads, defaults to 8
+    :type max_workers: integer, optional
+
+    :ivar max_workers: The number of worker threads
+    :vartype max_workers: integer
+    """
+
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self.pool = None
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.peak_queued = 0
+        self.is_shut_down = False
+        self.lock = threading.Lock()
+        self.worker_state = threading.local()
+
+    def get_pool(self):
+        with self.lock:
+            if self.is_shut_down:
+                raise RuntimeError("cannot submit work after the executor has been shut down")
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ourdestiny")
+            return self.pool
+
+    def is_worker_thread(self):
+
+        """
+        Checks whether the current thread is one of the pool's worker threads
+
+        :return: True if it is
+        :rtype: bool
+        """
+
+        return getattr(self.worker_state, "is_worker", False)
+
+    def run_task(self, function, args, kwargs):
+        with self.lock:
+            self.queued -= 1
+            self.in_flight += 1
+        self.worker_state.is_worker = True
+        succeeded = False
+        try:
+            result = function(*args, **kwargs)
+            succeeded = True
+            return result
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                if succeeded:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+    def submit(self, function, *args, **kwargs):
+
+        """
+        Submits a function to be run by one of the worker threads - when called from a worker thread, the function is
+        run straight away instead
+
+        :param function: The function to run
+        :type function: function
+        :return: A future for the function's result
+        :rtype: concurrent.futures.Future
+        """
+
+        if self.is_worker_thread():
+            future = Future()
+            try:
+                future.set_result(function(*args, **kwargs))
+            except BaseException as error:
+                future.set_exception(error)
+            return future
+        pool = self.get_pool()
+        with self.lock:
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        try:
+            future = pool.submit(self.run_task, function, args, kwargs)
+        except RuntimeError:
+            with self.lock:
+                self.queued -= 1
+            raise
+        future.add_done_callback(self.count_cancelled)
+        return future
+
+    def count_cancelled(self, future):
+        # Cancelled tasks never reach run_task, so are taken off the queue here
+        if future.cancelled():
+            with self.lock:
+                self.queued -= 1
+
+    def run_all(self, function, *iterables):
+
+        """
+        Runs a function for each set of arguments at the same time, waiting for every call to finish
+
+        :param function: The function to run
+        :type function: function
+        :param iterables: The arguments for each call, in the same form as the built-in map
+        :return: The result of each call, in the same order as the arguments
+        :rtype: list
+
+        :raises Exception: The first error raised by a call, once every call has finished
+        """
+
+        futures = [self.submit(function, *args) for args in zip(*iterables)]
+        errors = [future.exception() for future in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+        return [future.result() for future in futures]
+
+    def get_stats(self):
+
+        """
+        Gets the current state of the pool
+
+        :return: A dict of the number of workers, the tasks waiting for a worker, the most that have ever been waiting at once, the tasks running, and the tasks that have completed and failed
+        :rtype: dict
+        """
+
+        with self.lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "peak_queued": self.peak_queued,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed
+            }
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+
+        """
+        Stops the worker threads - work already running is always finished, and no more work can be submitted afterwards
+
+        :param wait: When True, waits for the work already submitted to finish, defaults to True
+        :type wait: bool, optional
+        :param cancel_futures: When True, work that has not started yet is cancelled, defaults to False
+        :type cancel_futures: bool, optional
+        """
+
+        with self.lock:
+            self.is_shut_down = True
+            pool = self.pool
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=cancel_futures)
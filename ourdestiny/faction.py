@@ -14,6 +14,8 @@ class d2faction(ourdestiny.d2displayproperties):
     :param character_object: The d2character object which this object represents the relationship of.
     :type character_object: ourdestiny.d2character
 
+    :ivar hash: The hash of the faction
+    :vartype hash: integer
     :ivar name: The name of the faction - this might not always be what you associate the faction with (e.g Brother Vance's faction is "Followers of Osiris")
     :vartype name: string
     :ivar description: The description of the faction
@@ -42,9 +44,25 @@ class d2faction(ourdestiny.d2displayproperties):
     :vartype character_object: ourdestiny.d2character
     """
 
+    __slots__ = ("hash", "character_object", "level", "level_cap", "next_level_at", "current_progress", "daily_progress",
+                 "daily_limit", "weekly_progress", "weekly_limit", "progression")
+
     def __init__(self, faction_request_json, faction_data_json, character_object):
         super().__init__(faction_data_json["displayProperties"])
+        self.hash = faction_data_json["hash"]
         self.character_object = character_object
+        self.apply_faction_json(faction_request_json)
+        self.progression = ourdestiny.d2progression(self.character_object.profile_object.client_object.get_from_db(faction_data_json["progressionHash"], "Progression"), self.character_object.profile_object)
+
+    def apply_faction_json(self, faction_request_json):
+
+        """
+        Updates the character's standing with the faction from the API's data about it, such as when its profile is refreshed
+
+        :param faction_request_json: The JSON obtained from the API containing live data about the character's status with the faction
+        :type faction_request_json: dict
+        """
+
         self.level = faction_request_json["level"]
         self.level_cap = faction_request_json["levelCap"]
         self.next_level_at = faction_request_json["nextLevelAt"]
@@ -53,4 +71,3 @@ class d2faction(ourdestiny.d2displayproperties):
         self.daily_limit = faction_request_json["dailyLimit"]
         self.weekly_progress = faction_request_json["weeklyProgress"]
         self.weekly_limit = faction_request_json["weeklyLimit"]
-        self.progression = ourdestiny.d2progression(self.character_object.profile_object.client_object.get_from_db(faction_data_json["progressionHash"], "Progression"), self.character_object.profile_object)
\ No newline at end of file
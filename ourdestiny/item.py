@@ -1,11 +1,74 @@
+import copy
 import ourdestiny
 
 
+class d2itemdefinition(ourdestiny.d2displayproperties):
+
+    """
+    The parts of an item that come from its definition in the database, which are the same for every copy of the item -
+    one is shared by every item object with the same hash, so should not be modified
+
+    :param item_data_json: The JSON of the item obtained from the database
+    :type item_data_json: dict
+    :param client_object: The client object used to look up the item's lore and stats
+    :type client_object: ourdestiny.d2client
+
+    :ivar name: The name of the item
+    :vartype name: string
+    :ivar description: The description of the item
+    :vartype description: string
+    :ivar type: The type of the item (hand cannon, auto rifle, rocket launcher...)
+    :vartype type: string
+    :ivar tier: The tier of the item (Legendary, Rare, Common...)
+    :vartype tier: string
+    :ivar bucket_type_hash: The hash of the inventory bucket the item goes in when it is on a character, such as when it is pulled from the postmaster, or None if it has none
+    :vartype bucket_type_hash: integer
+    :ivar screenshot_url: The URL of the in-game screenshot of the item (if it has one)
+    :vartype screenshot_url: string
+    :ivar lore: The lore in the lore tab of the item (if it has one)
+    :vartype lore: ourdestiny.d2lore
+    :ivar stats: A list of dicts that contain the names and generic values of each of the stats for this item, or None if it has no stats
+    :vartype stats: list
+    """
+
+    def __init__(self, item_data_json, client_object):
+        super().__init__(item_data_json["displayProperties"])
+        self.type = item_data_json["itemTypeDisplayName"]
+        try:
+            self.tier = item_data_json["inventory"]["tierTypeName"]
+        except KeyError:
+            self.tier = None
+        try:
+            self.bucket_type_hash = item_data_json["inventory"]["bucketTypeHash"]
+        except KeyError:
+            self.bucket_type_hash = None
+        try:
+            self.screenshot_url = "https://www.bungie.net" + item_data_json["screenshot"]
+        except KeyError:
+            self.screenshot_url = None
+        try:
+            self.lore = client_object.get_shared_object(ourdestiny.d2lore, item_data_json["loreHash"], "Lore")
+        except KeyError:
+            self.lore = None
+        try:
+            self.stats = []
+            scaled_stats = client_object.get_from_db(item_data_json["stats"]["statGroupHash"], "StatGroup")["scaledStats"]
+            stat_jsons = client_object.get_many_from_db([stat_hash["statHash"] for stat_hash in scaled_stats], "Stat")
+            for stat_hash in scaled_stats:
+                self.stats.append({"name": stat_jsons[stat_hash["statHash"]]["displayProperties"]["name"], "value": item_data_json["stats"]["stats"][str(stat_hash["statHash"])]["value"]})
+        except KeyError:
+            self.stats = None
+
+
 class d2item(ourdestiny.d2displayproperties):
 
     """
     The object form of an in-game item. This can be anything that can be equipped or put in your inventory - guns, armour, sparrows, subclasses, even bounties and quests.
 
+    Only the state of this particular copy of the item is held on the object - its name, description, icons, type,
+    tier, screenshot and lore are read from a d2itemdefinition shared with every other item of the same hash. Setting
+    the name, description or icons changes them on this item alone, and the rest cannot be set.
+
     :param item_request_json: The JSON data of the item obtained from the API
     :type item_request_json: dict
     :param profile_object_in: The object was used to create this item
@@ -25,8 +88,8 @@ class d2item(ourdestiny.d2displayproperties):
     :vartype tier: string
     :ivar quantity: The quantity of the item (normally 1 but can be more in the case of currency items)
     :vartype quantity: integer
-    :ivar icon_url: The URL to the icon of the item (if it has one)
-    :vartype icon_url: string
+    :ivar icon: The URL to the icon of the item (if it has one)
+    :vartype icon: string
     :ivar screenshot_url: The URL of the in-game screenshot of the item normally used for backgrounds to items (if it has one)
     :vartype screenshot_url: string
     :ivar lore: The lore in the lore tab of the item (if it has one)
@@ -41,7 +104,7 @@ class d2item(ourdestiny.d2displayproperties):
     :vartype can_equip: bool
     :ivar is_instanced_item: A value that denotes whether the current item is in its instanced form - meaning it has unique stats and is capable of being equipped among other things
     :vartype is_instanced_item: bool
-    :ivar stats: A list of dicts that contain the names and values of each of the stats for this item - generic when not instanced, updates when instanced
+    :ivar stats: A list of dicts that contain the names and values of each of the stats for this item - generic (and shared with the definition) when not instanced, updates when instanced
     :vartype stats: list
     :ivar owner_object: The object of the character that owns this object
     :vartype owner_object: ourdestiny.d2character
@@ -51,82 +114,282 @@ class d2item(ourdestiny.d2displayproperties):
     :vartype item_hash: integer
     :ivar bucket_info: The information about what slot this item should fit in - taken directly from the API
     :vartype bucket_info: dict
+    :ivar definition: The definition data shared by every item with the same hash
+    :vartype definition: ourdestiny.d2itemdefinition
     """
 
+    name = ourdestiny.d2definitionattribute()
+    description = ourdestiny.d2definitionattribute()
+    icon = ourdestiny.d2definitionattribute()
+    icon_sequences = ourdestiny.d2definitionattribute()
+    high_res_icon = ourdestiny.d2definitionattribute()
+    type = ourdestiny.d2definitionattribute()
+    tier = ourdestiny.d2definitionattribute()
+    screenshot_url = ourdestiny.d2definitionattribute()
+    lore = ourdestiny.d2definitionattribute()
+
+    __slots__ = ("profile_object", "item_hash", "definition", "is_equipped", "can_equip", "is_instanced_item", "stats",
+                 "perks", "attack", "quantity", "owner_object", "bucket_info", "instance_id")
+
     def __init__(self, item_request_json, profile_object_in, character_object_in=None):
         self.profile_object = profile_object_in
         self.item_hash = item_request_json["itemHash"]
-        item_data_json = self.profile_object.client_object.get_from_db(self.item_hash, "InventoryItem")
-        super().__init__(item_data_json["displayProperties"])
+        client_object = self.profile_object.client_object
+        self.definition = client_object.get_shared_object(d2itemdefinition, self.item_hash, "InventoryItem", client_object)
         self.is_equipped = False
         self.can_equip = False
         self.is_instanced_item = False
-        self.stats = []
+        self.stats = self.definition.stats
         self.perks = []
         self.attack = None
+        try:
+            self.instance_id = item_request_json["itemInstanceId"]
+        except KeyError:
+            self.instance_id = None
+        self.apply_item_json(item_request_json, character_object_in)
+
+    def apply_item_json(self, item_request_json, character_object_in=None):
+
+        """
+        Updates the item's quantity, bucket and owner from the API's data about it, such as when its profile is refreshed - any instanced data is kept
+
+        :param item_request_json: The JSON data of the item obtained from the API
+        :type item_request_json: dict
+        :param character_object_in: The object of the character that owns this item if it has an owner
+        :type character_object_in: ourdestiny.d2character
+        """
+
         self.quantity = item_request_json["quantity"]
         self.owner_object = character_object_in
         try:
             self.bucket_info = self.profile_object.client_object.get_from_db(item_request_json["bucketHash"], "InventoryBucket")
         except KeyError:
             self.bucket_info = None
-        self.type = item_data_json["itemTypeDisplayName"]
-        try:
-            self.tier = item_data_json["inventory"]["tierTypeName"]
-        except KeyError:
-            self.tier = None
-        try:
-            self.screenshot_url = "https://www.bungie.net" + item_data_json["screenshot"]
-        except KeyError:
-            self.screenshot_url = None
+
+    def copy_stack(self, quantity):
+
+        """
+        Makes a new item object for part of a stack of this item, such as when only some of a stack is moved - the new object shares this item's definition, and has the same owner and bucket until it is moved
+
+        :param quantity: The number of items in the new stack
+        :type quantity: integer
+        :return: The new item object
+        :rtype: ourdestiny.d2item
+        """
+
+        stack = copy.copy(self)
+        stack.quantity = quantity
+        stack.perks = list(self.perks)
+        return stack
+
+    def become_instanced(self):
+
+        """
+        When called, allows an object to become instanced. This updates its can_equip, is_equipped, is_instanced, attack, stats and perk values.
+        """
+
+        if self.instance_id is not None:
+            self.apply_instance_data(self.profile_object.get_instanced_item(self.instance_id))
+        else:
+            raise ourdestiny.ItemCannotBeInstanced(self)
+
+    def apply_instance_data(self, item_instance_json):
+
+        """
+        Updates the item's can_equip, is_equipped, is_instanced, attack, stats and perk values from instanced data that has already been fetched, such as by the profile's instance_items method.
+
+        :param item_instance_json: Instanced data about the item, containing instance, stats and perks components - see https://bungie-net.github.io/multi/schema_Destiny-Responses-DestinyItemResponse.html
+        :type item_instance_json: dict
+        """
+
+        dbcursor = self.profile_object.client_object.get_world_db_cursor()
+        self.can_equip = item_instance_json["instance"]["data"]["canEquip"]
+        self.is_equipped = item_instance_json["instance"]["data"]["isEquipped"]
         try:
-            self.lore = ourdestiny.d2lore(self.profile_object.client_object.get_from_db(item_data_json["loreHash"], "Lore"))
+            self.attack = item_instance_json["instance"]["data"]["primaryStat"]["value"]
         except KeyError:
-            self.lore = None
+            self.attack = None
         try:
-            self.instance_id = item_request_json["itemInstanceId"]
+            self.stats = []
+            stat_hashes = item_instance_json["stats"]["data"]["stats"].keys()
+            stat_jsons = self.profile_object.client_object.get_many_from_db(stat_hashes, "Stat", cursor=dbcursor)
+            for stat_hash in stat_hashes:
+                # A stat whose definition could not be found is left out, rather than every stat
+                if int(stat_hash) in stat_jsons:
+                    self.stats.append({"name": stat_jsons[int(stat_hash)]["displayProperties"]["name"], "value": item_instance_json["stats"]["data"]["stats"][stat_hash]["value"]})
         except KeyError:
-            self.instance_id = None
+            self.stats = []
+        self.is_instanced_item = True
+        self.perks = []
         try:
-            for stat_hash in self.profile_object.client_object.get_from_db(item_data_json["stats"]["statGroupHash"], "StatGroup")["scaledStats"]:
-                self.stats.append({"name": self.profile_object.client_object.get_from_db(stat_hash["statHash"], "Stat")["displayProperties"]["name"], "value": item_data_json["stats"]["stats"][str(stat_hash["statHash"])]["value"]})
+            perk_jsons = self.profile_object.client_object.get_many_from_db([perk["perkHash"] for perk in item_instance_json["perks"]["data"]["perks"]], "SandboxPerk", cursor=dbcursor)
+            for perk in item_instance_json["perks"]["data"]["perks"]:
+                # A perk whose definition could not be found is left out, rather than every perk
+                perk_json = perk_jsons.get(perk["perkHash"])
+                if perk_json is None:
+                    continue
+                perk_dict = {"name": perk_json["displayProperties"]["name"], "description": perk_json["displayProperties"]["description"], "isActive": perk["isActive"], "isVisible": perk["visible"]}
+                if perk_json["displayProperties"]["hasIcon"]:
+                    perk_dict["icon"] = "https://www.bungie.net" + perk_json["displayProperties"]["icon"]
+                else:
+                    perk_dict["icon"] = ""
+                self.perks.append(perk_dict)
         except KeyError:
-            self.stats = None
+            pass
 
-    def become_instanced(self):
+
+class d2rewarditem:
+
+    """
+    An item given as a reward, such as by an activity. It is not held by any player, so only the item's hash and the
+    number given are held on the object - everything else is read from the d2itemdefinition shared with every other
+    item of the same hash, and cannot be set. Reward items are part of definitions shared by every player, so do not
+    belong to any profile.
+
+    :param reward_item_json: The JSON of the reward from the database, containing the item hash and quantity
+    :type reward_item_json: dict
+    :param client_object: The client object used to look up the item's definition
+    :type client_object: ourdestiny.d2client
+
+    :ivar name: The name of the item
+    :vartype name: string
+    :ivar description: The description of the item
+    :vartype description: string
+    :ivar icon: The URL to the icon of the item (if it has one)
+    :vartype icon: string
+    :ivar type: The type of the item (hand cannon, auto rifle, rocket launcher...)
+    :vartype type: string
+    :ivar tier: The tier of the item (Legendary, Rare, Common...)
+    :vartype tier: string
+    :ivar screenshot_url: The URL of the in-game screenshot of the item (if it has one)
+    :vartype screenshot_url: string
+    :ivar lore: The lore in the lore tab of the item (if it has one)
+    :vartype lore: ourdestiny.d2lore
+    :ivar stats: A list of dicts that contain the names and generic values of each of the stats for this item, or None if it has no stats
+    :vartype stats: list
+    :ivar item_hash: The hash value of this item for the database files
+    :vartype item_hash: integer
+    :ivar quantity: The number of the item given
+    :vartype quantity: integer
+    :ivar definition: The definition data shared by every item with the same hash
+    :vartype definition: ourdestiny.d2itemdefinition
+    """
+
+    name = ourdestiny.d2definitionattribute()
+    description = ourdestiny.d2definitionattribute()
+    icon = ourdestiny.d2definitionattribute()
+    icon_sequences = ourdestiny.d2definitionattribute()
+    high_res_icon = ourdestiny.d2definitionattribute()
+    type = ourdestiny.d2definitionattribute()
+    tier = ourdestiny.d2definitionattribute()
+    screenshot_url = ourdestiny.d2definitionattribute()
+    lore = ourdestiny.d2definitionattribute()
+    stats = ourdestiny.d2definitionattribute()
+
+    __slots__ = ("item_hash", "quantity", "definition")
+
+    def __init__(self, reward_item_json, client_object):
+        self.item_hash = reward_item_json["itemHash"]
+        self.quantity = reward_item_json.get("quantity", 1)
+        self.definition = client_object.get_shared_object(d2itemdefinition, self.item_hash, "InventoryItem", client_object)
+
+
+class d2itemindex:
+
+    """
+    An index over a collection of items, allowing items to be found by name, hash, instance ID, bucket or slot without
+    looking through every item. Kept up to date by the character and profile methods that move items around.
+
+    :param items: The items to index
+    :type items: Iterable[ourdestiny.d2item], optional
+    """
+
+    keys = ["name", "item_hash", "instance_id", "bucket_hash", "slot"]
+
+    def __init__(self, items=()):
+        self.items = {}
+        self.entries = {key: {} for key in self.keys}
+        for item in items:
+            self.add(item)
+
+    def get_item_keys(self, item):
+        item_keys = {
+            "name": [item.name],
+            "item_hash": [item.item_hash],
+            "instance_id": [item.instance_id] if item.instance_id is not None else [],
+            "bucket_hash": [],
+            "slot": []
+        }
+        if item.bucket_info is not None:
+            item_keys["bucket_hash"].append(item.bucket_info["hash"])
+            # Slots can be referred to by either the name or the index of the bucket
+            item_keys["slot"].append(item.bucket_info["displayProperties"]["name"])
+            item_keys["slot"].append(item.bucket_info["index"])
+        return item_keys
+
+    def add(self, item):
 
         """
-        When called, allows an object to become instanced. This updates its can_equip, is_equipped, is_instanced, attack, stats and perk values.
+        Adds an item to the index
+
+        :param item: The item to add
+        :type item: ourdestiny.d2item
         """
 
-        if self.instance_id is not None:
-            dbcursor = self.profile_object.client_object.get_world_db_cursor()
-            item_instance_json = self.profile_object.get_instanced_item(self.instance_id)
-            self.can_equip = item_instance_json["instance"]["data"]["canEquip"]
-            self.is_equipped = item_instance_json["instance"]["data"]["isEquipped"]
-            try:
-                self.attack = item_instance_json["instance"]["data"]["primaryStat"]["value"]
-            except KeyError:
-                self.attack = None
-            try:
-                self.stats = []
-                stat_hashes = item_instance_json["stats"]["data"]["stats"].keys()
-                for stat_hash in stat_hashes:
-                    self.stats.append({"name": self.profile_object.client_object.get_hash_with_cursor(stat_hash, dbcursor, "Stat")["displayProperties"]["name"], "value": item_instance_json["stats"]["data"]["stats"][stat_hash]["value"]})
-
-            except KeyError:
-                self.stats = []
-            self.is_instanced_item = True
-            try:
-                for perk in item_instance_json["perks"]["data"]["perks"]:
-                    perk_json = self.profile_object.client_object.get_hash_with_cursor(perk["perkHash"], dbcursor, "SandboxPerk")
-                    perk_dict = {"name": perk_json["displayProperties"]["name"], "description": perk_json["displayProperties"]["description"], "isActive": perk["isActive"], "isVisible": perk["visible"]}
-                    if perk_json["displayProperties"]["hasIcon"]:
-                        perk_dict["icon"] = "https://www.bungie.net" + perk_json["displayProperties"]["icon"]
-                    else:
-                        perk_dict["icon"] = ""
-                    self.perks.append(perk_dict)
-            except KeyError:
-                pass
-        else:
-            raise ourdestiny.ItemCannotBeInstanced(self)
+        self.items[id(item)] = item
+        for key, values in self.get_item_keys(item).items():
+            for value in values:
+                self.entries[key].setdefault(value, {})[id(item)] = item
+
+    def remove(self, item):
+
+        """
+        Removes an item from the index, if it is in it
+
+        :param item: The item to remove
+        :type item: ourdestiny.d2item
+        """
+
+        if self.items.pop(id(item), None) is None:
+            return
+        for key, values in self.get_item_keys(item).items():
+            for value in values:
+                matching_items = self.entries[key].get(value)
+                if matching_items is not None:
+                    matching_items.pop(id(item), None)
+                    if len(matching_items) == 0:
+                        del self.entries[key][value]
+
+    def find(self, name=None, item_hash=None, instance_id=None, bucket_hash=None, slot=None):
+
+        """
+        Finds every item in the index that matches all of the values given
+
+        :param name: The exact, case-sensitive name of the item
+        :type name: string, optional
+        :param item_hash: The hash of the item
+        :type item_hash: integer, optional
+        :param instance_id: The instance ID of the item
+        :type instance_id: string, optional
+        :param bucket_hash: The hash of the bucket the item belongs in
+        :type bucket_hash: integer, optional
+        :param slot: The name or index of the bucket the item belongs in
+        :type slot: string, integer, optional
+        :return: The matching items, in the order they were added - every item if no values are given
+        :rtype: List[ourdestiny.d2item]
+        """
+
+        queries = {"name": name, "item_hash": item_hash, "instance_id": instance_id, "bucket_hash": bucket_hash, "slot": slot}
+        candidate_sets = [self.entries[key].get(value, {}) for key, value in queries.items() if value is not None]
+        if len(candidate_sets) == 0:
+            return list(self.items.values())
+        # Starts from the smallest set of candidates, and checks the rest of the values against those
+        candidate_sets.sort(key=len)
+        return [item for item_id, item in candidate_sets[0].items()
+                if all(item_id in candidate_set for candidate_set in candidate_sets[1:])]
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return id(item) in self.items
@@ -4,7 +4,8 @@ import ourdestiny
 class d2lore(ourdestiny.d2displayproperties):
 
     """
-    A class used to contain information about lore in the game
+    A class used to contain information about lore in the game - it only holds data from the database, so one is shared
+    by every item and record with the same lore, and should not be modified
 
     :param lore_json: A JSON obtained from the database containing lore data
     :type lore_json: dict
@@ -1,5 +1,5 @@
+import threading
 import ourdestiny
-import requests
 
 class d2profile:
 
@@ -10,6 +10,10 @@ class d2profile:
     :type profile_json: dict
     :param client_object: The client object used to obtain this profile object
     :type client_object: ourdestiny.d2client
+    :param characters_json: The "Response" section of a GetProfile response with the character components, if they were requested separately from profile_json - any components that neither has and that are needed straight away are requested while the profile is built
+    :type characters_json: dict, optional
+    :param sections: The sections of the profile (seasons, profile_inventory and profile_records) and of its characters (see ourdestiny.d2character.section_components) to build straight away, defaults to every section - any others are built the first time one of their attributes is used
+    :type sections: list[string], optional
 
     :ivar client_object: A link to the client object being used for API authentication
     :vartype client_object: ourdestiny.d2client
@@ -33,48 +37,364 @@ class d2profile:
     :vartype profile_records: List[ourdestiny.d2record]
     :ivar record_score: The total triumph score associated with this profile
     :vartype record_score: integer
+    :ivar vault_index: An index of the items in vault, kept up to date by the methods that move items
+    :vartype vault_index: ourdestiny.d2itemindex
+    :ivar profile_inventory_index: An index of the items in profile_inventory, kept up to date by the methods that move items
+    :vartype profile_inventory_index: ourdestiny.d2itemindex
     """
-    def __init__(self, client_object, profile_json):
+
+    # The components requested when instancing items - GetProfile only returns item components for the items in the
+    # inventory components requested alongside them, so every inventory is requested too
+    item_components = [ourdestiny.ComponentType.ProfileInventories, ourdestiny.ComponentType.CharacterInventories,
+                       ourdestiny.ComponentType.CharacterEquipment, ourdestiny.ComponentType.ItemInstances,
+                       ourdestiny.ComponentType.ItemStats, ourdestiny.ComponentType.ItemPerks]
+    # Keys in GetProfile responses whose values are hashes, and the table each hash belongs to
+    prefetch_hash_keys = {
+        "itemHash": "InventoryItem",
+        "bucketHash": "InventoryBucket",
+        "recordHash": "Record",
+        "objectiveHash": "Objective",
+        "progressionHash": "Progression",
+        "factionHash": "Faction",
+        "activityHash": "Activity",
+        "currentActivityHash": "Activity",
+        "raceHash": "Race",
+        "genderHash": "Gender",
+        "classHash": "Class",
+        "currentSeasonHash": "Season"
+    }
+    # Keys in GetProfile responses whose values are lists of hashes
+    prefetch_hash_list_keys = {
+        "seasonHashes": "Season"
+    }
+    # Keys in GetProfile responses whose values are dicts keyed by hashes
+    prefetch_hash_dict_keys = {
+        "records": "Record",
+        "progressions": "Progression",
+        "factions": "Faction"
+    }
+    # Hashes inside definitions that are looked up while building objects, given as paths where "*" means every
+    # element of a list
+    prefetch_definition_dependencies = {
+        "InventoryItem": [("Lore", ("loreHash",)), ("StatGroup", ("stats", "statGroupHash"))],
+        "StatGroup": [("Stat", ("scaledStats", "*", "statHash"))],
+        "Record": [("Lore", ("loreHash",)), ("InventoryItem", ("rewardItems", "*", "itemHash"))],
+        "Activity": [("ActivityType", ("activityTypeHash",)),
+                     ("ActivityModifier", ("modifiers", "*", "activityModifierHash")),
+                     ("InventoryItem", ("rewards", "*", "rewardItems", "*", "itemHash"))],
+        "Progression": [("InventoryItem", ("rewardItems", "*", "itemHash"))],
+        "Faction": [("Progression", ("progressionHash",))],
+        "Season": [("SeasonPass", ("seasonPassHash",)), ("InventoryItem", ("artifactItemHash",))],
+        "SeasonPass": [("Progression", ("rewardProgressionHash",)), ("Progression", ("prestigeProgressionHash",))]
+    }
+
+    # The sections a profile is built in besides its characters, the components each is built from and the key of each
+    # in GetProfile responses
+    section_components = {
+        "seasons": [],
+        "profile_inventory": [ourdestiny.ComponentType.ProfileInventories],
+        "profile_records": [ourdestiny.ComponentType.Records]
+    }
+    section_response_keys = {
+        "seasons": "profile",
+        "profile_inventory": "profileInventory",
+        "profile_records": "profileRecords"
+    }
+    # The attributes set when each section is built
+    section_attributes = {
+        "seasons": ["current_season", "seasons"],
+        "profile_inventory": ["profile_inventory", "vault", "vault_index", "profile_inventory_index"],
+        "profile_records": ["profile_records", "record_score"]
+    }
+    attribute_sections = {attribute: section for section, attributes in section_attributes.items() for attribute in attributes}
+    # The sections of the profile and its characters that hold items, which items move between
+    item_sections = ["profile_inventory", "inventory", "equipment"]
+    # The attributes compared to find out how an object has changed when the profile is refreshed
+    refresh_attributes = {
+        "characters": ["light", "mobility", "resilience", "recovery", "discipline", "intellect", "strength"],
+        "progressions": ["level", "current_progress", "daily_progress", "weekly_progress", "step_index", "current_reset_count"],
+        "factions": ["level", "current_progress", "daily_progress", "weekly_progress"]
+    }
+
+    def __init__(self, client_object, profile_json, characters_json=None, sections=None):
         self.client_object = client_object
         self.display_name = profile_json["profile"]["data"]["userInfo"]["displayName"]
         self.membership_type = profile_json["profile"]["data"]["userInfo"]["membershipType"]
         self.membership_id = profile_json["profile"]["data"]["userInfo"]["membershipId"]
+        self.sections = self.get_sections(sections)
+        self.built_sections = set()
+        self.section_lock = threading.RLock()
+        # Every component available is kept, so that sections that were not asked for can still be built without a request
+        self.section_jsons = dict(profile_json)
+        if characters_json is not None:
+            self.section_jsons.update(characters_json)
+        if "characters" not in self.section_jsons:
+            missing_sections = [section for section in self.sections if self.get_section_response_key(section) not in self.section_jsons]
+            missing_json = self.client_object.get_component_json(self.membership_type, self.membership_id,
+                                                                 self.get_components(missing_sections, include_profile=False))["Response"]
+            for key, value in missing_json.items():
+                self.section_jsons.setdefault(key, value)
+        response_keys = ["profile", "characters"] + [self.get_section_response_key(section) for section in self.sections]
+        for key in response_keys:
+            # Components that are private come back missing, and are treated as empty rather than requested again
+            self.section_jsons.setdefault(key, {})
+        self.prefetched_keys = set(response_keys)
+        self.minted_timestamps = {}
+        self.prefetch_definitions({key: self.section_jsons[key] for key in response_keys})
+        self.characters = self.get_character_objects(self.section_jsons)
+        for section in self.section_components.keys():
+            if section in self.sections:
+                self.build_section(section)
+
+    def __getattr__(self, name):
+        # Only called for attributes that have not been set, which includes those of sections that have not been built
+        section = type(self).attribute_sections.get(name)
+        if section is None or "built_sections" not in self.__dict__ or section in self.built_sections:
+            raise AttributeError("'d2profile' object has no attribute '" + name + "'")
+        self.build_section(section)
+        return self.__dict__[name]
+
+    @classmethod
+    def get_sections(cls, sections=None):
+
+        """
+        Checks a list of sections, which can be sections of the profile or of its characters
+
+        :param sections: The sections to check, where None means every section
+        :type sections: list[string], optional
+        :return: The sections
+        :rtype: list[string]
+
+        :raises ValueError: Raised when a section does not exist
+        """
+
+        all_sections = list(cls.section_components.keys()) + list(ourdestiny.d2character.section_components.keys())
+        if sections is None:
+            return all_sections
+        for section in sections:
+            if section not in all_sections:
+                raise ValueError("Unknown section " + section + " - sections are " + ", ".join(all_sections))
+        return list(sections)
+
+    @classmethod
+    def get_components(cls, sections=None, include_profile=True):
+
+        """
+        Gets the components needed to build a profile with some sections
+
+        :param sections: The sections of the profile or its characters to build, where None means every section
+        :type sections: list[string], optional
+        :param include_profile: Whether to include the components needed to build the profile and its characters at all, defaults to True
+        :type include_profile: bool, optional
+        :return: The components
+        :rtype: list[ourdestiny.ComponentType]
+        """
+
+        components = [ourdestiny.ComponentType.Profiles] if include_profile else []
+        components.append(ourdestiny.ComponentType.Characters)
+        for section in cls.get_sections(sections):
+            for component in cls.section_components.get(section, ourdestiny.d2character.section_components.get(section, [])):
+                if component not in components:
+                    components.append(component)
+        return components
+
+    def get_section_response_key(self, section):
+        if section in self.section_response_keys:
+            return self.section_response_keys[section]
+        return ourdestiny.d2character.section_response_keys[section]
+
+    def get_section_json(self, section, prefetch=True):
+
+        """
+        Gets the GetProfile component a section is built from, requesting it if the profile does not have it yet. The definitions it refers to are loaded into the client's definition cache the first time it is used.
+
+        :param section: The section of the profile or its characters
+        :type section: string
+        :param prefetch: When False, the definitions the component refers to are not loaded, for callers that only need the component itself, defaults to True
+        :type prefetch: bool, optional
+        :return: The component, for every character in the case of character sections
+        :rtype: dict
+        """
+
+        with self.section_lock:
+            response_key = self.get_section_response_key(section)
+            if response_key not in self.section_jsons:
+                components = self.section_components.get(section, ourdestiny.d2character.section_components.get(section))
+                response_json = self.client_object.get_component_json(self.membership_type, self.membership_id, components)["Response"]
+                for key, value in response_json.items():
+                    self.section_jsons.setdefault(key, value)
+                # Components that are private come back missing, and are treated as empty rather than requested again
+                self.section_jsons.setdefault(response_key, {})
+            if prefetch and response_key not in self.prefetched_keys:
+                self.prefetch_definitions({response_key: self.section_jsons[response_key]})
+                self.prefetched_keys.add(response_key)
+            return self.section_jsons[response_key]
+
+    def get_character_section_json(self, character_id, section):
+
+        """
+        Gets one character's part of the GetProfile component a character section is built from - see get_section_json
+
+        :param character_id: The character ID of the character
+        :type character_id: string
+        :param section: The character section
+        :type section: string
+        :return: The character's part of the component
+        :rtype: dict, list
+        """
+
+        character_json = self.get_section_json(section).get("data", {}).get(character_id, {})
+        if section in ["inventory", "equipment"]:
+            # If we haven't got any items (likely in the case where we're looking at someone else's character), use an empty list
+            return character_json.get("items", [])
+        return character_json
+
+    def build_section(self, section):
+
+        """
+        Builds one section of the profile - called automatically for each section the profile was built with, and for any other section the first time one of its attributes is used
+
+        :param section: The section to build - one of the keys of section_components
+        :type section: string
+        """
+
+        with self.section_lock:
+            if section in self.built_sections:
+                return
+            section_json = self.get_section_json(section)
+            if section == "seasons":
+                self.build_seasons(section_json["data"])
+            elif section == "profile_inventory":
+                self.profile_inventory = []
+                self.vault = []
+                self.get_profile_inventories(section_json)
+                self.vault_index = ourdestiny.d2itemindex(self.vault)
+                self.profile_inventory_index = ourdestiny.d2itemindex(self.profile_inventory)
+            elif section == "profile_records":
+                self.profile_records = []
+                self.record_score = 0
+                if "data" in section_json:
+                    self.get_profile_records(section_json["data"])
+            else:
+                raise ValueError("Unknown profile section " + section)
+            self.built_sections.add(section)
+
+    def build_seasons(self, profile_data_json):
         world_cursor = self.client_object.get_world_db_cursor()
-        self.current_season = ourdestiny.d2season(self.client_object.get_hash_with_cursor(profile_json["profile"]["data"]["currentSeasonHash"], world_cursor, "Season"), self)
-        self.seasons = []
-        for season_hash in profile_json["profile"]["data"]["seasonHashes"]:
-            self.seasons.append(ourdestiny.d2season(self.client_object.get_hash_with_cursor(season_hash, world_cursor, "Season"), self))
-        characters_json = self.client_object.get_component_json(self.membership_type, self.membership_id, [ourdestiny.ComponentType.Characters, ourdestiny.ComponentType.CharacterInventories, ourdestiny.ComponentType.CharacterEquipment, ourdestiny.ComponentType.CharacterProgression, ourdestiny.ComponentType.CharacterActivities])["Response"]
-        self.characters = self.get_character_objects(characters_json, profile_json["characterRecords"])
-        self.profile_inventory = []
-        self.vault = []
-        self.get_profile_inventories(profile_json["profileInventory"])
-        self.profile_records = []
-        self.record_score = 0
-        self.get_profile_records(profile_json["profileRecords"]["data"])
-
-    def get_character_objects(self, characters_json, character_records_json):
+        self.current_season = ourdestiny.d2season(self.client_object.get_hash_with_cursor(profile_data_json["currentSeasonHash"], world_cursor, "Season"), self)
+        seasons = []
+        season_jsons = self.client_object.get_many_from_db(profile_data_json["seasonHashes"], "Season", cursor=world_cursor)
+        for season_hash in profile_data_json["seasonHashes"]:
+            seasons.append(ourdestiny.d2season(season_jsons[season_hash], self))
+        self.seasons = seasons
+
+    def prefetch_definitions(self, *response_jsons):
+
+        """
+        Scans the raw JSON of GetProfile responses for hashes, and loads every definition they refer to (as well as the
+        definitions those refer to, such as lore and stats) into the client's definition cache, one batch per table.
+        Called automatically before any objects are built, so that building a profile only has to look up each
+        distinct definition once.
+
+        :param response_jsons: The "Response" sections of GetProfile responses to scan
+        :type response_jsons: dict
+        :return: The number of definitions loaded
+        :rtype: integer
+        """
+
+        pending_hashes = {}
+        for response_json in response_jsons:
+            self.collect_definition_hashes(response_json, pending_hashes)
+        seen_hashes = {}
+        definition_count = 0
+        while len(pending_hashes) > 0:
+            next_hashes = {}
+            for table, hashes in pending_hashes.items():
+                seen_hashes.setdefault(table, set()).update(hashes)
+                definitions = self.client_object.get_many_from_db(hashes, table)
+                definition_count += len(definitions)
+                for definition_json in definitions.values():
+                    for dependency_table, path in self.prefetch_definition_dependencies.get(table, []):
+                        for hashnum in self.get_hashes_at_path(definition_json, path):
+                            if hashnum not in seen_hashes.get(dependency_table, ()):
+                                next_hashes.setdefault(dependency_table, set()).add(hashnum)
+            pending_hashes = next_hashes
+        return definition_count
+
+    def collect_definition_hashes(self, response_json, hashes):
+
+        """
+        Walks through the JSON of a GetProfile response and gathers every hash it can find, grouped by table
+
+        :param response_json: The JSON to walk through
+        :type response_json: dict
+        :param hashes: A dict of sets of hashes keyed by table, which found hashes are added to
+        :type hashes: dict
+        """
+
+        stack = [response_json]
+        while len(stack) > 0:
+            current_json = stack.pop()
+            if isinstance(current_json, list):
+                stack.extend(current_json)
+            elif isinstance(current_json, dict):
+                for key, value in current_json.items():
+                    if key in self.prefetch_hash_keys and isinstance(value, int):
+                        if value != 0:
+                            hashes.setdefault(self.prefetch_hash_keys[key], set()).add(value)
+                    elif key in self.prefetch_hash_list_keys and isinstance(value, list):
+                        hashes.setdefault(self.prefetch_hash_list_keys[key], set()).update(value)
+                    elif key in self.prefetch_hash_dict_keys and isinstance(value, dict):
+                        table_hashes = hashes.setdefault(self.prefetch_hash_dict_keys[key], set())
+                        for hash_key in value.keys():
+                            if hash_key.isnumeric():
+                                table_hashes.add(int(hash_key))
+                        stack.extend(value.values())
+                    else:
+                        stack.append(value)
+
+    def get_hashes_at_path(self, definition_json, path):
+
+        """
+        Gets the non-zero hashes found at a path inside a definition
+
+        :param definition_json: The definition to look through
+        :type definition_json: dict
+        :param path: The keys to follow, where "*" means every element of a list
+        :type path: tuple
+        :return: The hashes found
+        :rtype: list[integer]
+        """
+
+        current_values = [definition_json]
+        for key in path:
+            next_values = []
+            for value in current_values:
+                if key == "*" and isinstance(value, list):
+                    next_values.extend(value)
+                elif isinstance(value, dict) and key in value:
+                    next_values.append(value[key])
+            current_values = next_values
+        return [value for value in current_values if isinstance(value, int) and value != 0]
+
+    def get_character_objects(self, characters_json):
 
         char_info_json = characters_json["characters"]["data"]
-        try:
-            char_inv_json = characters_json["characterInventories"]["data"]
-        # If we haven't got any inventory items (likely in the case where we're looking at someone else's character), make an empty dummy dictionary
-        except KeyError:
-            char_inv_json = {}
-            for char_id in char_info_json.keys():
-                char_inv_json[char_id] = {"items": []}
-        char_equip_json = characters_json["characterEquipment"]["data"]
-        char_prog_json = characters_json["characterProgressions"]["data"]
-        char_act_json = characters_json["characterActivities"]["data"]
-        char_rec_json = character_records_json["data"]
         char_list = []
         for char_id in char_info_json.keys():
+            # Only the sections that were asked for are built now, and the rest are built when they are first used
+            section_jsons = {}
+            for section in ourdestiny.d2character.section_components.keys():
+                if section in self.sections:
+                    section_jsons[section] = self.get_character_section_json(char_id, section)
+                else:
+                    section_jsons[section] = None
             char_list.append(ourdestiny.d2character(self, char_info_json[char_id],
-                                                    char_inv_json[char_id]["items"],
-                                                    char_equip_json[char_id]["items"],
-                                                    char_prog_json[char_id],
-                                                    char_act_json[char_id],
-                                                    char_rec_json[char_id]))
+                                                    section_jsons["inventory"],
+                                                    section_jsons["equipment"],
+                                                    section_jsons["progressions"],
+                                                    section_jsons["activities"],
+                                                    section_jsons["character_records"]))
         return char_list
 
     def get_profile_inventories(self, profileinventory_json):
@@ -88,10 +408,350 @@ class d2profile:
         except KeyError:
             return
 
+    def get_built_sections(self):
+
+        """
+        Gets every section that has been built, whether by the profile or by any of its characters
+
+        :return: The sections
+        :rtype: list[string]
+        """
+
+        built_sections = set(self.built_sections)
+        for character in self.characters:
+            built_sections.update(character.built_sections)
+        return [section for section in self.get_sections() if section in built_sections]
+
+    def refresh(self, sections=None):
+
+        """
+        Fetches the latest data for some sections of the profile in a single request, and updates the objects that have already been built in place rather than building them again. Sections that have not been built yet are not compared - they are built from the new data when they are first used. If bungie.net has not minted new data since the profile last saw these sections, nothing is compared at all.
+
+        Items are matched by their instance IDs, so an item that has moved between characters or the vault is still the same object, and keeps any instanced data - items without instance IDs are matched by their hash and bucket. Records, progressions and factions are matched by their hashes, and characters by their character IDs. Objects whose data has not changed are left exactly as they are. Refreshing any section that holds items also refreshes every other built section that holds items, as items move between them.
+
+        :param sections: The sections of the profile or its characters to refresh, defaults to every section that has been built
+        :type sections: list[string], optional
+        :return: The changes found, in the order they were found
+        :rtype: list[ourdestiny.d2change]
+        """
+
+        with self.section_lock:
+            sections = self.get_sections(self.get_built_sections() if sections is None else sections)
+            if any(section in self.item_sections for section in sections):
+                # An item that moved is only matched to the object already built for it if both sections are refreshed
+                built_sections = self.get_built_sections()
+                sections += [section for section in self.item_sections if section in built_sections and section not in sections]
+            components = self.get_components(sections)
+            response_json = self.client_object.get_component_json(self.membership_type, self.membership_id, components)["Response"]
+            minted_key = ",".join(str(component) for component in sorted(int(component) for component in components))
+            minted_at = response_json.get("responseMintedTimestamp")
+            if minted_at is not None and self.minted_timestamps.get(minted_key) == minted_at:
+                return []
+            self.minted_timestamps[minted_key] = minted_at
+            old_section_jsons = {}
+            changed_jsons = {}
+            for key in ["profile", "characters"] + [self.get_section_response_key(section) for section in sections]:
+                old_section_jsons[key] = self.section_jsons.get(key, {})
+                new_json = response_json.get(key, {})
+                # Cached responses that have not changed are the same object, so most checks stop at the identity test
+                if new_json is not old_section_jsons[key] and new_json != old_section_jsons[key]:
+                    changed_jsons[key] = new_json
+                self.section_jsons[key] = new_json
+            if len(changed_jsons) == 0:
+                return []
+            self.prefetch_definitions(changed_jsons)
+            changes = []
+            if "characters" in changed_jsons:
+                changes.extend(self.refresh_characters())
+            changes.extend(self.refresh_items([section for section in sections if self.get_section_response_key(section) in changed_jsons]))
+            if "seasons" in sections and "seasons" in self.built_sections and "profile" in changed_jsons:
+                changes.extend(self.refresh_seasons(old_section_jsons["profile"]))
+            if "profile_records" in sections and "profile_records" in self.built_sections and "profileRecords" in changed_jsons:
+                old_records_json = old_section_jsons["profileRecords"].get("data", {}).get("records", {})
+                new_records_data = self.section_jsons["profileRecords"].get("data", {})
+                self.record_score = new_records_data.get("score", 0)
+                self.profile_records, record_changes = self.refresh_records("profile_records", None, self.profile_records,
+                                                                            old_records_json, new_records_data.get("records", {}))
+                changes.extend(record_changes)
+            for character in self.characters:
+                for section in ["progressions", "activities", "character_records"]:
+                    response_key = self.get_section_response_key(section)
+                    if section not in sections or section not in character.built_sections or response_key not in changed_jsons:
+                        continue
+                    old_json = old_section_jsons[response_key].get("data", {}).get(character.character_id, {})
+                    new_json = self.get_character_section_json(character.character_id, section)
+                    if old_json == new_json:
+                        continue
+                    if section == "progressions":
+                        changes.extend(self.refresh_progressions(character, old_json, new_json))
+                    elif section == "activities":
+                        changes.extend(self.refresh_activities(character, new_json))
+                    else:
+                        character.records, record_changes = self.refresh_records("character_records", character, character.records,
+                                                                                 old_json.get("records", {}), new_json.get("records", {}))
+                        changes.extend(record_changes)
+            return changes
+
+    def get_differences(self, previous_values, new_values):
+        return {key: (previous_values[key], new_values[key]) for key in new_values if previous_values[key] != new_values[key]}
+
+    def get_attribute_values(self, object_to_check, kind):
+        return {attribute: getattr(object_to_check, attribute) for attribute in self.refresh_attributes[kind]}
+
+    def get_item_values(self, item):
+        return {"quantity": item.quantity,
+                "bucket_hash": item.bucket_info["hash"] if item.bucket_info is not None else None,
+                "owner_object": item.owner_object,
+                "is_equipped": item.is_equipped}
+
+    def get_record_values(self, record):
+        return {"state": record.state.state_num,
+                "objective_progress": [objective.progress for objective in record.objectives]}
+
+    def refresh_characters(self):
+        changes = []
+        characters_by_id = {character.character_id: character for character in self.characters}
+        characters = []
+        for character_id, character_info_json in self.section_jsons["characters"].get("data", {}).items():
+            character = characters_by_id.pop(character_id, None)
+            if character is None:
+                # The new character's sections are built from the profile's components when they are first used
+                character = ourdestiny.d2character(self, character_info_json)
+                changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Added, "characters", character, character))
+            else:
+                previous_values = self.get_attribute_values(character, "characters")
+                character.apply_character_json(character_info_json)
+                differences = self.get_differences(previous_values, self.get_attribute_values(character, "characters"))
+                if len(differences) > 0:
+                    changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Changed, "characters", character, character, differences))
+            characters.append(character)
+        for character in characters_by_id.values():
+            changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Removed, "characters", character, character))
+        self.characters = characters
+        return changes
+
+    def refresh_items(self, sections):
+        # Each built item section being refreshed, as (section, character, current items, new item JSONs)
+        item_sections = []
+        if "profile_inventory" in sections and "profile_inventory" in self.built_sections:
+            item_sections.append(("profile_inventory", None, self.vault + self.profile_inventory,
+                                  self.section_jsons["profileInventory"].get("data", {}).get("items", [])))
+        for character in self.characters:
+            if "inventory" in sections and "inventory" in character.built_sections:
+                item_sections.append(("inventory", character, character.inventory + character.postmaster,
+                                      self.get_character_section_json(character.character_id, "inventory")))
+            if "equipment" in sections and "equipment" in character.built_sections:
+                item_sections.append(("equipment", character, character.equipped,
+                                      self.get_character_section_json(character.character_id, "equipment")))
+        # Instanced items can move between sections, so are matched across every section at once
+        instanced_items = {}
+        for section, character, items, item_jsons in item_sections:
+            for item in items:
+                if item.instance_id is not None:
+                    instanced_items[item.instance_id] = (section, character, item)
+        changes = []
+        new_item_lists = []
+        for section, character, items, item_jsons in item_sections:
+            uninstanced_items = {}
+            for item in items:
+                if item.instance_id is None:
+                    bucket_hash = item.bucket_info["hash"] if item.bucket_info is not None else None
+                    uninstanced_items.setdefault((item.item_hash, bucket_hash), []).append(item)
+            new_items = []
+            for item_json in item_jsons:
+                item = None
+                if "itemInstanceId" in item_json:
+                    item = instanced_items.pop(item_json["itemInstanceId"], (None, None, None))[2]
+                else:
+                    matching_items = uninstanced_items.get((item_json["itemHash"], item_json.get("bucketHash")))
+                    if matching_items:
+                        item = matching_items.pop(0)
+                if item is None:
+                    item = ourdestiny.d2item(item_json, self, character)
+                    changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Added, section, character, item))
+                else:
+                    previous_values = self.get_item_values(item)
+                    item.apply_item_json(item_json, character)
+                    if item.is_instanced_item:
+                        item.is_equipped = section == "equipment"
+                    differences = self.get_differences(previous_values, self.get_item_values(item))
+                    if len(differences) > 0:
+                        changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Changed, section, character, item, differences))
+                new_items.append(item)
+            for matching_items in uninstanced_items.values():
+                for item in matching_items:
+                    changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Removed, section, character, item))
+            new_item_lists.append((section, character, new_items))
+        for section, character, item in instanced_items.values():
+            changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Removed, section, character, item))
+        for section, character, new_items in new_item_lists:
+            if section == "profile_inventory":
+                self.vault = [item for item in new_items if item.bucket_info is not None and item.bucket_info["hash"] == 138197802]
+                self.profile_inventory = [item for item in new_items if item.bucket_info is None or item.bucket_info["hash"] != 138197802]
+                self.vault_index = ourdestiny.d2itemindex(self.vault)
+                self.profile_inventory_index = ourdestiny.d2itemindex(self.profile_inventory)
+            elif section == "inventory":
+                character.inventory = [item for item in new_items if item.bucket_info is None or item.bucket_info["hash"] != 215593132]
+                character.postmaster = [item for item in new_items if item.bucket_info is not None and item.bucket_info["hash"] == 215593132]
+                character.inventory_index = ourdestiny.d2itemindex(character.inventory)
+                character.postmaster_index = ourdestiny.d2itemindex(character.postmaster)
+            else:
+                character.equipped = new_items
+                character.equipped_index = ourdestiny.d2itemindex(character.equipped)
+        return changes
+
+    def refresh_records(self, section, character, records, old_records_json, new_records_json):
+        records_by_hash = {record.hash: record for record in records}
+        new_hashes = [record_hash for record_hash in new_records_json.keys() if int(record_hash) not in records_by_hash]
+        record_db_jsons = self.client_object.get_many_from_db(new_hashes, "Record")
+        changes = []
+        new_records = []
+        for record_hash, record_json in new_records_json.items():
+            record = records_by_hash.pop(int(record_hash), None)
+            if record is None:
+                record = ourdestiny.d2record(record_json, record_db_jsons[int(record_hash)], self)
+                changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Added, section, character, record))
+            elif old_records_json.get(record_hash) != record_json:
+                previous_values = self.get_record_values(record)
+                record.apply_record_json(record_json)
+                differences = self.get_differences(previous_values, self.get_record_values(record))
+                if len(differences) > 0:
+                    changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Changed, section, character, record, differences))
+            new_records.append(record)
+        for record in records_by_hash.values():
+            changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Removed, section, character, record))
+        return new_records, changes
+
+    def refresh_progressions(self, character, old_progression_json, new_progression_json):
+        changes = []
+        for kind, attribute in [("progressions", "progressions"), ("factions", "factions")]:
+            # The component is keyed by the hash as a string
+            objects_by_hash = {str(progress_object.hash): progress_object for progress_object in getattr(character, attribute)}
+            new_jsons = new_progression_json.get(kind, {})
+            new_hashes = [object_hash for object_hash in new_jsons.keys() if object_hash not in objects_by_hash]
+            db_jsons = self.client_object.get_many_from_db(new_hashes, "Progression" if kind == "progressions" else "Faction")
+            new_objects = []
+            for object_hash, live_json in new_jsons.items():
+                progress_object = objects_by_hash.pop(object_hash, None)
+                if progress_object is None:
+                    if kind == "progressions":
+                        progress_object = ourdestiny.d2progression(db_jsons[int(object_hash)], self, live_json)
+                    else:
+                        progress_object = ourdestiny.d2faction(live_json, db_jsons[int(object_hash)], character)
+                    changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Added, "progressions", character, progress_object))
+                elif old_progression_json.get(kind, {}).get(object_hash) != live_json:
+                    previous_values = self.get_attribute_values(progress_object, kind)
+                    if kind == "progressions":
+                        progress_object.apply_progression_json(live_json)
+                    else:
+                        progress_object.apply_faction_json(live_json)
+                    differences = self.get_differences(previous_values, self.get_attribute_values(progress_object, kind))
+                    if len(differences) > 0:
+                        changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Changed, "progressions", character, progress_object, differences))
+                new_objects.append(progress_object)
+            for progress_object in objects_by_hash.values():
+                changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Removed, "progressions", character, progress_object))
+            setattr(character, attribute, new_objects)
+        return changes
+
+    def refresh_activities(self, character, new_activities_json):
+        # Activities are shared between every character, so building them again only reuses the shared objects
+        previous_activity = character.current_activity
+        previous_activities = {activity.hash: activity for activity in character.available_activities}
+        character.build_activities(new_activities_json)
+        changes = []
+        if character.current_activity is not previous_activity:
+            changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Changed, "activities", character, character,
+                                               {"current_activity": (previous_activity, character.current_activity)}))
+        for activity in character.available_activities:
+            if previous_activities.pop(activity.hash, None) is None:
+                changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Added, "activities", character, activity))
+        for activity in previous_activities.values():
+            changes.append(ourdestiny.d2change(ourdestiny.ChangeType.Removed, "activities", character, activity))
+        return changes
+
+    def refresh_seasons(self, old_profile_json):
+        old_data = old_profile_json.get("data", {})
+        new_data = self.section_jsons["profile"].get("data", {})
+        if old_data.get("seasonHashes") == new_data.get("seasonHashes") and old_data.get("currentSeasonHash") == new_data.get("currentSeasonHash"):
+            return []
+        previous_season = self.current_season
+        self.build_seasons(new_data)
+        return [ourdestiny.d2change(ourdestiny.ChangeType.Changed, "seasons", None, self,
+                                    {"current_season": (previous_season, self.current_season)})]
+
     def get_profile_records(self, profile_triumph_json):
         self.record_score = profile_triumph_json["score"]
+        record_db_jsons = self.client_object.get_many_from_db(profile_triumph_json["records"].keys(), "Record")
         for record_hash in profile_triumph_json["records"].keys():
-            self.profile_records.append(ourdestiny.d2record(profile_triumph_json["records"][record_hash], self.client_object.get_from_db(record_hash, "Record"), self))
+            self.profile_records.append(ourdestiny.d2record(profile_triumph_json["records"][record_hash], record_db_jsons[int(record_hash)], self))
+
+    def get_record_store(self, include_characters=False):
+
+        """
+        Gets a columnar store of the profile's records, for filtering and totalling records without building record objects - see ourdestiny.d2recordstore. Requires numpy.
+
+        :param include_characters: When True, each character's records are included as well, defaults to False
+        :type include_characters: bool, optional
+        :return: The record store
+        :rtype: ourdestiny.d2recordstore
+        """
+
+        return ourdestiny.d2recordstore.from_profiles([self], include_characters)
+
+    def find_items(self, name=None, item_hash=None, instance_id=None, bucket_hash=None, slot=None):
+
+        """
+        Finds every item across every character, the vault and the profile inventory that matches all of the values given
+
+        :param name: The exact, case-sensitive name of the item
+        :type name: string, optional
+        :param item_hash: The hash of the item
+        :type item_hash: integer, optional
+        :param instance_id: The instance ID of the item
+        :type instance_id: string, optional
+        :param bucket_hash: The hash of the bucket the item belongs in
+        :type bucket_hash: integer, optional
+        :param slot: The name or index of the bucket the item belongs in
+        :type slot: string, integer, optional
+        :return: The matching items, with each character's items first, then vault items, then profile inventory items
+        :rtype: List[ourdestiny.d2item]
+        """
+
+        items = []
+        for character in self.characters:
+            items.extend(character.find_items(name, item_hash, instance_id, bucket_hash, slot))
+        for index in [self.vault_index, self.profile_inventory_index]:
+            items.extend(index.find(name, item_hash, instance_id, bucket_hash, slot))
+        return items
+
+    def get_items_by_name(self, item_name):
+
+        """
+        Gets every item with a name across every character, the vault and the profile inventory
+
+        :param item_name: The exact, case-sensitive name of the items you're looking for
+        :type item_name: string
+        :return: The matching items
+        :rtype: List[ourdestiny.d2item]
+        """
+
+        return self.find_items(name=item_name)
+
+    def get_item_by_instance_id(self, instance_id):
+
+        """
+        Gets an item from anywhere in the profile by its instance ID
+
+        :param instance_id: The instance ID of the item
+        :type instance_id: string
+        :return: The item, or None if no item has that instance ID
+        :rtype: ourdestiny.d2item
+        """
+
+        items = self.find_items(instance_id=instance_id)
+        if len(items) > 0:
+            return items[0]
 
     def get_instanced_item(self, instance_id):
 
@@ -107,8 +767,141 @@ class d2profile:
         params = {
             "components": "ItemInstances,ItemStats,ItemPerks"
         }
-        item_request = requests.get(
+        item_request = self.client_object.http_get(
             self.client_object.root_endpoint + "/Destiny2/" + str(self.membership_type) + "/Profile/" + self.membership_id +
             "/Item/" + instance_id,
             params=params, headers=self.client_object.request_header)
-        return item_request.json()["Response"]
\ No newline at end of file
+        return item_request.json()["Response"]
+
+    def instance_items(self, items):
+
+        """
+        Instances several items at once, using a single request for the instanced data of every item in the profile rather than a request per item. Any item the response has no data for is instanced individually instead, in the client's worker pool.
+
+        :param items: The items to instance
+        :type items: List[ourdestiny.d2item]
+        :return: The items passed in, now instanced
+        :rtype: List[ourdestiny.d2item]
+
+        :raises ItemCannotBeInstanced: Raised when an item is passed in that has no instance ID, and therefore cannot be instanced
+        """
+
+        for item in items:
+            if item.instance_id is None:
+                raise ourdestiny.ItemCannotBeInstanced(item)
+        if len(items) == 0:
+            return items
+        # Items are instanced to get their current state, such as after being equipped, so a cached response is never used
+        item_components_json = self.client_object.get_component_json(self.membership_type, self.membership_id,
+                                                                      self.item_components, use_cache=False)["Response"]["itemComponents"]
+        self.client_object.get_executor().run_all(ourdestiny.d2item.become_instanced, self.apply_item_components(items, item_components_json))
+        return items
+
+    def apply_item_components(self, items, item_components_json):
+
+        """
+        Instances items from the item components of a GetProfile response that has already been fetched
+
+        :param items: The items to instance
+        :type items: List[ourdestiny.d2item]
+        :param item_components_json: The "itemComponents" section of a GetProfile response with the item_components
+        :type item_components_json: dict
+        :return: The items the response has no data for, which have not been instanced
+        :rtype: List[ourdestiny.d2item]
+        """
+
+        instances_json = item_components_json.get("instances", {}).get("data", {})
+        stats_json = item_components_json.get("stats", {}).get("data", {})
+        perks_json = item_components_json.get("perks", {}).get("data", {})
+        items_missing = []
+        for item in items:
+            if item.instance_id in instances_json:
+                # Reshapes the profile's components into the same form as a GetItem response
+                item_instance_json = {"instance": {"data": instances_json[item.instance_id]}}
+                if item.instance_id in stats_json:
+                    item_instance_json["stats"] = {"data": stats_json[item.instance_id]}
+                if item.instance_id in perks_json:
+                    item_instance_json["perks"] = {"data": perks_json[item.instance_id]}
+                item.apply_instance_data(item_instance_json)
+            else:
+                items_missing.append(item)
+        return items_missing
+
+    def transfer_items(self, transfers):
+
+        """
+        Moves many items between the profile's characters and its vault at once. Each move is planned into TransferItem steps from where its item is when the move starts - a move between characters goes through the vault - and moves of different items are made at the same time in the client's worker pool, within the client's rate limits. Moves of the same item are made one after another, in the order given. Steps moving items into the vault are made before steps moving items out of it, so that room is freed up in characters' inventories first. The inventory and vault lists are kept up to date as each step succeeds, and a move that fails does not stop any others.
+
+        :param transfers: The moves to make, as ourdestiny.d2transfer objects or (item, destination) or (item, destination, number to transfer) tuples, where destination is a character or None for the vault
+        :type transfers: List[ourdestiny.d2transfer or tuple]
+        :return: A transfer for each move, in the same order, holding whether it succeeded
+        :rtype: List[ourdestiny.d2transfer]
+        """
+
+        transfers = [transfer if isinstance(transfer, ourdestiny.d2transfer) else ourdestiny.d2transfer(*transfer) for transfer in transfers]
+        item_queues = {}
+        for transfer in transfers:
+            item_queues.setdefault(id(transfer.item), []).append(transfer)
+        item_queues = list(item_queues.values())
+        executor = self.client_object.get_executor()
+        while True:
+            # Starts the next move of each item once its previous move has finished
+            running = []
+            for queue in item_queues:
+                while len(queue) > 0:
+                    if queue[0].status == ourdestiny.TransferStatus.Pending and queue[0].steps is None:
+                        queue[0].plan()
+                    if queue[0].status != ourdestiny.TransferStatus.Pending:
+                        queue.pop(0)
+                    else:
+                        running.append(queue[0])
+                        break
+            if len(running) == 0:
+                return transfers
+            for transfer_to_vault in (True, False):
+                batch = [transfer for transfer in running if transfer.get_next_step() is not None and transfer.get_next_step()[1] == transfer_to_vault]
+                futures = [executor.submit(transfer.send_step) for transfer in batch]
+                # Local lists are only changed from this thread, once each request has finished
+                for transfer, future in zip(batch, futures):
+                    try:
+                        transfer.apply_step(future.result())
+                    except Exception as error:
+                        transfer.fail(error)
+
+    def pull_all_from_postmaster(self, max_attempts=3):
+
+        """
+        Pulls every item out of the postmaster of every character at once. Pulls are made at the same time in the client's worker pool, within the client's rate limits, except that pulls of items going into the same bucket of the same character are made one after another - once there is no room left in a bucket, the rest of the items going into it are left in the postmaster without sending any more requests. Pulls that fail with a connection error or a transient error are retried with a growing delay. The postmaster and inventory lists are kept up to date as each pull succeeds, and a pull that fails does not stop any others.
+
+        :param max_attempts: The most requests to make for each pull, defaults to 3
+        :type max_attempts: integer, optional
+        :return: A pull for each item that was in a postmaster, holding whether it succeeded
+        :rtype: List[ourdestiny.d2postmasterpull]
+        """
+
+        pulls = []
+        bucket_queues = {}
+        for character in self.characters:
+            for item in list(character.postmaster):
+                pull = ourdestiny.d2postmasterpull(item, character)
+                pulls.append(pull)
+                bucket_hash = item.definition.bucket_type_hash
+                bucket_queues.setdefault((character.character_id, bucket_hash if bucket_hash is not None else id(item)), []).append(pull)
+        bucket_queues = list(bucket_queues.values())
+        executor = self.client_object.get_executor()
+        while True:
+            batch = []
+            for queue in bucket_queues:
+                while len(queue) > 0 and queue[0].status != ourdestiny.TransferStatus.Pending:
+                    queue.pop(0)
+                if len(queue) > 0:
+                    batch.append(queue)
+            if len(batch) == 0:
+                return pulls
+            futures = [executor.submit(queue[0].send) for queue in batch]
+            # Local lists are only changed from this thread, once each request has finished
+            for queue, future in zip(batch, futures):
+                queue[0].apply_result(future, max_attempts)
+                if queue[0].status == ourdestiny.TransferStatus.NoRoom:
+                    for pull in queue[1:]:
+                        pull.skip(queue[0].error)
@@ -12,6 +12,8 @@ class d2progression(ourdestiny.d2displayproperties):
     :param profile_object_in: The profile object that owns this progression
     :type profile_object_in: ourdestiny.d2profile
 
+    :ivar hash: The hash of the progression
+    :vartype hash: integer
     :ivar name: The name of the progression
     :vartype name: string
     :ivar description: The description of the progression
@@ -50,6 +52,7 @@ class d2progression(ourdestiny.d2displayproperties):
 
     def __init__(self, progression_db_json, profile_object_in, progression_live_json=None):
         super().__init__(progression_db_json["displayProperties"])
+        self.hash = progression_db_json["hash"]
         self.visible = progression_db_json["visible"]
         self.scope = ProgressionScope(progression_db_json["scope"])
         self.units = progression_db_json["displayProperties"]["displayUnitsName"]
@@ -60,24 +63,7 @@ class d2progression(ourdestiny.d2displayproperties):
         for reward_item in progression_db_json["rewardItems"]:
             self.reward_items.append(ProgressionRewardItem(reward_item, profile_object_in))
         if progression_live_json is not None:
-            self.daily_progress = progression_live_json["dailyProgress"]
-            self.daily_limit = progression_live_json["dailyLimit"]
-            self.weekly_progress = progression_live_json["weeklyProgress"]
-            self.weekly_limit = progression_live_json["weeklyLimit"]
-            self.current_progress = progression_live_json["currentProgress"]
-            self.level = progression_live_json["level"]
-            self.level_cap = progression_live_json["levelCap"]
-            self.step_index = progression_live_json["stepIndex"]
-            try:
-                self.current_step = self.steps[self.step_index]
-            except IndexError:
-                self.current_step = None
-            self.progress_to_next_level = progression_live_json["progressToNextLevel"]
-            self.next_level_at = progression_live_json["nextLevelAt"]
-            try:
-                self.current_reset_count = progression_live_json["currentResetCount"]
-            except KeyError:
-                self.current_reset_count = None
+            self.apply_progression_json(progression_live_json)
         else:
             self.daily_progress = None
             self.daily_limit = None
@@ -93,6 +79,34 @@ class d2progression(ourdestiny.d2displayproperties):
             self.current_reset_count = None
             self.season_resets = None
 
+    def apply_progression_json(self, progression_live_json):
+
+        """
+        Updates the progression's live values from the API's data about it, such as when its profile is refreshed
+
+        :param progression_live_json: The JSON obtained from the API containing live data about the progression
+        :type progression_live_json: dict
+        """
+
+        self.daily_progress = progression_live_json["dailyProgress"]
+        self.daily_limit = progression_live_json["dailyLimit"]
+        self.weekly_progress = progression_live_json["weeklyProgress"]
+        self.weekly_limit = progression_live_json["weeklyLimit"]
+        self.current_progress = progression_live_json["currentProgress"]
+        self.level = progression_live_json["level"]
+        self.level_cap = progression_live_json["levelCap"]
+        self.step_index = progression_live_json["stepIndex"]
+        try:
+            self.current_step = self.steps[self.step_index]
+        except IndexError:
+            self.current_step = None
+        self.progress_to_next_level = progression_live_json["progressToNextLevel"]
+        self.next_level_at = progression_live_json["nextLevelAt"]
+        try:
+            self.current_reset_count = progression_live_json["currentResetCount"]
+        except KeyError:
+            self.current_reset_count = None
+
 
 class d2progressionstep:
 
@@ -109,6 +123,8 @@ class d2progressionstep:
     :vartype progress_total: integer
     """
 
+    __slots__ = ("step_name", "display_effect_type", "progress_total")
+
     def __init__(self, step_json):
         self.step_name = step_json["stepName"]
         self.display_effect_type = ProgressionStepDisplayEffect(step_json["displayEffectType"])
@@ -131,6 +147,8 @@ class ProgressionRewardItem(ourdestiny.d2item):
     :type acquisition_behaviour: string
     """
 
+    __slots__ = ("rewarded_at_level", "acquisition_behaviour")
+
     def __init__(self, progression_item_json, profile_object_in):
         super().__init__(progression_item_json, profile_object_in)
         self.rewarded_at_level = progression_item_json["rewardedAtProgressionLevel"]
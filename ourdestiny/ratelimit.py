@@ -0,0 +1,301 @@
+import random
+import re
+import threading
+import time
+
+
+class d2tokenbucket:
+
+    """
+    A token bucket limiting how quickly requests of one endpoint class are made. Each request takes a token, and tokens
+    are refilled at a steady rate up to the bucket's capacity, so short bursts are allowed while the average rate is
+    held down. When bungie.net reports throttling, the bucket is paused and its rate is halved, and the rate then
+    recovers a little with each request that is not throttled.
+
+    :param rate: The number of requests allowed per second
+    :type rate: float
+    :param capacity: The largest burst of requests allowed at once
+    :type capacity: integer
+
+    :ivar rate: The number of requests currently allowed per second, which is lowered while bungie.net is throttling
+    :vartype rate: float
+    :ivar max_rate: The number of requests allowed per second when bungie.net is not throttling
+    :vartype max_rate: float
+    :ivar capacity: The largest burst of requests allowed at once
+    :vartype capacity: integer
+    """
+
+    # The rate is never lowered below this fraction of the maximum rate
+    min_rate_fraction = 0.1
+    # The fraction of the maximum rate regained after each request that is not throttled
+    recovery_fraction = 0.05
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.max_rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+
+        """
+        Takes a token from the bucket, going into debt if it is empty so that requests are queued in the order they
+        arrive
+
+        :return: The number of seconds the caller must wait before making its request
+        :rtype: float
+        """
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(delay, self.paused_until - now)
+
+    def pause(self, seconds):
+
+        """
+        Stops any more requests being made for a number of seconds, and lowers the bucket's rate
+
+        :param seconds: The number of seconds to pause for
+        :type seconds: float
+        """
+
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.rate = max(self.max_rate * self.min_rate_fraction, self.rate / 2)
+
+    def recover(self):
+
+        """
+        Raises the bucket's rate back towards its maximum after a request that was not throttled
+        """
+
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.recovery_fraction)
+
+
+class d2ratelimiter:
+
+    """
+    Keeps requests to bungie.net within its rate limits. Requests are sorted into endpoint classes, each with its own
+    token bucket, and responses are checked for throttling - when bungie.net asks for requests to slow down, the
+    endpoint class is paused for as long as it asks (or with an exponential backoff when it does not say), and the
+    request is retried. Failed GET requests are retried with a random delay, as they are safe to repeat. Used by the
+    client object for every request it makes.
+
+    :param endpoint_rates: The requests per second and burst size allowed for each endpoint class, as (rate, capacity) tuples keyed by class name - any classes not given use the defaults in endpoint_rates
+    :type endpoint_rates: dict, optional
+    :param max_retries: The number of times a throttled or failed request is retried before giving up, defaults to 3
+    :type max_retries: integer, optional
+    :param backoff_base: The delay in seconds before the first retry, which doubles with each retry after, defaults to 1
+    :type backoff_base: float, optional
+    :param backoff_max: The longest delay in seconds between retries, defaults to 30
+    :type backoff_max: float, optional
+
+    :ivar buckets: The token bucket for each endpoint class
+    :vartype buckets: dict[string, ourdestiny.d2tokenbucket]
+    :ivar stats: Counters for each endpoint class of the requests made, the requests that were throttled, the retries made and the total seconds spent waiting, both for tokens and before retries
+    :vartype stats: dict[string, dict]
+    """
+
+    # Requests per second and burst size for each endpoint class
+    endpoint_rates = {
+        "action": (8, 8),
+        "profile": (20, 25),
+        "oauth": (2, 4),
+        "default": (20, 25)
+    }
+    # Error codes bungie.net responds with when requests are being throttled - see https://bungie-net.github.io/multi/schema_Exceptions-PlatformErrorCodes.html
+    throttle_error_codes = {35, 36, 37, 38, 51, 52, 53, 54, 55, 1672}
+    # HTTP status codes that mean a request can be tried again
+    retry_status_codes = {429, 500, 502, 503, 504}
+    # The top-level fields of a response come after its "Response" section, so are found by searching from the end
+    error_code_pattern = re.compile(rb'"ErrorCode"\s*:\s*(\d+)')
+    throttle_seconds_pattern = re.compile(rb'"ThrottleSeconds"\s*:\s*(\d+)')
+    response_tail_size = 4096
+
+    def __init__(self, endpoint_rates=None, max_retries=3, backoff_base=1.0, backoff_max=30.0):
+        rates = dict(self.endpoint_rates)
+        if endpoint_rates is not None:
+            rates.update(endpoint_rates)
+        self.endpoint_rates = rates
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.buckets = {endpoint_class: d2tokenbucket(rate, capacity) for endpoint_class, (rate, capacity) in rates.items()}
+        self.stats = {endpoint_class: {"requests": 0, "throttled": 0, "retries": 0, "wait_seconds": 0.0} for endpoint_class in rates}
+        self.lock = threading.Lock()
+
+    def get_endpoint_class(self, method, url):
+
+        """
+        Gets the endpoint class a request belongs to
+
+        :param method: The HTTP method of the request
+        :type method: string
+        :param url: The URL of the request
+        :type url: string
+        :return: The name of the endpoint class, or None if requests to the URL are not limited, such as database downloads
+        :rtype: string
+        """
+
+        lowered_url = url.lower()
+        if "/platform/" not in lowered_url:
+            return None
+        if "/oauth/" in lowered_url:
+            return "oauth"
+        if method == "POST" and "/destiny2/actions/" in lowered_url:
+            return "action"
+        if "/profile/" in lowered_url:
+            return "profile"
+        return "default"
+
+    def reserve(self, endpoint_class):
+
+        """
+        Takes a token for a request, counting the request and the time it will wait
+
+        :param endpoint_class: The endpoint class of the request
+        :type endpoint_class: string
+        :return: The number of seconds to wait before making the request
+        :rtype: float
+        """
+
+        if endpoint_class is None:
+            return 0.0
+        delay = self.buckets[endpoint_class].reserve()
+        with self.lock:
+            self.stats[endpoint_class]["requests"] += 1
+            self.stats[endpoint_class]["wait_seconds"] += delay
+        return delay
+
+    def wait(self, endpoint_class):
+
+        """
+        Blocks until a request of an endpoint class is allowed to be made
+
+        :param endpoint_class: The endpoint class of the request
+        :type endpoint_class: string
+        """
+
+        delay = self.reserve(endpoint_class)
+        if delay > 0:
+            time.sleep(delay)
+
+    def get_retry_delay(self, attempt):
+
+        """
+        Gets a random delay before retrying a request, with an upper limit that doubles with each attempt, so that
+        requests failing at the same time do not all retry at the same time
+
+        :param attempt: The number of retries already made
+        :type attempt: integer
+        :return: The delay in seconds
+        :rtype: float
+        """
+
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get_throttle_info(self, response_body):
+
+        """
+        Finds the error code and throttle seconds of a raw response without decoding the whole response
+
+        :param response_body: The raw body of a response from bungie.net
+        :type response_body: bytes
+        :return: The error code and throttle seconds, either of which is None if not found
+        :rtype: tuple[integer, integer]
+        """
+
+        tail = response_body[-self.response_tail_size:]
+        error_codes = self.error_code_pattern.findall(tail)
+        throttle_seconds = self.throttle_seconds_pattern.findall(tail)
+        return (int(error_codes[-1]) if error_codes else None,
+                int(throttle_seconds[-1]) if throttle_seconds else None)
+
+    def record_response(self, endpoint_class, error_code, throttle_seconds, attempt):
+
+        """
+        Checks the error code and throttle seconds of a response, pausing the endpoint class if bungie.net has asked
+        for requests to slow down
+
+        :param endpoint_class: The endpoint class of the request
+        :type endpoint_class: string
+        :param error_code: The ErrorCode of the response, if any
+        :type error_code: integer
+        :param throttle_seconds: The ThrottleSeconds of the response, if any
+        :type throttle_seconds: integer
+        :param attempt: The number of retries already made for the request
+        :type attempt: integer
+        :return: The number of seconds to wait before retrying the request, or None if it should not be retried
+        :rtype: float
+        """
+
+        if endpoint_class is None:
+            return None
+        bucket = self.buckets[endpoint_class]
+        if error_code in self.throttle_error_codes:
+            delay = max(throttle_seconds or 0, self.get_retry_delay(attempt))
+            bucket.pause(delay)
+            with self.lock:
+                self.stats[endpoint_class]["throttled"] += 1
+                if attempt < self.max_retries:
+                    self.stats[endpoint_class]["retries"] += 1
+                    self.stats[endpoint_class]["wait_seconds"] += delay
+                    return delay
+            return None
+        if throttle_seconds:
+            # The request went through, but bungie.net has asked for a gap before the next one
+            bucket.pause(throttle_seconds)
+        else:
+            bucket.recover()
+        return None
+
+    def record_failure(self, endpoint_class, method, attempt, status_code=None):
+
+        """
+        Decides whether a request that failed, either with a connection error or a server error status, should be
+        retried - GET requests are, as they are safe to repeat, as are requests bungie.net turned away with a 429
+        status without acting on them
+
+        :param endpoint_class: The endpoint class of the request
+        :type endpoint_class: string
+        :param method: The HTTP method of the request
+        :type method: string
+        :param attempt: The number of retries already made for the request
+        :type attempt: integer
+        :param status_code: The HTTP status code of the response, or None if there was no response
+        :type status_code: integer, optional
+        :return: The number of seconds to wait before retrying the request, or None if it should not be retried
+        :rtype: float
+        """
+
+        if (method != "GET" and status_code != 429) or attempt >= self.max_retries:
+            return None
+        delay = self.get_retry_delay(attempt)
+        if endpoint_class is not None:
+            if status_code == 429:
+                self.buckets[endpoint_class].pause(delay)
+            with self.lock:
+                self.stats[endpoint_class]["retries"] += 1
+                self.stats[endpoint_class]["wait_seconds"] += delay
+        return delay
+
+    def get_stats(self):
+
+        """
+        Gets the counters for each endpoint class
+
+        :return: A dict of the requests made, requests throttled, retries made, total seconds spent waiting and current rate of each endpoint class
+        :rtype: dict
+        """
+
+        with self.lock:
+            return {endpoint_class: dict(class_stats, rate=self.buckets[endpoint_class].rate)
+                    for endpoint_class, class_stats in self.stats.items()}
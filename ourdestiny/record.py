@@ -1,10 +1,50 @@
 import ourdestiny
+from enum import IntFlag
+
+class d2recorddefinition(ourdestiny.d2displayproperties):
+
+    """
+    The parts of a record that come from its definition in the database, which are the same for every player - one is
+    shared by every record object with the same hash, so should not be modified
+
+    :param record_data_json: The JSON obtained from the database containing generic data
+    :type record_data_json: dict
+    :param client_object: The client object used to look up the record's lore
+    :type client_object: ourdestiny.d2client
+
+    :ivar name: The name of the record
+    :vartype name: string
+    :ivar description: The description of the record
+    :vartype description: string
+    :ivar icon: The URL of the icon for the record, if it has one
+    :vartype icon: string
+    :ivar hash: The hash of the record
+    :vartype hash: integer
+    :ivar reward_item_jsons: The JSON of each item rewarded when completing this triumph - each record builds its own reward items from these, as items belong to a profile
+    :vartype reward_item_jsons: list[dict]
+    :ivar lore: The lore of the record if it is a lore triumph
+    :vartype lore: ourdestiny.d2lore
+    """
+
+    def __init__(self, record_data_json, client_object):
+        super().__init__(record_data_json["displayProperties"])
+        self.hash = record_data_json["hash"]
+        self.reward_item_jsons = record_data_json.get("rewardItems", [])
+        try:
+            self.lore = client_object.get_shared_object(ourdestiny.d2lore, record_data_json["loreHash"], "Lore")
+        except KeyError:
+            self.lore = None
+
 
 class d2record(ourdestiny.d2displayproperties):
 
     """
     A class used to represent a record (or as they are normally known in game, Triumph).
 
+    Only the player's progress on the record and its reward items are held on the object - its name, description,
+    icons, hash and lore are read from a d2recorddefinition shared with every other record of the same hash. Setting the
+    name, description or icons changes them on this record alone, and the hash and lore cannot be set. The reward items are built for the record's own profile the first time they are used.
+
     :param record_request_json: The JSON obtained from the API containing live data, including completion states
     :type record_request_json: dict
     :param record_data_json: The JSON obtained from the database containing generic data
@@ -28,35 +68,52 @@ class d2record(ourdestiny.d2displayproperties):
     :vartype objectives: list[ourdestiny.d2recordobjective]
     :ivar lore: The lore of the record if it is a lore triumph
     :vartype lore: ourdestiny.d2lore
+    :ivar definition: The definition data shared by every record with the same hash
+    :vartype definition: ourdestiny.d2recorddefinition
     """
 
+    name = ourdestiny.d2definitionattribute()
+    description = ourdestiny.d2definitionattribute()
+    icon = ourdestiny.d2definitionattribute()
+    icon_sequences = ourdestiny.d2definitionattribute()
+    high_res_icon = ourdestiny.d2definitionattribute()
+    hash = ourdestiny.d2definitionattribute()
+    lore = ourdestiny.d2definitionattribute()
+
+    __slots__ = ("owner_object", "definition", "state", "objectives", "built_reward_items")
+
     def __init__(self, record_request_json, record_data_json, profile_object):
-        super().__init__(record_data_json["displayProperties"])
         self.owner_object = profile_object
-        self.hash = record_data_json["hash"]
+        self.definition = profile_object.client_object.get_shared_object(d2recorddefinition, record_data_json["hash"], "Record", profile_object.client_object, definition_json=record_data_json)
+        self.built_reward_items = None
+        self.apply_record_json(record_request_json)
+
+    @property
+    def reward_items(self):
+        if self.built_reward_items is None:
+            self.built_reward_items = [ourdestiny.d2item(reward_item_json, self.owner_object) for reward_item_json in self.definition.reward_item_jsons]
+        return self.built_reward_items
+
+    def apply_record_json(self, record_request_json):
+
+        """
+        Updates the record's state and objectives from the API's live data about it, such as when its profile is refreshed
+
+        :param record_request_json: The JSON obtained from the API containing live data, including completion states
+        :type record_request_json: dict
+        """
+
         self.state = d2recordstate(record_request_json["state"])
-        self.reward_items = []
-        try:
-            for item in record_data_json["rewardItems"]:
-                self.reward_items.append(ourdestiny.d2item(item, profile_object))
-        except KeyError:
-            pass
         # Records can have either individual or interval objectives, so look for both
-        self.objectives = []
-        try:
-            for objective_json in record_request_json["objectives"]:
-                self.objectives.append(d2recordobjective(objective_json, profile_object.client_object.get_from_db(objective_json["objectiveHash"], "Objective")))
-        except KeyError:
-            pass
-        try:
-            for objective_json in record_request_json["intervalObjectives"]:
-                self.objectives.append(d2recordobjective(objective_json, profile_object.client_object.get_from_db(objective_json["objectiveHash"], "Objective")))
-        except KeyError:
-            pass
-        try:
-            self.lore = ourdestiny.d2lore(profile_object.client_object.get_from_db(record_data_json["loreHash"], "Lore"))
-        except KeyError:
-            self.lore = None
+        objectives = []
+        objective_request_jsons = record_request_json.get("objectives", []) + record_request_json.get("intervalObjectives", [])
+        objective_data_jsons = self.owner_object.client_object.get_many_from_db([objective_json["objectiveHash"] for objective_json in objective_request_jsons], "Objective")
+        for objective_json in objective_request_jsons:
+            try:
+                objectives.append(d2recordobjective(objective_json, objective_data_jsons[objective_json["objectiveHash"]]))
+            except KeyError:
+                pass
+        self.objectives = objectives
 
 class d2recordobjective(ourdestiny.d2displayproperties):
 
@@ -98,6 +155,10 @@ class d2recordobjective(ourdestiny.d2displayproperties):
     :vartype is_counting_downward: bool
     """
 
+    __slots__ = ("progress_description", "hash", "progress", "completion_value", "complete", "visible",
+                 "minimum_visibility_threshold", "allow_negative_value", "allow_value_change_when_completed",
+                 "allow_overcompletion", "show_value_on_complete", "is_counting_downward")
+
     def __init__(self, objective_request_json, objective_data_json):
         super().__init__(objective_data_json["displayProperties"])
         self.progress_description = objective_data_json["progressDescription"]
@@ -122,6 +183,8 @@ class d2recordstate:
     :param state_num: The number obtained from the API which is used to determine states
     :type state_num: integer
 
+    :ivar state_num: The number obtained from the API, which each state is read from
+    :vartype state_num: integer
     :ivar none: Indicates the record is in a state where it *could* be redeemed, but it has not been yet.
     :vartype none: bool
     :ivar record_redeemed: Indicates the completed record has been redeemed.
@@ -140,12 +203,109 @@ class d2recordstate:
     :vartype can_equip_title: bool
     """
 
+    __slots__ = ("state_num",)
+
     def __init__(self, state_num):
-        self.none = bool(state_num == 0)
-        self.record_redeemed = bool(state_num & 1)
-        self.record_unavailable = bool(state_num & 2)
-        self.objective_not_completed = bool(state_num & 4)
-        self.obscured = bool(state_num & 8)
-        self.invisible = bool(state_num & 16)
-        self.entitlement_unowned = bool(state_num & 32)
-        self.can_equip_title = bool(state_num & 64)
+        self.state_num = state_num
+
+    def set_flag(self, flag, value):
+
+        """
+        Sets or clears one of the flags in the state number
+
+        :param flag: The flag to set or clear
+        :type flag: ourdestiny.RecordState
+        :param value: Whether the flag should be set
+        :type value: bool
+        """
+
+        if value:
+            self.state_num = int(self.state_num | flag)
+        else:
+            self.state_num = int(self.state_num & ~flag)
+
+    @property
+    def none(self):
+        return self.state_num == 0
+
+    @none.setter
+    def none(self, value):
+        # None is the absence of every flag rather than a flag of its own, so only setting it changes the state
+        if value:
+            self.state_num = 0
+
+    @property
+    def record_redeemed(self):
+        return bool(self.state_num & RecordState.RecordRedeemed)
+
+    @record_redeemed.setter
+    def record_redeemed(self, value):
+        self.set_flag(RecordState.RecordRedeemed, value)
+
+    @property
+    def record_unavailable(self):
+        return bool(self.state_num & RecordState.RewardUnavailable)
+
+    @record_unavailable.setter
+    def record_unavailable(self, value):
+        self.set_flag(RecordState.RewardUnavailable, value)
+
+    @property
+    def objective_not_completed(self):
+        return bool(self.state_num & RecordState.ObjectiveNotCompleted)
+
+    @objective_not_completed.setter
+    def objective_not_completed(self, value):
+        self.set_flag(RecordState.ObjectiveNotCompleted, value)
+
+    @property
+    def obscured(self):
+        return bool(self.state_num & RecordState.Obscured)
+
+    @obscured.setter
+    def obscured(self, value):
+        self.set_flag(RecordState.Obscured, value)
+
+    @property
+    def invisible(self):
+        return bool(self.state_num & RecordState.Invisible)
+
+    @invisible.setter
+    def invisible(self, value):
+        self.set_flag(RecordState.Invisible, value)
+
+    @property
+    def entitlement_unowned(self):
+        return bool(self.state_num & RecordState.EntitlementUnowned)
+
+    @entitlement_unowned.setter
+    def entitlement_unowned(self, value):
+        self.set_flag(RecordState.EntitlementUnowned, value)
+
+    @property
+    def can_equip_title(self):
+        return bool(self.state_num & RecordState.CanEquipTitle)
+
+    @can_equip_title.setter
+    def can_equip_title(self, value):
+        self.set_flag(RecordState.CanEquipTitle, value)
+
+
+class RecordState(IntFlag):
+
+    """An enumeration of the flags in a record's state. See https://bungie-net.github.io/multi/schema_Destiny-DestinyRecordState.html"""
+
+    #: The completed record has been redeemed.
+    RecordRedeemed = 1
+    #: There's a reward available from this record but it's unavailable for redemption.
+    RewardUnavailable = 2
+    #: The objective for this record has not yet been completed.
+    ObjectiveNotCompleted = 4
+    #: The game recommends that you replace the display text of this record with its obscured string.
+    Obscured = 8
+    #: The game recommends that you not show this record.
+    Invisible = 16
+    #: You can't complete this record because you lack some permission that's required to complete it.
+    EntitlementUnowned = 32
+    #: The record has a title and you can equip it.
+    CanEquipTitle = 64
@@ -0,0 +1,278 @@
+import ourdestiny
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class d2recordstore:
+
+    """
+    A columnar store of the records of one or more profiles, holding record hashes, states and objective progress in
+    numpy arrays rather than as d2record objects, so that records can be filtered and totalled without going through
+    each one in Python - for example, to rank a clan by completed triumphs. Built straight from the GetProfile
+    components, without looking up any definitions. Requires numpy, which can be installed with the "columnar" extra.
+
+    Each record belongs to an owner - the membership ID of the profile for profile records, or the character ID for
+    character records. Masks are numpy arrays of bools with one entry per record, which can be combined with & and |.
+
+    :param records_by_owner: Pairs of an owner and the records component data belonging to it, where the data maps record hashes to records - see https://bungie-net.github.io/multi/schema_Destiny-Components-Records-DestinyRecordComponent.html
+    :type records_by_owner: Iterable[tuple[string, dict]]
+
+    :ivar owners: Every owner, in the order they were given
+    :vartype owners: list[string]
+    :ivar record_owners: The index in owners of the owner of each record
+    :vartype record_owners: numpy.ndarray
+    :ivar record_hashes: The hash of each record
+    :vartype record_hashes: numpy.ndarray
+    :ivar record_states: The state of each record, made up of ourdestiny.RecordState flags
+    :vartype record_states: numpy.ndarray
+    :ivar objective_records: The index of the record each objective belongs to
+    :vartype objective_records: numpy.ndarray
+    :ivar objective_hashes: The hash of each objective
+    :vartype objective_hashes: numpy.ndarray
+    :ivar objective_progress: The current progress on each objective
+    :vartype objective_progress: numpy.ndarray
+    :ivar objective_completion_values: The value each objective's progress must reach for it to be complete
+    :vartype objective_completion_values: numpy.ndarray
+    :ivar objective_complete: Whether each objective is complete
+    :vartype objective_complete: numpy.ndarray
+    """
+
+    def __init__(self, records_by_owner):
+        if numpy is None:
+            raise ImportError("d2recordstore requires numpy - install it with pip install numpy")
+        self.owners = []
+        record_owners = []
+        record_hashes = []
+        record_states = []
+        objective_records = []
+        objective_hashes = []
+        objective_progress = []
+        objective_completion_values = []
+        objective_complete = []
+        for owner, records_json in records_by_owner:
+            owner_index = len(self.owners)
+            self.owners.append(owner)
+            for record_hash, record_json in records_json.items():
+                record_index = len(record_hashes)
+                record_owners.append(owner_index)
+                record_hashes.append(int(record_hash))
+                record_states.append(record_json["state"])
+                # Records can have either individual or interval objectives, so look for both
+                for objective_json in record_json.get("objectives", []) + record_json.get("intervalObjectives", []):
+                    objective_records.append(record_index)
+                    objective_hashes.append(objective_json["objectiveHash"])
+                    objective_progress.append(objective_json.get("progress", 0))
+                    objective_completion_values.append(objective_json["completionValue"])
+                    objective_complete.append(objective_json["complete"])
+        self.record_owners = numpy.array(record_owners, dtype=numpy.int32)
+        self.record_hashes = numpy.array(record_hashes, dtype=numpy.uint32)
+        self.record_states = numpy.array(record_states, dtype=numpy.int32)
+        self.objective_records = numpy.array(objective_records, dtype=numpy.int64)
+        self.objective_hashes = numpy.array(objective_hashes, dtype=numpy.uint32)
+        self.objective_progress = numpy.array(objective_progress, dtype=numpy.int64)
+        self.objective_completion_values = numpy.array(objective_completion_values, dtype=numpy.int64)
+        self.objective_complete = numpy.array(objective_complete, dtype=bool)
+
+    def __len__(self):
+        return len(self.record_hashes)
+
+    @classmethod
+    def from_profiles(cls, profiles, include_characters=False):
+
+        """
+        Builds a record store from the records of one or more profiles. Only the records components are used, so the
+        profiles do not need their record objects built - profiles built with sections=["profile_records"] (and
+        "character_records" if include_characters is True) already hold everything needed.
+
+        :param profiles: The profiles to include
+        :type profiles: Iterable[ourdestiny.d2profile]
+        :param include_characters: When True, each character's records are included as well, owned by the character ID, defaults to False
+        :type include_characters: bool, optional
+        :return: The record store
+        :rtype: ourdestiny.d2recordstore
+        """
+
+        records_by_owner = []
+        for profile in profiles:
+            profile_records_json = profile.get_section_json("profile_records", prefetch=False)
+            records_by_owner.append((profile.membership_id, profile_records_json.get("data", {}).get("records", {})))
+            if include_characters:
+                character_records_json = profile.get_section_json("character_records", prefetch=False)
+                for character_id, character_json in character_records_json.get("data", {}).items():
+                    records_by_owner.append((character_id, character_json.get("records", {})))
+        return cls(records_by_owner)
+
+    def get_state_mask(self, set_flags=0, clear_flags=0):
+
+        """
+        Finds the records whose state has all of one set of flags and none of another - for example, records that
+        are complete but not yet redeemed have neither RecordState.ObjectiveNotCompleted nor RecordState.RecordRedeemed
+
+        :param set_flags: The flags that must all be set, made up of ourdestiny.RecordState flags, defaults to none
+        :type set_flags: integer, optional
+        :param clear_flags: The flags that must all be clear, made up of ourdestiny.RecordState flags, defaults to none
+        :type clear_flags: integer, optional
+        :return: A mask of the matching records
+        :rtype: numpy.ndarray
+        """
+
+        set_flags = int(set_flags)
+        return ((self.record_states & set_flags) == set_flags) & ((self.record_states & int(clear_flags)) == 0)
+
+    def get_hash_mask(self, record_hashes):
+
+        """
+        Finds the records with any of a set of hashes, such as the records under one presentation node
+
+        :param record_hashes: The hashes of the records
+        :type record_hashes: Iterable[integer]
+        :return: A mask of the matching records
+        :rtype: numpy.ndarray
+        """
+
+        return numpy.isin(self.record_hashes, numpy.fromiter((int(record_hash) for record_hash in record_hashes), dtype=numpy.uint32))
+
+    def get_owner_mask(self, owners):
+
+        """
+        Finds the records belonging to any of a set of owners
+
+        :param owners: The membership or character IDs of the owners
+        :type owners: Iterable[string]
+        :return: A mask of the matching records
+        :rtype: numpy.ndarray
+        """
+
+        owners = set(owners)
+        owner_indexes = [index for index, owner in enumerate(self.owners) if owner in owners]
+        return numpy.isin(self.record_owners, owner_indexes)
+
+    def get_complete_mask(self):
+
+        """
+        Finds the records whose objectives have all been completed, whether or not they have been redeemed
+
+        :return: A mask of the matching records
+        :rtype: numpy.ndarray
+        """
+
+        return self.get_state_mask(clear_flags=ourdestiny.RecordState.ObjectiveNotCompleted)
+
+    def get_objective_totals(self, values=None):
+
+        """
+        Adds up a value over the objectives of each record
+
+        :param values: A value for each objective, defaults to objective_progress
+        :type values: numpy.ndarray, optional
+        :return: The total for each record, which is 0 for records without objectives
+        :rtype: numpy.ndarray
+        """
+
+        if values is None:
+            values = self.objective_progress
+        return numpy.bincount(self.objective_records, weights=values, minlength=len(self.record_hashes))
+
+    def get_completion_fractions(self):
+
+        """
+        Gets how far through its objectives each record is, counting each objective's progress up to its completion value
+
+        :return: A number from 0 to 1 for each record - records without objectives count as 1 if complete and 0 otherwise
+        :rtype: numpy.ndarray
+        """
+
+        capped_progress = numpy.clip(self.objective_progress, 0, self.objective_completion_values)
+        progress_totals = self.get_objective_totals(capped_progress)
+        completion_totals = self.get_objective_totals(self.objective_completion_values)
+        fractions = self.get_complete_mask().astype(numpy.float64)
+        has_objectives = completion_totals > 0
+        fractions[has_objectives] = progress_totals[has_objectives] / completion_totals[has_objectives]
+        return fractions
+
+    def count_by_owner(self, mask=None):
+
+        """
+        Counts the records of each owner
+
+        :param mask: A mask of the records to count, defaults to every record
+        :type mask: numpy.ndarray, optional
+        :return: The number of records of each owner, in the same order as owners
+        :rtype: numpy.ndarray
+        """
+
+        return self.sum_by_owner(None, mask).astype(numpy.int64)
+
+    def sum_by_owner(self, values, mask=None):
+
+        """
+        Adds up a value over the records of each owner
+
+        :param values: A value for each record, such as the result of get_objective_totals - None counts each record as 1
+        :type values: numpy.ndarray
+        :param mask: A mask of the records to include, defaults to every record
+        :type mask: numpy.ndarray, optional
+        :return: The total of each owner, in the same order as owners
+        :rtype: numpy.ndarray
+        """
+
+        record_owners = self.record_owners
+        if mask is not None:
+            record_owners = record_owners[mask]
+            if values is not None:
+                values = values[mask]
+        return numpy.bincount(record_owners, weights=values, minlength=len(self.owners))
+
+    def sum_by_group(self, groups, values=None, mask=None):
+
+        """
+        Adds up a value over groups of records, such as every record in each lore set
+
+        :param groups: The group of each record hash - records without a group are left out
+        :type groups: dict
+        :param values: A value for each record, such as the result of get_objective_totals - None counts each record as 1
+        :type values: numpy.ndarray, optional
+        :param mask: A mask of the records to include, defaults to every record
+        :type mask: numpy.ndarray, optional
+        :return: The total of each group
+        :rtype: dict
+        """
+
+        group_keys = list(dict.fromkeys(groups.values()))
+        group_indexes = {group: index for index, group in enumerate(group_keys)}
+        grouped_hashes = numpy.fromiter((int(record_hash) for record_hash in groups.keys()), dtype=numpy.uint32, count=len(groups))
+        hash_groups = numpy.fromiter((group_indexes[group] for group in groups.values()), dtype=numpy.int64, count=len(groups))
+        # Looks up the group of every record at once, by searching for each record's hash in the sorted grouped hashes
+        order = numpy.argsort(grouped_hashes)
+        grouped_hashes = grouped_hashes[order]
+        hash_groups = hash_groups[order]
+        positions = numpy.clip(numpy.searchsorted(grouped_hashes, self.record_hashes), 0, max(len(grouped_hashes) - 1, 0))
+        included = grouped_hashes[positions] == self.record_hashes if len(grouped_hashes) else numpy.zeros(len(self.record_hashes), dtype=bool)
+        if mask is not None:
+            included &= mask
+        record_groups = hash_groups[positions[included]]
+        if values is not None:
+            values = values[included]
+        totals = numpy.bincount(record_groups, weights=values, minlength=len(group_keys))
+        return {group: totals[index].item() for index, group in enumerate(group_keys)}
+
+    def get_leaderboard(self, mask=None, values=None):
+
+        """
+        Ranks the owners by the number of records (or the total of a value over records) they have - for example,
+        store.get_leaderboard(store.get_complete_mask()) ranks owners by completed records
+
+        :param mask: A mask of the records to include, defaults to every record
+        :type mask: numpy.ndarray, optional
+        :param values: A value for each record to add up, defaults to counting the records
+        :type values: numpy.ndarray, optional
+        :return: Pairs of owner and total, highest total first
+        :rtype: list[tuple[string, float]]
+        """
+
+        totals = self.sum_by_owner(values, mask)
+        order = numpy.argsort(-totals, kind="stable")
+        return [(self.owners[index], totals[index].item()) for index in order]
@@ -0,0 +1,392 @@
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class d2memorycachebackend:
+
+    """
+    Stores cached responses in memory, evicting the least recently used responses once it is full
+
+    :param max_entries: The maximum number of responses to hold - None means unbounded, defaults to 1000
+    :type max_entries: integer, optional
+    """
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            try:
+                entry = self.entries[key]
+            except KeyError:
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            if self.max_entries is not None:
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def delete_group(self, group):
+        prefix = group + "/"
+        with self.lock:
+            for key in [key for key in self.entries.keys() if key.startswith(prefix) and "/" not in key[len(prefix):]]:
+                del self.entries[key]
+
+    def keys(self):
+        with self.lock:
+            return list(self.entries.keys())
+
+    def clear(self):
+        with self.lock:
+            self.entries = OrderedDict()
+
+
+class d2diskcachebackend:
+
+    """
+    Stores cached responses as JSON files in a directory, so that they are kept between runs and can be shared by
+    several processes. Each file is written to a temporary path first and then moved into place, so a file is never
+    read half-written. Keys are grouped by everything before their last "/" - for response cache keys, the profile -
+    and each group is kept in its own subdirectory, so that a group can be removed without reading any files.
+
+    :param directory: The directory to store responses in, defaults to ./cache
+    :type directory: string, optional
+    """
+
+    def __init__(self, directory="./cache"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def get_group_directory(self, group):
+        return os.path.join(self.directory, hashlib.sha1(group.encode("utf-8")).hexdigest())
+
+    def get_path(self, key):
+        group = key.rpartition("/")[0]
+        return os.path.join(self.get_group_directory(group), hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get_group_paths(self):
+        paths = []
+        for group_name in os.listdir(self.directory):
+            group_directory = os.path.join(self.directory, group_name)
+            if os.path.isdir(group_directory):
+                try:
+                    file_names = os.listdir(group_directory)
+                except OSError:
+                    continue
+                paths.extend(os.path.join(group_directory, file_name) for file_name in file_names if file_name.endswith(".json"))
+        return paths
+
+    def get(self, key):
+        try:
+            with open(self.get_path(key)) as cache_file:
+                entry = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        # Different keys could in theory share a file name, so the key is stored in the file and checked
+        if entry.get("key") != key:
+            return None
+        return entry
+
+    def put(self, key, entry):
+        path = self.get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = path + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+        with open(temporary_path, "w") as cache_file:
+            json.dump(dict(entry, key=key), cache_file)
+        os.replace(temporary_path, path)
+
+    def delete(self, key):
+        try:
+            os.remove(self.get_path(key))
+        except OSError:
+            pass
+
+    def delete_group(self, group):
+        group_directory = self.get_group_directory(group)
+        try:
+            file_names = os.listdir(group_directory)
+        except OSError:
+            return
+        for file_name in file_names:
+            if file_name.endswith(".json"):
+                try:
+                    os.remove(os.path.join(group_directory, file_name))
+                except OSError:
+                    pass
+
+    def keys(self):
+        keys = []
+        for path in self.get_group_paths():
+            try:
+                with open(path) as cache_file:
+                    keys.append(json.load(cache_file)["key"])
+            except (OSError, ValueError, KeyError):
+                pass
+        return keys
+
+    def clear(self):
+        # Also removes files stored directly in the directory by earlier versions, which kept every key there
+        legacy_paths = [os.path.join(self.directory, file_name) for file_name in os.listdir(self.directory) if file_name.endswith(".json")]
+        for path in self.get_group_paths() + legacy_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class d2responsecache:
+
+    """
+    A cache of GetProfile responses, keyed by membership and the set of components requested. Each component has its
+    own time to live, and a response is fresh for as long as the shortest time to live of its components. Once a
+    response is stale, it is kept so that the next request can be made conditional on it having changed, and a newer
+    response is only stored if its responseMintedTimestamp is newer than the cached one, so a response served late by
+    one of bungie.net's caches never replaces newer data.
+
+    :param backend: Where responses are stored, either a d2memorycachebackend or a d2diskcachebackend, defaults to a d2memorycachebackend
+    :type backend: ourdestiny.d2memorycachebackend, optional
+    :param component_ttls: The number of seconds a response containing each component is fresh for, keyed by ourdestiny.ComponentType - any components not given use the defaults in component_ttls
+    :type component_ttls: dict, optional
+    :param default_ttl: The number of seconds a response is fresh for when one of its components has no time to live of its own, defaults to 30
+    :type default_ttl: float, optional
+
+    :ivar hits: The number of requests served from the cache without contacting bungie.net
+    :vartype hits: integer
+    :ivar revalidations: The number of requests where bungie.net confirmed a stale response had not changed
+    :vartype revalidations: integer
+    :ivar misses: The number of requests that needed a new response
+    :vartype misses: integer
+    """
+
+    # Seconds each component is fresh for, keyed by component number - see https://bungie-net.github.io/multi/schema_Destiny-DestinyComponentType.html
+    component_ttls = {
+        100: 300,  # Profiles
+        102: 30,  # ProfileInventories
+        103: 30,  # ProfileCurrencies
+        104: 60,  # ProfileProgression
+        200: 30,  # Characters
+        201: 30,  # CharacterInventories
+        202: 60,  # CharacterProgression
+        203: 300,  # CharacterRenderData
+        204: 30,  # CharacterActivities
+        205: 30,  # CharacterEquipment
+        300: 30,  # ItemInstances
+        301: 60,  # ItemObjectives
+        302: 30,  # ItemPerks
+        304: 30,  # ItemStats
+        305: 60,  # ItemSockets
+        700: 600,  # PresentationNodes
+        800: 600,  # Collectibles
+        900: 300,  # Records
+        1000: 10,  # Transitory
+        1100: 300  # Metrics
+    }
+
+    def __init__(self, backend=None, component_ttls=None, default_ttl=30):
+        self.backend = backend if backend is not None else d2memorycachebackend()
+        ttls = dict(self.component_ttls)
+        if component_ttls is not None:
+            ttls.update({int(component): ttl for component, ttl in component_ttls.items()})
+        self.component_ttls = ttls
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get_key(self, membership_type, membership_id, list_of_enums):
+
+        """
+        Gets the key a response is cached under - the order components are asked for in does not matter
+
+        :param membership_type: The membership type of the profile
+        :type membership_type: string, integer
+        :param membership_id: The membership ID of the profile
+        :type membership_id: string
+        :param list_of_enums: The components requested
+        :type list_of_enums: list[ourdestiny.ComponentType]
+        :return: The key
+        :rtype: string
+        """
+
+        components = ",".join(str(component) for component in sorted({int(enum) for enum in list_of_enums}))
+        return str(membership_type) + "/" + str(membership_id) + "/" + components
+
+    def get_ttl(self, list_of_enums):
+        return min((self.component_ttls.get(int(enum), self.default_ttl) for enum in list_of_enums), default=self.default_ttl)
+
+    def get_entry(self, key):
+
+        """
+        Gets the cached entry for a key, whether or not it is still fresh
+
+        :param key: The key, from get_key
+        :type key: string
+        :return: A dict containing the response JSON, the time it was stored, when it expires and any validators for conditional requests, or None if nothing is cached
+        :rtype: dict
+        """
+
+        return self.backend.get(key)
+
+    def get_fresh(self, key):
+
+        """
+        Gets a cached response if it is still fresh, counting a hit if it is
+
+        :param key: The key, from get_key
+        :type key: string
+        :return: The response JSON, or None if nothing fresh is cached
+        :rtype: dict
+        """
+
+        entry = self.backend.get(key)
+        if entry is not None and time.time() < entry["expires_at"]:
+            with self.lock:
+                self.hits += 1
+            return entry["response_json"]
+        return None
+
+    def get_conditional_headers(self, entry):
+
+        """
+        Gets the headers that make a request conditional on the response having changed since a cached entry
+
+        :param entry: The cached entry, from get_entry
+        :type entry: dict
+        :return: The headers, which are empty when the entry has no validators
+        :rtype: dict
+        """
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag") is not None:
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified") is not None:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def revalidate(self, key, entry, list_of_enums):
+
+        """
+        Marks a stale entry as fresh again, after bungie.net has confirmed it has not changed
+
+        :param key: The key, from get_key
+        :type key: string
+        :param entry: The cached entry, from get_entry
+        :type entry: dict
+        :param list_of_enums: The components requested
+        :type list_of_enums: list[ourdestiny.ComponentType]
+        :return: The cached response JSON
+        :rtype: dict
+        """
+
+        entry = dict(entry, stored_at=time.time(), expires_at=time.time() + self.get_ttl(list_of_enums))
+        self.backend.put(key, entry)
+        with self.lock:
+            self.revalidations += 1
+        return entry["response_json"]
+
+    def store(self, key, response_json, list_of_enums, etag=None, last_modified=None, entry=None):
+
+        """
+        Stores a new response, unless the cached entry was minted later than it
+
+        :param key: The key, from get_key
+        :type key: string
+        :param response_json: The whole response JSON
+        :type response_json: dict
+        :param list_of_enums: The components requested
+        :type list_of_enums: list[ourdestiny.ComponentType]
+        :param etag: The ETag header of the response, if any
+        :type etag: string, optional
+        :param last_modified: The Last-Modified header of the response, if any
+        :type last_modified: string, optional
+        :param entry: The entry that was cached before the request, from get_entry
+        :type entry: dict, optional
+        :return: The response JSON that should be used - the cached one if it is at least as new as the new one, otherwise the new one
+        :rtype: dict
+        """
+
+        if response_json.get("ErrorStatus", "Success") != "Success":
+            return response_json
+        try:
+            minted_at = response_json["Response"]["responseMintedTimestamp"]
+        except (KeyError, TypeError):
+            minted_at = None
+        if entry is not None and minted_at is not None and entry.get("minted_at") is not None:
+            if self.parse_timestamp(minted_at) <= self.parse_timestamp(entry["minted_at"]):
+                # The data has not changed (or this response is older than the cached one), so the cached one is
+                # kept, and callers holding it can tell nothing has changed
+                return self.revalidate(key, entry, list_of_enums)
+        with self.lock:
+            self.misses += 1
+        self.backend.put(key, {
+            "response_json": response_json,
+            "stored_at": time.time(),
+            "expires_at": time.time() + self.get_ttl(list_of_enums),
+            "minted_at": minted_at,
+            "etag": etag,
+            "last_modified": last_modified
+        })
+        return response_json
+
+    def parse_timestamp(self, timestamp):
+        # Bungie's timestamps are in UTC and can have seven decimal places, more than datetime can parse
+        date_time, _, fraction = timestamp.replace("Z", "").split("+")[0].partition(".")
+        return datetime.datetime.fromisoformat(date_time) + datetime.timedelta(microseconds=int((fraction + "000000")[:6]))
+
+    def invalidate(self, membership_type, membership_id):
+
+        """
+        Removes every cached response for a profile - called automatically after an action that changes the profile, such as equipping or transferring an item
+
+        :param membership_type: The membership type of the profile
+        :type membership_type: string, integer
+        :param membership_id: The membership ID of the profile
+        :type membership_id: string
+        """
+
+        # Keys are the profile followed by the components, so every key for the profile is in the profile's group
+        self.backend.delete_group(str(membership_type) + "/" + str(membership_id))
+
+    def clear(self):
+
+        """
+        Removes every cached response
+        """
+
+        self.backend.clear()
+
+    def get_stats(self):
+
+        """
+        Gets statistics about how well the cache is performing
+
+        :return: A dict containing the hits, revalidations, misses and hit rate, where revalidations count as hits
+        :rtype: dict
+        """
+
+        with self.lock:
+            requests = self.hits + self.revalidations + self.misses
+            return {
+                "hits": self.hits,
+                "revalidations": self.revalidations,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.revalidations) / requests if requests else 0.0
+            }
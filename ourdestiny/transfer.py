@@ -0,0 +1,305 @@
+import time
+from enum import IntEnum
+import requests
+import ourdestiny
+
+
+class d2transfer:
+
+    """
+    A move of an item to a character or to the vault, made with ourdestiny.d2profile.transfer_items. A move between two
+    characters goes through the vault, so is made in two steps - the item is moved from the first character to the
+    vault, then from the vault to the second character. Once the move has been made, the transfer holds whether it
+    succeeded, and the response of each step.
+
+    :param item: The item to move
+    :type item: ourdestiny.d2item
+    :param destination: The character to move the item to, or None to move it to the vault
+    :type destination: ourdestiny.d2character
+    :param number_to_transfer: The number of items to move, for stacks of items such as planetary materials - defaults to 1
+    :type number_to_transfer: integer, optional
+
+    :ivar item: The item being moved
+    :vartype item: ourdestiny.d2item
+    :ivar destination: The character the item is being moved to, or None if it is being moved to the vault
+    :vartype destination: ourdestiny.d2character
+    :ivar number_to_transfer: The number of items being moved
+    :vartype number_to_transfer: integer
+    :ivar moved_item: The item object holding the moved items, wherever they are now - the same object as item, unless only part of a stack was moved or the moved items joined a stack already where they were moved to
+    :vartype moved_item: ourdestiny.d2item
+    :ivar source: The character the item was in when the move was started, or None if it was in the vault
+    :vartype source: ourdestiny.d2character
+    :ivar steps: The steps of the move, as (character, transfer to vault) tuples in the order they are made, or None if the move has not been started
+    :vartype steps: list[tuple]
+    :ivar completed_steps: The number of steps that have been made - a move between characters that failed after one step has left the item in the vault
+    :vartype completed_steps: integer
+    :ivar status: Whether the move is still to be made, has succeeded, failed, or was skipped as the item was already there
+    :vartype status: ourdestiny.TransferStatus
+    :ivar error: The error the move failed with, if it failed
+    :vartype error: Exception
+    :ivar responses: The response JSON from the API of each step that has been made
+    :vartype responses: list[dict]
+    """
+
+    __slots__ = ("item", "destination", "number_to_transfer", "moved_item", "source", "steps", "completed_steps", "status", "error", "responses")
+
+    def __init__(self, item, destination, number_to_transfer=1):
+        self.item = item
+        self.destination = destination
+        self.number_to_transfer = number_to_transfer
+        self.moved_item = item
+        self.source = None
+        self.steps = None
+        self.completed_steps = 0
+        self.status = TransferStatus.Pending
+        self.error = None
+        self.responses = []
+
+    def __repr__(self):
+        return "d2transfer(" + self.item.name + ", " + self.status.name + ")"
+
+    @property
+    def succeeded(self):
+        return self.status == TransferStatus.Succeeded or self.status == TransferStatus.Skipped
+
+    def plan(self):
+
+        """
+        Works out the steps of the move from where the item is now - called when the move is started rather than when
+        the transfer is created, so that earlier moves of the same item are taken into account
+        """
+
+        self.source = self.item.owner_object
+        self.moved_item = self.item
+        self.completed_steps = 0
+        if self.source is None:
+            if self.item not in self.item.profile_object.vault_index:
+                # The item is in the profile inventory or otherwise out of reach of TransferItem
+                self.fail(ourdestiny.ItemNotInBucket(self.item))
+                return
+        elif self.source is not self.destination and self.item not in self.source.inventory_index:
+            # Equipped items and items in the postmaster can not be moved to the vault
+            self.fail(ourdestiny.ItemNotInBucket(self.item))
+            return
+        self.steps = []
+        if self.source is self.destination:
+            self.status = TransferStatus.Skipped
+            return
+        if self.source is not None:
+            self.steps.append((self.source, True))
+        if self.destination is not None:
+            self.steps.append((self.destination, False))
+
+    def get_next_step(self):
+
+        """
+        Gets the next step of the move to be made
+
+        :return: The character the step moves the item from or to, and whether it moves the item to the vault, or None if there are no steps left
+        :rtype: tuple
+        """
+
+        if self.status != TransferStatus.Pending or self.steps is None or self.completed_steps >= len(self.steps):
+            return None
+        return self.steps[self.completed_steps]
+
+    def send_step(self):
+
+        """
+        Sends the TransferItem request for the next step of the move, without changing anything locally
+
+        :return: The response JSON from the API
+        :rtype: dict
+
+        :raises ItemNotInBucket: The item is no longer where the step moves it from
+        """
+
+        character, transfer_to_vault = self.get_next_step()
+        data = character.get_transfer_item_data(self.moved_item, self.number_to_transfer, transfer_to_vault)
+        if data is None:
+            raise ourdestiny.ItemNotInBucket(self.moved_item)
+        client_object = character.profile_object.client_object
+        transfer_request = client_object.http_post(client_object.root_endpoint + "/Destiny2/Actions/Items/TransferItem",
+                                                   json=data, headers=client_object.request_header)
+        return transfer_request.json()
+
+    def apply_step(self, response_json):
+
+        """
+        Records the response to the next step of the move, moving the item locally if the step succeeded - a later step
+        moves the items from wherever this step left them, which is a different item object if only part of a stack was
+        moved
+
+        :param response_json: The response JSON from the API
+        :type response_json: dict
+
+        :raises NoRoomInDestination: There is not room in the vault or the character's inventory for the item
+        :raises ItemNotFound: The item is not found on the API's end
+        """
+
+        character, transfer_to_vault = self.get_next_step()
+        self.responses.append(response_json)
+        self.moved_item = character.apply_transfer_item_response(self.moved_item, self.number_to_transfer, transfer_to_vault, response_json)
+        self.completed_steps += 1
+        if self.completed_steps == len(self.steps):
+            self.status = TransferStatus.Succeeded
+
+    def fail(self, error):
+
+        """
+        Marks the move as failed
+
+        :param error: The error the move failed with
+        :type error: Exception
+        """
+
+        self.status = TransferStatus.Failed
+        self.error = error
+
+
+class d2postmasterpull:
+
+    """
+    A pull of an item out of a character's postmaster, made with ourdestiny.d2profile.pull_all_from_postmaster. Once the
+    pull has been made, holds whether it succeeded, how many attempts it took, and the response from the API.
+
+    :param item: The item in the postmaster
+    :type item: ourdestiny.d2item
+    :param character: The character whose postmaster holds the item
+    :type character: ourdestiny.d2character
+    :param stack_size: The number of items in the stack to pull, defaults to the whole stack
+    :type stack_size: integer, optional
+
+    :ivar item: The item being pulled
+    :vartype item: ourdestiny.d2item
+    :ivar character: The character whose postmaster holds the item
+    :vartype character: ourdestiny.d2character
+    :ivar stack_size: The number of items in the stack being pulled
+    :vartype stack_size: integer
+    :ivar status: Whether the pull is still to be made, has succeeded, failed, or was not made as there was no room for the item
+    :vartype status: ourdestiny.TransferStatus
+    :ivar error: The error the pull failed with, if it failed or there was no room - for pulls still to be retried, the error of the last attempt
+    :vartype error: Exception
+    :ivar attempts: The number of requests made for the pull
+    :vartype attempts: integer
+    :ivar response: The response JSON from the API of the last attempt, if one was received
+    :vartype response: dict
+    """
+
+    # Error codes of failures that are not caused by the pull itself, so can be tried again - see https://bungie-net.github.io/multi/schema_Exceptions-PlatformErrorCodes.html
+    transient_error_codes = {2, 3, 1618} | ourdestiny.d2ratelimiter.throttle_error_codes
+
+    __slots__ = ("item", "character", "stack_size", "status", "error", "attempts", "response")
+
+    def __init__(self, item, character, stack_size=None):
+        self.item = item
+        self.character = character
+        self.stack_size = stack_size if stack_size is not None else item.quantity
+        self.status = TransferStatus.Pending
+        self.error = None
+        self.attempts = 0
+        self.response = None
+
+    def __repr__(self):
+        return "d2postmasterpull(" + self.item.name + ", " + self.status.name + ")"
+
+    @property
+    def succeeded(self):
+        return self.status == TransferStatus.Succeeded
+
+    def send(self):
+
+        """
+        Sends the PullFromPostmaster request for the item, without changing anything locally - attempts after the first
+        wait for a random delay first, which grows with each attempt
+
+        :return: The response JSON from the API
+        :rtype: dict
+
+        :raises ItemNotInBucket: The item is no longer in the postmaster
+        :raises ItemDoesNotBelongToCharacter: The item does not belong to the character
+        """
+
+        client_object = self.character.profile_object.client_object
+        if self.attempts > 0:
+            time.sleep(client_object.get_rate_limiter().get_retry_delay(self.attempts - 1))
+        self.attempts += 1
+        data = self.character.get_pull_from_postmaster_data(self.item, self.stack_size)
+        pull_request = client_object.http_post(client_object.root_endpoint + "/Destiny2/Actions/Items/PullFromPostmaster",
+                                               json=data, headers=client_object.request_header)
+        return pull_request.json()
+
+    def apply_result(self, future, max_attempts):
+
+        """
+        Records the outcome of a request sent with send, moving the item locally if it succeeded. Requests that failed
+        with a connection error, a response that could not be read or a transient error code leave the pull to be tried
+        again, until it has been attempted max_attempts times.
+
+        :param future: The future of the call to send
+        :type future: concurrent.futures.Future
+        :param max_attempts: The most requests to make for the pull
+        :type max_attempts: integer
+        """
+
+        error = future.exception()
+        if error is None:
+            self.response = future.result()
+            if self.response["ErrorStatus"] == "Success" or self.response["ErrorCode"] not in self.transient_error_codes:
+                try:
+                    self.character.apply_pull_from_postmaster_response(self.item, self.stack_size, self.response)
+                    self.status = TransferStatus.Succeeded
+                    self.error = None
+                except ourdestiny.NoRoomInDestination as no_room_error:
+                    self.skip(no_room_error)
+                except Exception as pull_error:
+                    self.fail(pull_error)
+                return
+            error = ourdestiny.OurDestinyError(self.response["Message"])
+        elif not isinstance(error, requests.RequestException):
+            self.fail(error)
+            return
+        if self.attempts >= max_attempts:
+            self.fail(error)
+        else:
+            self.error = error
+
+    def skip(self, error):
+
+        """
+        Marks the pull as not made, as there is no room for the item
+
+        :param error: The error from the API saying there is no room
+        :type error: ourdestiny.NoRoomInDestination
+        """
+
+        self.status = TransferStatus.NoRoom
+        self.error = error
+
+    def fail(self, error):
+
+        """
+        Marks the pull as failed
+
+        :param error: The error the pull failed with
+        :type error: Exception
+        """
+
+        self.status = TransferStatus.Failed
+        self.error = error
+
+
+class TransferStatus(IntEnum):
+
+    """An enumeration of the states a d2transfer or d2postmasterpull can be in"""
+
+    #: The move has not been made yet.
+    Pending = 0
+    #: Every step of the move was made.
+    Succeeded = 1
+    #: A step of the move failed - see the transfer's error.
+    Failed = 2
+    #: The item was already where it was being moved to, so nothing was sent.
+    Skipped = 3
+    #: There was no room for the item where it was being moved to, so it was left where it was.
+    NoRoom = 4
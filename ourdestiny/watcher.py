@@ -0,0 +1,248 @@
+import threading
+import time
+import ourdestiny
+
+
+class d2profilewatcher:
+
+    """
+    Polls a set of profiles in the background and reports what changes between polls. Each profile is built the first
+    time it is polled and refreshed in place after that (see ourdestiny.d2profile.refresh), so polls where bungie.net has
+    not minted new data cost a single request and no rebuilding. Changes are passed to callbacks as d2change events.
+    Polls run in the client's worker pool, and are spread out so that no more than requests_per_second polls are started
+    each second across every profile.
+
+    Callbacks are called from worker threads, with the profile and the change - a callback that raises an error does not
+    stop the others being called, and the error is passed to the error callback.
+
+    :param client_object: The client object used to fetch the profiles
+    :type client_object: ourdestiny.d2client
+    :param interval: The number of seconds between polls of each profile, defaults to 60
+    :type interval: float, optional
+    :param sections: The sections of each profile to watch, defaults to default_sections
+    :type sections: list[string], optional
+    :param requests_per_second: The most polls started per second across every profile, defaults to 2
+    :type requests_per_second: float, optional
+    :param error_callback: A function called with the membership ID and the error whenever a poll or callback fails
+    :type error_callback: function, optional
+
+    :ivar profiles: The current profile object of each watched profile that has been polled, keyed by (membership type, membership ID)
+    :vartype profiles: dict
+    :ivar errors: The error from the most recent poll of each profile, if it failed, keyed by (membership type, membership ID)
+    :vartype errors: dict
+    """
+
+    # The sections watched when none are given
+    default_sections = ["profile_inventory", "profile_records", "inventory", "equipment", "progressions", "character_records"]
+
+    def __init__(self, client_object, interval=60, sections=None, requests_per_second=2, error_callback=None):
+        self.client_object = client_object
+        self.interval = interval
+        self.sections = ourdestiny.d2profile.get_sections(sections if sections is not None else self.default_sections)
+        self.request_budget = ourdestiny.d2tokenbucket(requests_per_second, max(1, int(requests_per_second)))
+        self.error_callback = error_callback
+        self.callbacks = []
+        self.profiles = {}
+        self.errors = {}
+        # When each watched profile is next due to be polled, keyed by (membership type, membership ID)
+        self.next_polls = {}
+        self.polling = set()
+        self.stats = {"polls": 0, "polls_with_changes": 0, "changes": 0, "errors": 0}
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def add_callback(self, callback, change_types=None, sections=None):
+
+        """
+        Adds a function to be called for each change found
+
+        :param callback: The function, which is called with the profile and the ourdestiny.d2change
+        :type callback: function
+        :param change_types: The kinds of change to call it for, defaults to every kind
+        :type change_types: list[ourdestiny.ChangeType], optional
+        :param sections: The sections to call it for changes in, such as "equipment" or "characters", defaults to every section
+        :type sections: list[string], optional
+        """
+
+        with self.lock:
+            self.callbacks.append((callback, None if change_types is None else set(change_types), None if sections is None else set(sections)))
+
+    def remove_callback(self, callback):
+
+        """
+        Stops a function added with add_callback being called
+
+        :param callback: The function
+        :type callback: function
+        """
+
+        with self.lock:
+            self.callbacks = [entry for entry in self.callbacks if entry[0] is not callback]
+
+    def watch(self, membership_type, membership_id):
+
+        """
+        Starts watching a profile - it is polled as soon as the request budget allows
+
+        :param membership_type: The membership type of the profile
+        :type membership_type: string, integer
+        :param membership_id: The membership ID of the profile
+        :type membership_id: string
+        """
+
+        with self.lock:
+            self.next_polls.setdefault((str(membership_type), str(membership_id)), time.monotonic())
+        self.wake.set()
+
+    def unwatch(self, membership_type, membership_id):
+
+        """
+        Stops watching a profile
+
+        :param membership_type: The membership type of the profile
+        :type membership_type: string, integer
+        :param membership_id: The membership ID of the profile
+        :type membership_id: string
+        """
+
+        key = (str(membership_type), str(membership_id))
+        with self.lock:
+            self.next_polls.pop(key, None)
+            self.profiles.pop(key, None)
+            self.errors.pop(key, None)
+
+    def start(self):
+
+        """
+        Starts polling in a background thread
+        """
+
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+
+        """
+        Stops polling - polls already running are left to finish
+        """
+
+        self.stop_event.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            with self.lock:
+                due_keys = sorted((next_poll, key) for key, next_poll in self.next_polls.items()
+                                  if next_poll <= now and key not in self.polling)
+                waiting = [next_poll for key, next_poll in self.next_polls.items() if key not in self.polling]
+            for next_poll, key in due_keys:
+                delay = self.request_budget.reserve()
+                if delay > 0 and self.stop_event.wait(delay):
+                    return
+                with self.lock:
+                    if key not in self.next_polls:
+                        continue
+                    self.polling.add(key)
+                self.client_object.get_executor().submit(self.poll, key)
+            if len(due_keys) == 0:
+                # Sleeps until the next profile is due, or until a profile is added or a poll finishes
+                timeout = max(0.0, min(waiting) - now) if len(waiting) > 0 else None
+                self.wake.wait(timeout)
+                self.wake.clear()
+
+    def poll(self, key):
+
+        """
+        Polls one watched profile straight away, passing any changes to the callbacks - normally called from the
+        background thread started by start
+
+        :param key: The (membership type, membership ID) of the profile
+        :type key: tuple
+        :return: The changes found, which are always empty the first time a profile is polled
+        :rtype: list[ourdestiny.d2change]
+        """
+
+        changes = []
+        profile = self.profiles.get(key)
+        try:
+            if profile is None:
+                profile = self.client_object.get_profile(key[0], key[1], sections=self.sections)
+            else:
+                changes = profile.refresh(self.sections)
+        except Exception as error:
+            with self.lock:
+                self.errors[key] = error
+                self.stats["errors"] += 1
+            self.report_error(key[1], error)
+            return changes
+        finally:
+            with self.lock:
+                self.polling.discard(key)
+                if key in self.next_polls:
+                    self.next_polls[key] = time.monotonic() + self.interval
+            self.wake.set()
+        with self.lock:
+            if key not in self.next_polls:
+                # The profile stopped being watched while it was being polled
+                return changes
+            self.profiles[key] = profile
+            self.errors.pop(key, None)
+            self.stats["polls"] += 1
+            self.stats["changes"] += len(changes)
+            if len(changes) > 0:
+                self.stats["polls_with_changes"] += 1
+            callbacks = list(self.callbacks)
+        for change in changes:
+            for callback, change_types, sections in callbacks:
+                if (change_types is None or change.change_type in change_types) and (sections is None or change.section in sections):
+                    try:
+                        callback(profile, change)
+                    except Exception as error:
+                        self.report_error(key[1], error)
+        return changes
+
+    def poll_all(self):
+
+        """
+        Polls every watched profile once straight away in the client's worker pool, within the request budget, and waits for
+        every poll to finish - useful instead of start for applications that schedule polls themselves
+
+        :return: The changes found for each profile, keyed by (membership type, membership ID)
+        :rtype: dict
+        """
+
+        with self.lock:
+            keys = [key for key in self.next_polls.keys() if key not in self.polling]
+            self.polling.update(keys)
+        futures = {}
+        for key in keys:
+            delay = self.request_budget.reserve()
+            if delay > 0:
+                time.sleep(delay)
+            futures[key] = self.client_object.get_executor().submit(self.poll, key)
+        return {key: future.result() for key, future in futures.items()}
+
+    def report_error(self, membership_id, error):
+        if self.error_callback is not None:
+            self.error_callback(membership_id, error)
+
+    def get_stats(self):
+
+        """
+        Gets counters for the watcher
+
+        :return: A dict of the number of profiles watched and being polled, and the polls made, polls that found changes, changes found and errors
+        :rtype: dict
+        """
+
+        with self.lock:
+            return dict(self.stats, watched=len(self.next_polls), polling=len(self.polling))
@@ -11,5 +11,9 @@ setup(
     description='A Python library for interacting with the Destiny 2 API.',
     install_requires=[
         "requests"
-    ]
+    ],
+    extras_require={
+        "async": ["aiohttp"],
+        "columnar": ["numpy"]
+    }
 )
@@ -0,0 +1,86 @@
+import json
+import pickle
+import sqlite3
+import ourdestiny
+
+SWORD_HASH = 4255268456
+RIFLE_HASH = 1363886209
+
+
+def make_definition(item_hash):
+    return {"hash": item_hash, "displayProperties": {"name": "Item " + str(item_hash), "hasIcon": False},
+            "itemTypeDisplayName": "Sword", "flavorText": "Not kept in the compact manifest"}
+
+
+def make_database(path):
+    connection = sqlite3.connect(str(path))
+    connection.execute("CREATE TABLE DestinyInventoryItemDefinition (id INTEGER PRIMARY KEY, json TEXT)")
+    for item_hash in [SWORD_HASH, RIFLE_HASH]:
+        signed_hash = item_hash - (1 << 32) if item_hash & (1 << 31) else item_hash
+        connection.execute("INSERT INTO DestinyInventoryItemDefinition VALUES (?, ?)", (signed_hash, json.dumps(make_definition(item_hash))))
+    connection.commit()
+    connection.close()
+    return str(path)
+
+
+def test_compact_manifest_round_trip(tmp_path):
+    db_path = make_database(tmp_path / "world.content")
+
+    compiled = ourdestiny.d2compactmanifest.compile(db_path, db_path + ".compact")
+    compact_manifest = ourdestiny.d2compactmanifest(db_path + ".compact")
+
+    for manifest in [compiled, compact_manifest]:
+        assert manifest.get("InventoryItem", SWORD_HASH) == {"hash": SWORD_HASH, "itemTypeDisplayName": "Sword",
+                                                             "displayProperties": make_definition(SWORD_HASH)["displayProperties"]}
+        assert manifest.get("InventoryItem", RIFLE_HASH)["hash"] == RIFLE_HASH
+        assert manifest.get("InventoryItem", 12345) is None
+        # Tables missing from the database are left out of the file
+        assert manifest.get("Record", SWORD_HASH) is None and manifest.get_fields("Record") is None
+        manifest.close()
+    assert not (tmp_path / "world.content.compact.tmp").exists()
+
+
+def test_compact_manifest_rejects_other_files(tmp_path):
+    other_path = tmp_path / "other.compact"
+    other_path.write_bytes(b"not a compact manifest file")
+
+    try:
+        ourdestiny.d2compactmanifest(str(other_path))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a file without the magic number was opened")
+
+
+def make_compact_definition():
+    loads = []
+
+    def full_json_loader():
+        loads.append(SWORD_HASH)
+        return make_definition(SWORD_HASH)
+
+    compact_json = {"hash": SWORD_HASH, "itemTypeDisplayName": "Sword"}
+    return ourdestiny.d2compactdefinition(compact_json, ["hash", "itemTypeDisplayName", "screenshot"], full_json_loader), loads
+
+
+def test_compact_definition_reads_the_database_only_for_fields_it_lacks():
+    definition, loads = make_compact_definition()
+
+    assert definition["itemTypeDisplayName"] == "Sword" and definition.get("screenshot") is None and "screenshot" not in definition
+    assert loads == []
+    assert definition["flavorText"] == "Not kept in the compact manifest" and loads == [SWORD_HASH]
+    assert definition.get("missing", "default") == "default" and loads == [SWORD_HASH]
+
+
+def test_compact_definition_whole_dict_operations_see_the_full_json():
+    full_json = make_definition(SWORD_HASH)
+    # The fields that were pre-extracted come first, so the order of the fields is not compared
+    operations = [len, sorted, dict, lambda definition: json.dumps(definition, sort_keys=True), lambda definition: "flavorText" in repr(definition),
+                  lambda definition: {**definition}, lambda definition: definition.copy(), lambda definition: pickle.loads(pickle.dumps(definition)),
+                  lambda definition: sorted(definition.items()), lambda definition: sorted(definition.values(), key=repr)]
+    for operation in operations:
+        definition, loads = make_compact_definition()
+        assert operation(definition) == operation(full_json)
+        assert loads == [SWORD_HASH]
+    definition, loads = make_compact_definition()
+    assert definition == full_json and not definition != full_json
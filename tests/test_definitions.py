@@ -0,0 +1,145 @@
+import json
+import sqlite3
+import threading
+import ourdestiny
+
+SWORD_HASH = 4255268456
+RIFLE_HASH = 1363886209
+
+
+def make_database(path, definitions):
+    connection = sqlite3.connect(str(path))
+    connection.execute("CREATE TABLE DestinyInventoryItemDefinition (id INTEGER PRIMARY KEY, json TEXT)")
+    for definition in definitions:
+        signed_hash = definition["hash"] - (1 << 32) if definition["hash"] & (1 << 31) else definition["hash"]
+        connection.execute("INSERT INTO DestinyInventoryItemDefinition VALUES (?, ?)", (signed_hash, json.dumps(definition)))
+    connection.commit()
+    connection.close()
+    return str(path)
+
+
+def make_definition(item_hash):
+    return {"hash": item_hash, "displayProperties": {"name": "Item " + str(item_hash), "hasIcon": False}}
+
+
+def make_client(db_path, max_size=10000):
+    client = object.__new__(ourdestiny.d2client)
+    client.__dict__.update(definition_cache=ourdestiny.d2definitioncache(max_size), compact_manifest=False, compact_manifests={},
+                           database_pools={"mobileWorldContent": ourdestiny.d2connectionpool(db_path)},
+                           retired_database_pools=[], database_connect_lock=threading.Lock())
+    return client
+
+
+def test_unavailable_database_is_not_cached(tmp_path):
+    client = make_client(make_database(tmp_path / "world.content", [make_definition(SWORD_HASH)]))
+    client.database_types = []
+
+    assert client.get_from_db(SWORD_HASH, "InventoryItem") is None
+
+    del client.database_types
+    assert client.get_from_db(SWORD_HASH, "InventoryItem") == make_definition(SWORD_HASH)
+
+
+def test_cursor_lookups_are_cached_under_their_own_database(tmp_path):
+    client = make_client(make_database(tmp_path / "world.content", [make_definition(SWORD_HASH)]))
+    banner_cursor = sqlite3.connect(make_database(tmp_path / "banner.content", [{"hash": SWORD_HASH, "kind": "banner"}])).cursor()
+
+    assert client.get_hash_with_cursor(SWORD_HASH, banner_cursor, "InventoryItem", "mobileClanBannerDatabase")["kind"] == "banner"
+    assert client.get_from_db(SWORD_HASH, "InventoryItem") == make_definition(SWORD_HASH)
+
+    client.definition_cache.clear("mobileClanBannerDatabase")
+    assert client.definition_cache.get("mobileClanBannerDatabase", "InventoryItem", SWORD_HASH) is None
+    assert client.definition_cache.get("mobileWorldContent", "InventoryItem", SWORD_HASH) is not None
+
+
+def test_update_closes_and_removes_the_old_compact_manifest(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "db").mkdir()
+    db_path = make_database(tmp_path / "db" / "world_old.content", [make_definition(SWORD_HASH)])
+    client = make_client(db_path)
+    client.compact_manifest = True
+    client.definition_cache = ourdestiny.d2definitioncache()
+    dbinfo = {"mobileWorldContent": "world_old.content"}
+    client.read_dbinfo = lambda: dict(dbinfo)
+    client.get_destiny_manifest = lambda: {"Response": None}
+    client.get_manifest_db_paths = lambda manifest_json: {"mobileWorldContent": "/common/world_new.content"}
+    client.download_destiny_dbs = lambda paths, progress_callback=None: dbinfo.update(mobileWorldContent="world_new.content")
+    old_manifest = client.get_compact_manifest("mobileWorldContent")
+    assert client.get_from_db(SWORD_HASH, "InventoryItem")["hash"] == SWORD_HASH
+
+    client.check_for_destiny_db_update()
+
+    assert old_manifest.mapped_file.closed
+    assert "mobileWorldContent" not in client.compact_manifests and "mobileWorldContent" not in client.database_pools
+    assert not (tmp_path / "db" / "world_old.content.compact").exists()
+
+
+def test_definition_cache_evicts_least_recently_used():
+    cache = ourdestiny.d2definitioncache(2)
+    cache.put("mobileWorldContent", "InventoryItem", 1, {"hash": 1})
+    cache.put("mobileWorldContent", "InventoryItem", 2, {"hash": 2})
+    assert cache.get("mobileWorldContent", "InventoryItem", 1) == {"hash": 1}
+
+    cache.put("mobileWorldContent", "InventoryItem", 3, {"hash": 3})
+
+    assert cache.get("mobileWorldContent", "InventoryItem", 2) is None
+    assert cache.get("mobileWorldContent", "InventoryItem", 1) == {"hash": 1}
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+    assert stats["sizes"] == {"InventoryItem": 2}
+
+
+def test_definition_cache_is_bounded_per_table_and_cleared_per_database():
+    cache = ourdestiny.d2definitioncache(1)
+    cache.put("mobileWorldContent", "InventoryItem", 1, {"hash": 1})
+    cache.put("mobileWorldContent", "Stat", 1, {"hash": 1})
+    cache.put("mobileClanBannerDatabase", "InventoryItem", 1, {"hash": 1})
+    assert cache.get_stats()["evictions"] == 0
+
+    cache.clear("mobileWorldContent")
+
+    assert cache.get("mobileWorldContent", "InventoryItem", 1) is None
+    assert cache.get("mobileClanBannerDatabase", "InventoryItem", 1) == {"hash": 1}
+
+
+def test_disabled_definition_cache_holds_nothing():
+    cache = ourdestiny.d2definitioncache(0)
+    cache.put("mobileWorldContent", "InventoryItem", 1, {"hash": 1})
+
+    assert cache.get("mobileWorldContent", "InventoryItem", 1) is None
+
+
+def test_repeated_lookups_are_served_from_the_cache(tmp_path):
+    client = make_client(make_database(tmp_path / "world.content", [make_definition(SWORD_HASH)]))
+
+    first = client.get_from_db(SWORD_HASH, "InventoryItem")
+
+    assert client.get_from_db(str(SWORD_HASH), "InventoryItem") is first
+    assert client.definition_cache.get_stats()["hits"] == 1
+
+
+def test_batched_lookup_skips_duplicates_and_missing_hashes(tmp_path):
+    client = make_client(make_database(tmp_path / "world.content", [make_definition(SWORD_HASH), make_definition(RIFLE_HASH)]))
+
+    definitions = client.get_many_from_db([str(SWORD_HASH), SWORD_HASH, RIFLE_HASH, 12345], "InventoryItem")
+
+    # Hashes above 2^31 are stored signed in the database, and come back under their unsigned form
+    assert definitions == {SWORD_HASH: make_definition(SWORD_HASH), RIFLE_HASH: make_definition(RIFLE_HASH)}
+    assert client.definition_cache.get("mobileWorldContent", "InventoryItem", SWORD_HASH) == make_definition(SWORD_HASH)
+
+
+def test_batched_lookup_pads_chunks_to_a_power_of_two(tmp_path):
+    item_hashes = [1000 + index for index in range(7)] + [SWORD_HASH]
+    db_path = make_database(tmp_path / "world.content", [make_definition(item_hash) for item_hash in item_hashes])
+    client = make_client(db_path)
+    client.db_query_chunk_size = 4
+    connection = sqlite3.connect(db_path)
+    queries = []
+    connection.set_trace_callback(queries.append)
+
+    definitions = client.get_many_from_db(item_hashes[:7], "InventoryItem", cursor=connection.cursor())
+    definitions.update(client.get_many_from_db(item_hashes[5:], "InventoryItem", cursor=connection.cursor()))
+
+    assert sorted(definitions) == sorted(item_hashes)
+    # 7 hashes make a chunk of 4 and a chunk of 3 padded to 4, and only the one hash not yet cached is looked up next
+    assert [query.split("IN (")[1].count(",") + 1 for query in queries] == [4, 4, 1]
@@ -0,0 +1,89 @@
+import io
+import json
+import threading
+import zipfile
+import pytest
+import ourdestiny
+
+WORLD_URL = "/common/destiny2_content/sqlite/en/world_sql_content_0123456789abcdef.content"
+PARTIAL_NAME = "world_sql_content_0123456789abcdef.content.zip.part"
+
+
+def make_zip_bytes():
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w") as db_zip:
+        db_zip.writestr("world_sql_content_0123456789abcdef.content", b"sqlite database contents" * 100)
+    return zip_buffer.getvalue()
+
+
+class StubResponse:
+
+    def __init__(self, status_code, headers, body):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+def make_client(tmp_path, monkeypatch, response):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "db").mkdir()
+    client = object.__new__(ourdestiny.d2client)
+    requests = []
+
+    def http_get(url, headers=None, stream=False):
+        requests.append(headers)
+        return response
+
+    client.__dict__.update(request_header={}, download_chunk_size=64, download_progress_callback=None, compact_manifest=False,
+                           dbinfo_lock=threading.Lock(), http_get=http_get)
+    return client, requests
+
+
+def test_interrupted_download_is_resumed_and_unzipped(tmp_path, monkeypatch):
+    zip_bytes = make_zip_bytes()
+    response = StubResponse(206, {"Content-Range": "bytes 100-" + str(len(zip_bytes) - 1) + "/" + str(len(zip_bytes))}, zip_bytes[100:])
+    client, requests = make_client(tmp_path, monkeypatch, response)
+    (tmp_path / "db" / PARTIAL_NAME).write_bytes(zip_bytes[:100])
+    progress = []
+
+    client.download_one_destiny_db("mobileWorldContent", WORLD_URL, lambda *args: progress.append(args[1:3]))
+
+    assert requests[0]["Range"] == "bytes=100-"
+    assert progress[0] == (164, len(zip_bytes)) and progress[-1] == (len(zip_bytes), len(zip_bytes))
+    assert json.loads((tmp_path / "db" / "dbinfo.json").read_text()) == {"mobileWorldContent": "world_sql_content_0123456789abcdef.content"}
+    assert (tmp_path / "db" / "world_sql_content_0123456789abcdef.content").read_bytes() == b"sqlite database contents" * 100
+    assert sorted(path.name for path in (tmp_path / "db").iterdir()) == ["dbinfo.json", "world_sql_content_0123456789abcdef.content"]
+
+
+def test_short_download_is_kept_to_resume_later(tmp_path, monkeypatch):
+    zip_bytes = make_zip_bytes()
+    client, requests = make_client(tmp_path, monkeypatch, StubResponse(200, {"Content-Length": str(len(zip_bytes))}, zip_bytes[:150]))
+
+    with pytest.raises(ourdestiny.DatabaseDownloadFailed):
+        client.download_one_destiny_db("mobileWorldContent", WORLD_URL)
+
+    assert "Range" not in requests[0]
+    assert (tmp_path / "db" / PARTIAL_NAME).read_bytes() == zip_bytes[:150]
+    assert not (tmp_path / "db" / "dbinfo.json").exists()
+
+
+def test_corrupt_download_is_thrown_away(tmp_path, monkeypatch):
+    client, requests = make_client(tmp_path, monkeypatch, StubResponse(200, {"Content-Length": "300"}, b"x" * 300))
+
+    with pytest.raises(ourdestiny.DatabaseDownloadFailed):
+        client.download_one_destiny_db("mobileWorldContent", WORLD_URL)
+
+    assert list((tmp_path / "db").iterdir()) == []
@@ -0,0 +1,83 @@
+import types
+import ourdestiny
+
+MATERIALS_BUCKET = 3865314626
+WEAPONS_BUCKET = 1498876634
+
+
+def make_item(item_hash, quantity=1, instance_id=None, bucket_hash=MATERIALS_BUCKET, slot_index=1, name=None):
+    item = object.__new__(ourdestiny.d2item)
+    item.item_hash = item_hash
+    item.definition = types.SimpleNamespace(name=name or "Item " + str(item_hash), description="", icon="")
+    item.instance_id = instance_id
+    item.quantity = quantity
+    item.perks = []
+    item.owner_object = None
+    item.bucket_info = {"hash": bucket_hash, "index": slot_index, "displayProperties": {"name": "Bucket " + str(bucket_hash)}}
+    return item
+
+
+def test_items_keep_their_display_properties_api():
+    item = make_item(1305274547, quantity=10)
+
+    assert isinstance(item, ourdestiny.d2displayproperties)
+    item.name = "Renamed"
+    assert item.name == "Renamed" and item.definition.name == "Item 1305274547"
+    # A split stack keeps anything set on the stack it came from
+    copied = item.copy_stack(4)
+    assert copied.name == "Renamed" and copied.quantity == 4
+    item.name = item.definition.name
+    assert item.name == "Item 1305274547"
+
+
+def test_instancing_skips_only_the_perks_that_are_missing():
+    item = make_item(1363886209, instance_id="6917529000000000001", bucket_hash=WEAPONS_BUCKET, slot_index=2)
+    perk_definitions = {1: {"displayProperties": {"name": "Outlaw", "description": "Reloads faster", "hasIcon": False}}}
+    client_object = types.SimpleNamespace(get_world_db_cursor=lambda: None,
+                                          get_many_from_db=lambda hashes, table, cursor=None: perk_definitions if table == "SandboxPerk" else {})
+    item.profile_object = types.SimpleNamespace(client_object=client_object)
+
+    item.apply_instance_data({"instance": {"data": {"canEquip": True, "isEquipped": False}},
+                              "perks": {"data": {"perks": [{"perkHash": 2, "isActive": True, "visible": True},
+                                                           {"perkHash": 1, "isActive": True, "visible": True}]}}})
+
+    assert [perk["name"] for perk in item.perks] == ["Outlaw"]
+
+
+def test_item_index_finds_items_by_every_key():
+    sword = make_item(4255268456, instance_id="6917529000000000001", bucket_hash=WEAPONS_BUCKET, slot_index=2, name="Sword")
+    other_sword = make_item(4255268456, instance_id="6917529000000000002", bucket_hash=WEAPONS_BUCKET, slot_index=2, name="Sword")
+    glimmer = make_item(3159615086, quantity=500, name="Glimmer")
+    index = ourdestiny.d2itemindex([sword, other_sword, glimmer])
+
+    assert index.find(name="Sword") == [sword, other_sword]
+    assert index.find(item_hash=3159615086) == [glimmer]
+    assert index.find(instance_id="6917529000000000002") == [other_sword]
+    assert index.find(bucket_hash=WEAPONS_BUCKET) == [sword, other_sword]
+    assert index.find(slot=2) == index.find(slot="Bucket " + str(WEAPONS_BUCKET)) == [sword, other_sword]
+    assert index.find(name="Sword", instance_id="6917529000000000001") == [sword]
+    assert index.find(name="Sword", slot=1) == [] and index.find(name="Missing") == []
+    assert index.find() == [sword, other_sword, glimmer] and len(index) == 3
+
+
+def test_item_index_forgets_removed_items():
+    sword = make_item(4255268456, instance_id="6917529000000000001", bucket_hash=WEAPONS_BUCKET, slot_index=2, name="Sword")
+    glimmer = make_item(3159615086, quantity=500, name="Glimmer")
+    index = ourdestiny.d2itemindex([sword, glimmer])
+
+    index.remove(sword)
+    index.remove(sword)
+
+    assert sword not in index and glimmer in index and len(index) == 1
+    assert index.find(name="Sword") == [] and index.find(slot=2) == []
+    assert "Sword" not in index.entries["name"] and WEAPONS_BUCKET not in index.entries["bucket_hash"]
+
+
+def test_item_index_holds_items_without_buckets():
+    unplaced = make_item(1305274547, quantity=3)
+    unplaced.bucket_info = None
+    index = ourdestiny.d2itemindex([unplaced])
+
+    assert index.find(item_hash=1305274547) == [unplaced] and index.find(bucket_hash=MATERIALS_BUCKET) == []
+    index.remove(unplaced)
+    assert len(index) == 0
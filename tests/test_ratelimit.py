@@ -0,0 +1,83 @@
+import json
+import types
+import ourdestiny
+import ourdestiny.ratelimit
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+def use_fake_clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ourdestiny.ratelimit, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def test_token_bucket_allows_a_burst_then_spaces_requests(monkeypatch):
+    clock = use_fake_clock(monkeypatch)
+    bucket = ourdestiny.d2tokenbucket(4, 2)
+
+    assert [bucket.reserve() for request in range(4)] == [0.0, 0.0, 0.25, 0.5]
+    clock.now += 1.0
+    # A second refills 4 tokens, 2 of which paid back the debt
+    assert bucket.reserve() == 0.0 and bucket.reserve() == 0.0 and bucket.reserve() == 0.25
+
+
+def test_token_bucket_pauses_slows_and_recovers(monkeypatch):
+    clock = use_fake_clock(monkeypatch)
+    bucket = ourdestiny.d2tokenbucket(10, 10)
+
+    bucket.pause(3)
+
+    assert bucket.reserve() == 3.0 and bucket.rate == 5
+    for pause in range(10):
+        bucket.pause(0)
+    assert bucket.rate == 1.0
+    clock.now += 3
+    bucket.recover()
+    assert bucket.rate == 1.5
+    for request in range(20):
+        bucket.recover()
+    assert bucket.rate == 10
+
+
+def test_rate_limiter_sorts_requests_into_endpoint_classes():
+    rate_limiter = ourdestiny.d2ratelimiter()
+    root = "https://www.bungie.net/Platform"
+
+    assert rate_limiter.get_endpoint_class("POST", root + "/Destiny2/Actions/Items/TransferItem/") == "action"
+    assert rate_limiter.get_endpoint_class("GET", root + "/Destiny2/3/Profile/4611686018400000000/") == "profile"
+    assert rate_limiter.get_endpoint_class("POST", root + "/App/OAuth/Token/") == "oauth"
+    assert rate_limiter.get_endpoint_class("GET", root + "/Destiny2/Manifest/") == "default"
+    assert rate_limiter.get_endpoint_class("GET", "https://www.bungie.net/common/destiny2_content/sqlite/en/world.content") is None
+
+
+def test_rate_limiter_retries_throttled_requests_for_as_long_as_asked(monkeypatch):
+    use_fake_clock(monkeypatch)
+    rate_limiter = ourdestiny.d2ratelimiter(backoff_base=0.5, max_retries=1)
+    response_body = json.dumps({"Response": {"ErrorCode": 1}, "ErrorCode": 36, "ThrottleSeconds": 5}).encode("utf-8")
+
+    error_code, throttle_seconds = rate_limiter.get_throttle_info(response_body)
+    assert (error_code, throttle_seconds) == (36, 5)
+    assert rate_limiter.record_response("profile", error_code, throttle_seconds, 0) == 5
+    assert rate_limiter.reserve("profile") == 5.0
+    assert rate_limiter.record_response("profile", error_code, throttle_seconds, 1) is None
+    stats = rate_limiter.get_stats()["profile"]
+    assert (stats["requests"], stats["throttled"], stats["retries"], stats["rate"]) == (1, 2, 1, 5)
+
+
+def test_rate_limiter_only_retries_failures_that_are_safe_to_repeat():
+    rate_limiter = ourdestiny.d2ratelimiter(backoff_base=1, max_retries=2)
+
+    assert 0 <= rate_limiter.record_failure("default", "GET", 0) <= 1
+    assert 0 <= rate_limiter.record_failure("default", "GET", 1) <= 2
+    assert rate_limiter.record_failure("default", "GET", 2) is None
+    assert rate_limiter.record_failure("action", "POST", 0, 503) is None
+    assert rate_limiter.record_failure("action", "POST", 0, 429) is not None
+    assert rate_limiter.get_stats()["default"]["retries"] == 2
@@ -0,0 +1,13 @@
+import ourdestiny
+
+
+def test_record_state_flags_can_be_set():
+    state = ourdestiny.d2recordstate(ourdestiny.RecordState.RecordRedeemed | ourdestiny.RecordState.ObjectiveNotCompleted)
+
+    state.objective_not_completed = False
+    state.can_equip_title = True
+
+    assert state.state_num == ourdestiny.RecordState.RecordRedeemed | ourdestiny.RecordState.CanEquipTitle
+    assert state.record_redeemed and state.can_equip_title and not state.objective_not_completed
+    state.none = True
+    assert state.state_num == 0 and not state.record_redeemed
@@ -0,0 +1,159 @@
+import threading
+import types
+import ourdestiny
+
+GLORY_HASH = 2000925172
+VALOR_HASH = 2626549951
+KINETIC_BUCKET = 1498876634
+INVENTORY_ITEM_HASHES = [1363886209, 3654674561]
+
+
+class StubClient:
+
+    def __init__(self):
+        self.response_json = None
+
+    def get_component_json(self, platform, destiny_membership_id, list_of_enums, use_cache=True):
+        return {"Response": self.response_json}
+
+    def get_many_from_db(self, hashes, table, database="mobileWorldContent"):
+        if table == "Record":
+            return {int(hashnum): {"hash": int(hashnum)} for hashnum in hashes}
+        if table != "Progression":
+            return {}
+        return {int(hashnum): make_progression_db_json(int(hashnum)) for hashnum in hashes}
+
+    def get_from_db(self, hashnum, table, database="mobileWorldContent"):
+        return {"hash": hashnum, "index": 2, "displayProperties": {"name": "Kinetic Weapons"}}
+
+    def get_shared_object(self, object_class, hashnum, table, *args, **kwargs):
+        return types.SimpleNamespace(hash=hashnum, name="Item " + str(hashnum), stats=None)
+
+
+def make_progression_db_json(progression_hash):
+    return {"hash": progression_hash, "visible": True, "scope": 1, "steps": [], "rewardItems": [],
+            "displayProperties": {"name": "Progression " + str(progression_hash), "hasIcon": False, "displayUnitsName": "Points"}}
+
+
+def make_progression_json(level, current_progress):
+    return {"dailyProgress": 0, "dailyLimit": 0, "weeklyProgress": 0, "weeklyLimit": 0, "currentProgress": current_progress,
+            "level": level, "levelCap": 16, "stepIndex": level, "progressToNextLevel": 0, "nextLevelAt": 100}
+
+
+def make_profile():
+    profile = object.__new__(ourdestiny.d2profile)
+    profile.__dict__.update(client_object=StubClient(), membership_type=3, membership_id="4611686018400000000",
+                            section_lock=threading.RLock(), section_jsons={}, prefetched_keys=set(), minted_timestamps={},
+                            built_sections=set(), characters=[])
+    return profile
+
+
+def make_character(profile, character_id):
+    character = object.__new__(ourdestiny.d2character)
+    character.__dict__.update(profile_object=profile, character_id=character_id, built_sections=set(), progressions=[], factions=[])
+    profile.characters.append(character)
+    return character
+
+
+def make_item_json(item_hash, instance_id):
+    return {"itemHash": item_hash, "itemInstanceId": instance_id, "quantity": 1, "bucketHash": KINETIC_BUCKET}
+
+
+def make_items_response(character_id, inventory_jsons, equipment_jsons):
+    return {"profile": {}, "characters": {},
+            "characterInventories": {"data": {character_id: {"items": inventory_jsons}}},
+            "characterEquipment": {"data": {character_id: {"items": equipment_jsons}}}}
+
+
+def build_item_sections(profile, character, inventory_jsons, equipment_jsons):
+    profile.section_jsons.update(make_items_response(character.character_id, inventory_jsons, equipment_jsons))
+    profile.prefetched_keys.update(profile.section_jsons.keys())
+    character.build_section("inventory")
+    character.build_section("equipment")
+
+
+def test_item_moved_into_a_section_not_asked_for_is_not_duplicated():
+    profile = make_profile()
+    character = make_character(profile, "1")
+    held_json, equipped_json = make_item_json(INVENTORY_ITEM_HASHES[0], "6917529000000000001"), make_item_json(INVENTORY_ITEM_HASHES[1], "6917529000000000002")
+    build_item_sections(profile, character, [held_json], [equipped_json])
+    held, equipped = character.inventory[0], character.equipped[0]
+    # The two weapons were swapped in-game
+    profile.client_object.response_json = make_items_response("1", [equipped_json], [held_json])
+    profile.client_object.response_json.update(profile=profile.section_jsons["profile"], characters=profile.section_jsons["characters"])
+
+    changes = profile.refresh(["equipment"])
+
+    assert all(change.change_type == ourdestiny.ChangeType.Changed for change in changes)
+    assert character.equipped == [held] and character.inventory == [equipped]
+    assert character.equipped_index.find(instance_id="6917529000000000001") == [held]
+    assert character.inventory_index.find(instance_id="6917529000000000001") == []
+
+
+def test_progressions_are_matched_by_hash_not_position():
+    profile = make_profile()
+    character = make_character(profile, "1")
+    old_json = {"progressions": {str(GLORY_HASH): make_progression_json(3, 300), str(VALOR_HASH): make_progression_json(5, 500)}}
+    glory = ourdestiny.d2progression(make_progression_db_json(GLORY_HASH), profile, old_json["progressions"][str(GLORY_HASH)])
+    valor = ourdestiny.d2progression(make_progression_db_json(VALOR_HASH), profile, old_json["progressions"][str(VALOR_HASH)])
+    # Held in a different order to the component, as after the user has sorted them
+    character.progressions = [valor, glory]
+    new_json = {"progressions": {str(GLORY_HASH): make_progression_json(4, 400), str(VALOR_HASH): make_progression_json(5, 500)}}
+
+    changes = profile.refresh_progressions(character, old_json, new_json)
+
+    assert [(change.change_type, change.object) for change in changes] == [(ourdestiny.ChangeType.Changed, glory)]
+    assert changes[0].differences["level"] == (3, 4)
+    assert glory.level == 4 and valor.level == 5
+    assert character.progressions == [glory, valor]
+
+
+def make_stack_json(item_hash, quantity):
+    return {"itemHash": item_hash, "quantity": quantity, "bucketHash": KINETIC_BUCKET}
+
+
+def test_item_changes_are_reported_against_the_objects_already_built():
+    profile = make_profile()
+    character = make_character(profile, "1")
+    weapon_json, glimmer_json = make_item_json(INVENTORY_ITEM_HASHES[0], "6917529000000000001"), make_stack_json(3159615086, 500)
+    build_item_sections(profile, character, [weapon_json, glimmer_json], [])
+    weapon, glimmer = character.inventory
+    new_weapon_json = make_item_json(INVENTORY_ITEM_HASHES[1], "6917529000000000003")
+    profile.client_object.response_json = make_items_response("1", [make_stack_json(3159615086, 750), new_weapon_json], [])
+    profile.client_object.response_json.update(profile=profile.section_jsons["profile"], characters=profile.section_jsons["characters"])
+
+    changes = profile.refresh(["inventory"])
+
+    assert [(change.change_type, change.section) for change in changes] == [
+        (ourdestiny.ChangeType.Changed, "inventory"), (ourdestiny.ChangeType.Added, "inventory"), (ourdestiny.ChangeType.Removed, "inventory")]
+    assert changes[0].object is glimmer and changes[0].differences == {"quantity": (500, 750)} and glimmer.quantity == 750
+    assert changes[1].object.instance_id == "6917529000000000003" and changes[2].object is weapon
+    assert character.inventory == [glimmer, changes[1].object]
+    assert character.inventory_index.find(instance_id="6917529000000000001") == []
+
+
+def test_refresh_compares_nothing_when_bungie_has_minted_nothing_new():
+    profile = make_profile()
+    character = make_character(profile, "1")
+    build_item_sections(profile, character, [make_stack_json(3159615086, 500)], [])
+    response_json = make_items_response("1", [make_stack_json(3159615086, 750)], [])
+    response_json.update(responseMintedTimestamp="2026-10-18T10:00:00Z", profile={}, characters={})
+    profile.client_object.response_json = response_json
+
+    assert len(profile.refresh(["inventory"])) == 1
+    response_json["characterInventories"]["data"]["1"]["items"][0]["quantity"] = 1000
+    assert profile.refresh(["inventory"]) == [] and character.inventory[0].quantity == 750
+
+
+def test_record_changes_are_found_by_hash():
+    profile = make_profile()
+    old_records_json = {"1": {"state": 4}, "2": {"state": 4}}
+    records = [ourdestiny.d2record(old_records_json[record_hash], {"hash": int(record_hash)}, profile) for record_hash in old_records_json]
+    new_records_json = {"2": {"state": 1}, "3": {"state": 4}}
+
+    new_records, changes = profile.refresh_records("profile_records", None, records, old_records_json, new_records_json)
+
+    assert [(change.change_type, change.object) for change in changes] == [
+        (ourdestiny.ChangeType.Changed, records[1]), (ourdestiny.ChangeType.Added, new_records[1]), (ourdestiny.ChangeType.Removed, records[0])]
+    assert changes[0].differences == {"state": (4, 1)} and records[1].state.record_redeemed
+    assert new_records[0] is records[1]
@@ -0,0 +1,110 @@
+import types
+import pytest
+import ourdestiny
+import ourdestiny.responsecache
+
+INVENTORIES = [ourdestiny.ComponentType.ProfileInventories, ourdestiny.ComponentType.CharacterInventories]
+RECORDS = [ourdestiny.ComponentType.Records]
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(ourdestiny.responsecache, "time", types.SimpleNamespace(time=fake_clock.time))
+    return fake_clock
+
+
+@pytest.fixture(params=["memory", "disk"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return ourdestiny.d2memorycachebackend()
+    return ourdestiny.d2diskcachebackend(str(tmp_path / "cache"))
+
+
+def make_response(minted_at, marker):
+    return {"ErrorStatus": "Success", "Response": {"responseMintedTimestamp": minted_at, "marker": marker}}
+
+
+def test_keys_ignore_the_order_of_components():
+    response_cache = ourdestiny.d2responsecache()
+
+    assert response_cache.get_key(3, "4611686018400000000", INVENTORIES) == response_cache.get_key("3", "4611686018400000000", INVENTORIES[::-1])
+    assert response_cache.get_key(3, "4611686018400000000", INVENTORIES) == "3/4611686018400000000/102,201"
+
+
+def test_responses_are_fresh_for_their_shortest_component_ttl(clock, backend):
+    response_cache = ourdestiny.d2responsecache(backend, component_ttls={ourdestiny.ComponentType.Records: 20})
+    key = response_cache.get_key(3, "4611686018400000000", INVENTORIES + RECORDS)
+
+    response_cache.store(key, make_response("2026-10-18T10:00:00.1234567Z", 1), INVENTORIES + RECORDS)
+
+    clock.now += 19
+    assert response_cache.get_fresh(key)["Response"]["marker"] == 1
+    clock.now += 2
+    assert response_cache.get_fresh(key) is None and response_cache.get_entry(key) is not None
+    stats = response_cache.get_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_older_responses_never_replace_newer_ones(clock, backend):
+    response_cache = ourdestiny.d2responsecache(backend)
+    key = response_cache.get_key(3, "4611686018400000000", RECORDS)
+    response_cache.store(key, make_response("2026-10-18T10:00:00.5Z", "newer"), RECORDS)
+    clock.now += 600
+
+    served = response_cache.store(key, make_response("2026-10-18T10:00:00.4999999Z", "older"), RECORDS,
+                                  entry=response_cache.get_entry(key))
+
+    assert served["Response"]["marker"] == "newer" and response_cache.get_fresh(key)["Response"]["marker"] == "newer"
+    assert response_cache.get_stats()["revalidations"] == 1
+    response_cache.store(key, {"ErrorStatus": "SystemDisabled"}, RECORDS, entry=response_cache.get_entry(key))
+    assert response_cache.get_fresh(key)["Response"]["marker"] == "newer"
+
+
+def test_invalidating_a_profile_leaves_other_profiles(clock, backend):
+    response_cache = ourdestiny.d2responsecache(backend)
+    keys = [response_cache.get_key(3, membership_id, components) for membership_id in ["4611686018400000000", "46116860184000000001"]
+            for components in [INVENTORIES, RECORDS]]
+    for key in keys:
+        response_cache.store(key, make_response("2026-10-18T10:00:00Z", key), RECORDS)
+
+    response_cache.invalidate(3, "4611686018400000000")
+
+    assert [response_cache.get_entry(key) is None for key in keys] == [True, True, False, False]
+    assert sorted(backend.keys()) == sorted(keys[2:])
+
+
+def test_disk_cache_invalidates_without_reading_files(clock, tmp_path, monkeypatch):
+    backend = ourdestiny.d2diskcachebackend(str(tmp_path / "cache"))
+    response_cache = ourdestiny.d2responsecache(backend)
+    key = response_cache.get_key(3, "4611686018400000000", RECORDS)
+    response_cache.store(key, make_response("2026-10-18T10:00:00Z", 1), RECORDS)
+
+    def fail_to_open(*args, **kwargs):
+        raise AssertionError("a cached response was read")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(ourdestiny.responsecache, "open", fail_to_open, raising=False)
+        response_cache.invalidate(3, "4611686018400000000")
+
+    assert response_cache.get_entry(key) is None
+
+
+def test_disk_cache_clear_removes_old_flat_files(tmp_path):
+    cache_directory = tmp_path / "cache"
+    backend = ourdestiny.d2diskcachebackend(str(cache_directory))
+    backend.put("3/4611686018400000000/900", {"response_json": {}})
+    (cache_directory / "0123456789abcdef.json").write_text("{}")
+
+    backend.clear()
+
+    assert backend.keys() == [] and not (cache_directory / "0123456789abcdef.json").exists()
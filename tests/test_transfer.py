@@ -0,0 +1,161 @@
+import types
+import ourdestiny
+
+VAULT_BUCKET = 138197802
+MATERIALS_BUCKET = 3865314626
+WEAPONS_BUCKET = 1498876634
+CONSUMABLES_BUCKET = 1469714392
+POSTMASTER_BUCKET = 215593132
+
+BUCKETS = {
+    VAULT_BUCKET: {"hash": VAULT_BUCKET, "index": 0, "displayProperties": {"name": "General"}},
+    MATERIALS_BUCKET: {"hash": MATERIALS_BUCKET, "index": 1, "displayProperties": {"name": "Materials"}},
+    WEAPONS_BUCKET: {"hash": WEAPONS_BUCKET, "index": 2, "displayProperties": {"name": "Kinetic Weapons"}},
+    CONSUMABLES_BUCKET: {"hash": CONSUMABLES_BUCKET, "index": 3, "scope": 1, "displayProperties": {"name": "Consumables"}},
+    POSTMASTER_BUCKET: {"hash": POSTMASTER_BUCKET, "index": 4, "displayProperties": {"name": "Lost Items"}}
+}
+
+
+class StubResponse:
+
+    def __init__(self, response_json):
+        self.response_json = response_json
+
+    def json(self):
+        return self.response_json
+
+
+class StubClient:
+
+    root_endpoint = "https://www.bungie.net/Platform"
+    request_header = {}
+
+    def __init__(self):
+        self.executor = ourdestiny.d2executor(4)
+        self.requests = []
+
+    def get_executor(self):
+        return self.executor
+
+    def get_from_db(self, hashnum, table, database="mobileWorldContent"):
+        return BUCKETS[int(hashnum)]
+
+    def invalidate_cached_components(self, platform, destiny_membership_id):
+        pass
+
+    def http_post(self, url, json=None, headers=None):
+        self.requests.append(json)
+        return StubResponse({"ErrorStatus": "Success", "ErrorCode": 1, "Message": "Ok"})
+
+
+def make_profile():
+    profile = object.__new__(ourdestiny.d2profile)
+    profile.__dict__.update(client_object=StubClient(), membership_id="4611686018400000000", vault=[],
+                            vault_index=ourdestiny.d2itemindex(), profile_inventory=[],
+                            profile_inventory_index=ourdestiny.d2itemindex(), built_sections={"profile_inventory"},
+                            characters=[])
+    return profile
+
+
+def make_character(profile, character_id):
+    character = object.__new__(ourdestiny.d2character)
+    character.__dict__.update(profile_object=profile, character_id=character_id, membership_type=3, inventory=[],
+                              inventory_index=ourdestiny.d2itemindex(), postmaster=[],
+                              postmaster_index=ourdestiny.d2itemindex())
+    profile.characters.append(character)
+    return character
+
+
+def make_item(profile, owner, item_hash, quantity, bucket_hash, instance_id=None, in_postmaster=False):
+    item = object.__new__(ourdestiny.d2item)
+    item.profile_object = profile
+    item.item_hash = item_hash
+    item.definition = types.SimpleNamespace(name="Item " + str(item_hash), bucket_type_hash=bucket_hash)
+    item.instance_id = instance_id
+    item.quantity = quantity
+    item.perks = []
+    item.owner_object = owner
+    if in_postmaster:
+        item.bucket_info = BUCKETS[POSTMASTER_BUCKET]
+        owner.postmaster.append(item)
+        owner.postmaster_index.add(item)
+    elif owner is None:
+        item.bucket_info = BUCKETS[VAULT_BUCKET]
+        profile.vault.append(item)
+        profile.vault_index.add(item)
+    else:
+        item.bucket_info = BUCKETS[bucket_hash]
+        owner.inventory.append(item)
+        owner.inventory_index.add(item)
+    return item
+
+
+def test_partial_stack_between_characters():
+    profile = make_profile()
+    first, second = make_character(profile, "1"), make_character(profile, "2")
+    stack = make_item(profile, first, 1305274547, 10, MATERIALS_BUCKET)
+
+    transfer, = profile.transfer_items([(stack, second, 4)])
+
+    assert transfer.status == ourdestiny.TransferStatus.Succeeded, transfer.error
+    assert [request["transferToVault"] for request in profile.client_object.requests] == [True, False]
+    assert [request["characterId"] for request in profile.client_object.requests] == ["1", "2"]
+    assert stack.quantity == 6 and stack.owner_object is first and first.inventory == [stack]
+    moved = transfer.moved_item
+    assert moved is not stack and moved.quantity == 4 and moved.owner_object is second
+    assert second.inventory == [moved] and second.inventory_index.find(bucket_hash=MATERIALS_BUCKET) == [moved]
+    assert profile.vault == [] and len(profile.vault_index) == 0
+
+
+def test_partial_stack_joins_stack_in_vault():
+    profile = make_profile()
+    character = make_character(profile, "1")
+    stack = make_item(profile, character, 1305274547, 10, MATERIALS_BUCKET)
+    vault_stack = make_item(profile, None, 1305274547, 5, MATERIALS_BUCKET)
+
+    transfer, = profile.transfer_items([(stack, None, 3)])
+
+    assert transfer.succeeded and transfer.moved_item is vault_stack
+    assert stack.quantity == 7 and vault_stack.quantity == 8 and profile.vault == [vault_stack]
+
+
+def test_bucket_changes_with_place():
+    profile = make_profile()
+    first, second = make_character(profile, "1"), make_character(profile, "2")
+    weapon = make_item(profile, first, 1363886209, 1, WEAPONS_BUCKET, instance_id="6917529000000000001")
+
+    first_move, = profile.transfer_items([(weapon, None)])
+    assert first_move.succeeded and weapon.bucket_info["hash"] == VAULT_BUCKET
+    assert profile.vault_index.find(slot="General") == [weapon] and first.inventory_index.find(slot=2) == []
+
+    second_move, = profile.transfer_items([(weapon, second)])
+    assert second_move.succeeded and weapon.owner_object is second and weapon.bucket_info["hash"] == WEAPONS_BUCKET
+    assert second.inventory_index.find(slot=2) == [weapon] and len(profile.vault_index) == 0
+
+
+def test_postmaster_sweep_moves_items_into_their_buckets():
+    profile = make_profile()
+    character = make_character(profile, "1")
+    weapon = make_item(profile, character, 1363886209, 1, WEAPONS_BUCKET, instance_id="6917529000000000002", in_postmaster=True)
+    consumables = make_item(profile, character, 3159615086, 5, CONSUMABLES_BUCKET, in_postmaster=True)
+
+    pulls = profile.pull_all_from_postmaster()
+
+    assert [pull.status for pull in pulls] == [ourdestiny.TransferStatus.Succeeded] * 2
+    assert character.postmaster == [] and len(character.postmaster_index) == 0
+    assert character.inventory == [weapon] and character.inventory_index.find(slot=2) == [weapon]
+    assert weapon.bucket_info["hash"] == WEAPONS_BUCKET
+    assert profile.profile_inventory == [consumables] and consumables.owner_object is None
+    assert profile.profile_inventory_index.find(bucket_hash=CONSUMABLES_BUCKET) == [consumables]
+
+
+def test_partial_pull_splits_stack():
+    profile = make_profile()
+    character = make_character(profile, "1")
+    materials = make_item(profile, character, 1305274547, 10, MATERIALS_BUCKET, in_postmaster=True)
+
+    character.apply_pull_from_postmaster_response(materials, 4, {"ErrorStatus": "Success", "ErrorCode": 1, "Message": "Ok"})
+
+    assert character.postmaster == [materials] and materials.quantity == 6
+    pulled, = character.inventory
+    assert pulled.quantity == 4 and pulled.bucket_info["hash"] == MATERIALS_BUCKET